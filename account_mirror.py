@@ -0,0 +1,458 @@
+"""
+Espelho local da conta de anúncios (campanhas → conjuntos → anúncios →
+criativos → imagens) em SQLite, sincronizado de forma incremental
+"""
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Optional
+from local_store import DEFAULT_CACHE_DIR, SQLITE_BUSY_TIMEOUT
+
+
+DEFAULT_MIRROR_PATH = os.getenv('ADS_ACCOUNT_MIRROR', os.path.join(DEFAULT_CACHE_DIR, 'account_mirror.sqlite3'))
+
+# Arestas da Graph API espelhadas, na ordem de sincronização
+MIRROR_EDGES = ('campaigns', 'adsets', 'ads', 'adcreatives', 'adimages')
+
+# Arestas com updated_time filtrável: as demais só são percorridas em sync(full=True)
+INCREMENTAL_EDGES = ('campaigns', 'adsets', 'ads')
+
+# Sem filtro de status a Graph API omite objetos arquivados e excluídos;
+# o espelho precisa deles para refletir mudanças de status
+MIRROR_STATUSES = (
+    'ACTIVE', 'PAUSED', 'DELETED', 'ARCHIVED', 'IN_PROCESS', 'WITH_ISSUES',
+    'CAMPAIGN_PAUSED', 'ADSET_PAUSED', 'DISAPPROVED', 'PENDING_REVIEW',
+    'PREAPPROVED', 'PENDING_BILLING_INFO',
+)
+
+# Status ignorados nas buscas por nome (padrão)
+INACTIVE_STATUSES = ('DELETED', 'ARCHIVED')
+
+_CREATIVE_FIELDS = 'id,name,status,image_hash,object_story_spec,asset_feed_spec'
+
+# Campos lidos de cada aresta; os anúncios trazem o criativo expandido, então
+# a sincronização incremental também alcança os criativos novos
+MIRROR_FIELDS = {
+    'campaigns': ('id', 'name', 'objective', 'status', 'effective_status', 'daily_budget', 'updated_time'),
+    'adsets': ('id', 'name', 'campaign_id', 'status', 'effective_status', 'daily_budget', 'updated_time'),
+    'ads': ('id', 'name', 'campaign_id', 'adset_id', f"creative{{{_CREATIVE_FIELDS}}}",
+            'status', 'effective_status', 'updated_time'),
+    'adcreatives': tuple(_CREATIVE_FIELDS.split(',')),
+    'adimages': ('hash', 'name', 'url', 'status', 'updated_time'),
+}
+
+# Objetos gravados por transação durante a sincronização
+_WRITE_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id               TEXT PRIMARY KEY,
+    account_id       TEXT NOT NULL,
+    name             TEXT,
+    objective        TEXT,
+    status           TEXT,
+    effective_status TEXT,
+    daily_budget     INTEGER,
+    updated_time     INTEGER,
+    mirrored_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_name ON campaigns (account_id, name);
+CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns (account_id, effective_status);
+
+CREATE TABLE IF NOT EXISTS ad_sets (
+    id               TEXT PRIMARY KEY,
+    account_id       TEXT NOT NULL,
+    campaign_id      TEXT,
+    name             TEXT,
+    status           TEXT,
+    effective_status TEXT,
+    daily_budget     INTEGER,
+    updated_time     INTEGER,
+    mirrored_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ad_sets_name ON ad_sets (account_id, name);
+CREATE INDEX IF NOT EXISTS idx_ad_sets_status ON ad_sets (account_id, effective_status);
+CREATE INDEX IF NOT EXISTS idx_ad_sets_campaign ON ad_sets (campaign_id);
+
+CREATE TABLE IF NOT EXISTS ads (
+    id               TEXT PRIMARY KEY,
+    account_id       TEXT NOT NULL,
+    campaign_id      TEXT,
+    ad_set_id        TEXT,
+    creative_id      TEXT,
+    name             TEXT,
+    status           TEXT,
+    effective_status TEXT,
+    updated_time     INTEGER,
+    mirrored_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ads_name ON ads (account_id, name);
+CREATE INDEX IF NOT EXISTS idx_ads_status ON ads (account_id, effective_status);
+CREATE INDEX IF NOT EXISTS idx_ads_campaign ON ads (campaign_id);
+CREATE INDEX IF NOT EXISTS idx_ads_ad_set ON ads (ad_set_id);
+CREATE INDEX IF NOT EXISTS idx_ads_creative ON ads (creative_id);
+
+CREATE TABLE IF NOT EXISTS creatives (
+    id          TEXT PRIMARY KEY,
+    account_id  TEXT NOT NULL,
+    name        TEXT,
+    status      TEXT,
+    mirrored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_creatives_name ON creatives (account_id, name);
+
+CREATE TABLE IF NOT EXISTS creative_images (
+    creative_id TEXT NOT NULL,
+    image_hash  TEXT NOT NULL,
+    PRIMARY KEY (creative_id, image_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_creative_images_hash ON creative_images (image_hash);
+
+CREATE TABLE IF NOT EXISTS images (
+    account_id   TEXT NOT NULL,
+    hash         TEXT NOT NULL,
+    name         TEXT,
+    url          TEXT,
+    status       TEXT,
+    updated_time INTEGER,
+    mirrored_at  REAL NOT NULL,
+    PRIMARY KEY (account_id, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_images_name ON images (account_id, name);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    account_id TEXT NOT NULL,
+    edge       TEXT NOT NULL,
+    watermark  INTEGER,
+    synced_at  REAL NOT NULL,
+    PRIMARY KEY (account_id, edge)
+);
+"""
+
+_TABLES = {
+    'campaigns': 'campaigns',
+    'adsets': 'ad_sets',
+    'ads': 'ads',
+    'adcreatives': 'creatives',
+    'adimages': 'images',
+}
+
+
+class AccountMirror:
+    """
+    Cópia local dos objetos de uma conta, para buscas sem chamadas à API
+
+    Perguntas como "já existe campanha com este nome?" ou "quais anúncios
+    usam a imagem X?" viram consultas indexadas (nome, status, hash da imagem
+    e IDs dos pais). sync() só busca o que mudou desde a última sincronização
+    (marca d'água de updated_time por aresta); o MetaAdsManager também grava
+    aqui cada objeto que cria, então o espelho não fica atrás das próprias
+    criações da automação entre uma sincronização e outra.
+
+    Criativos não têm updated_time na Graph API: os novos chegam expandidos
+    junto dos anúncios, e a aresta de criativos (assim como a biblioteca de
+    imagens) só é percorrida inteira em sync(full=True).
+    """
+
+    def __init__(self, account_id: str, path: str = DEFAULT_MIRROR_PATH):
+        """
+        Args:
+            account_id: ID da conta de anúncios (act_xxxxx)
+            path: Arquivo do banco (compartilhável entre contas; criado se não existir)
+        """
+        self.account_id = account_id
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Fecha o banco"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> 'AccountMirror':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # Sincronização
+
+    def sync(self, manager, edges: Iterable[str] = MIRROR_EDGES, full: bool = False) -> dict[str, int]:
+        """
+        Traz para o espelho os objetos alterados desde a última sincronização
+
+        Args:
+            manager: MetaAdsManager da mesma conta (usa os iteradores paginados)
+            edges: Arestas a sincronizar (ver MIRROR_EDGES)
+            full: Percorrer tudo, ignorando as marcas d'água; também inclui
+                  criativos e imagens, que não têm filtro por alteração
+
+        Returns:
+            Dicionário aresta → objetos gravados
+        """
+        counts = {}
+        for edge in edges:
+            if edge not in _TABLES:
+                raise ValueError(f"Aresta desconhecida: {edge} (use {', '.join(MIRROR_EDGES)})")
+            if edge not in INCREMENTAL_EDGES and not full:
+                continue
+
+            started = time.time()
+            watermark = None if full else self.watermark(edge)
+            objects = self._iter_remote(manager, edge, watermark)
+
+            # Só avança a marca d'água ao fim da aresta: uma sincronização
+            # interrompida recomeça do mesmo ponto
+            count, newest = 0, watermark
+            while True:
+                chunk = list(islice(objects, _WRITE_CHUNK))
+                if not chunk:
+                    break
+                count += self.upsert(edge, chunk)
+                times = [t for t in map(_unix_time, (obj.get('updated_time') for obj in chunk)) if t]
+                if times:
+                    newest = max(newest or 0, max(times))
+
+            self._set_watermark(edge, newest)
+            counts[edge] = count
+            manager.log.info(f"🪞 Espelho: {count} {edge} sincronizados em {time.time() - started:.1f}s"
+                             f"{' (completo)' if watermark is None else ''}",
+                             extra={'edge': edge, 'objects': count, 'account': self.account_id})
+        return counts
+
+    def _iter_remote(self, manager, edge: str, watermark: Optional[int]):
+        fields = list(MIRROR_FIELDS[edge])
+        if edge == 'adcreatives':
+            return manager.iter_creatives(fields=fields)
+        if edge == 'adimages':
+            return manager.iter_images(fields=fields)
+
+        iterate = {'campaigns': manager.iter_campaigns, 'adsets': manager.iter_ad_sets, 'ads': manager.iter_ads}[edge]
+        # GREATER_THAN é estrito: recua um segundo para não perder alterações
+        # no mesmo segundo da marca d'água (regravar é idempotente)
+        return iterate(
+            fields=fields,
+            effective_status=list(MIRROR_STATUSES),
+            updated_since=watermark - 1 if watermark else None
+        )
+
+    def watermark(self, edge: str) -> Optional[int]:
+        """Maior updated_time (Unix) já sincronizado na aresta, ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM sync_state WHERE account_id = ? AND edge = ?",
+                (self.account_id, edge)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, edge: str, watermark: Optional[int]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (account_id, edge, watermark, synced_at) VALUES (?, ?, ?, ?)",
+                (self.account_id, edge, watermark, time.time())
+            )
+
+    # Gravação
+
+    def upsert(self, edge: str, objects: Iterable[dict]) -> int:
+        """
+        Grava (ou atualiza) objetos no formato da Graph API em uma transação
+
+        Args:
+            edge: Aresta de origem ('campaigns', 'adsets', 'ads', 'adcreatives', 'adimages')
+            objects: Dicionários com os campos lidos (campos ausentes ficam nulos)
+
+        Returns:
+            Número de objetos gravados
+        """
+        now = time.time()
+        account = self.account_id
+        rows, creatives = [], []
+
+        for obj in objects:
+            if edge == 'campaigns':
+                rows.append((obj['id'], account, obj.get('name'), obj.get('objective'), obj.get('status'),
+                             obj.get('effective_status'), _int(obj.get('daily_budget')),
+                             _unix_time(obj.get('updated_time')), now))
+            elif edge == 'adsets':
+                rows.append((obj['id'], account, obj.get('campaign_id'), obj.get('name'), obj.get('status'),
+                             obj.get('effective_status'), _int(obj.get('daily_budget')),
+                             _unix_time(obj.get('updated_time')), now))
+            elif edge == 'ads':
+                creative = obj.get('creative') or {}
+                if isinstance(creative, str):
+                    creative = {'id': creative}
+                if len(creative) > 1:
+                    creatives.append(creative)
+                rows.append((obj['id'], account, obj.get('campaign_id'), obj.get('adset_id'), creative.get('id'),
+                             obj.get('name'), obj.get('status'), obj.get('effective_status'),
+                             _unix_time(obj.get('updated_time')), now))
+            elif edge == 'adcreatives':
+                creatives.append(obj)
+            elif edge == 'adimages':
+                rows.append((account, obj['hash'], obj.get('name'), obj.get('url'), obj.get('status'),
+                             _unix_time(obj.get('updated_time')), now))
+            else:
+                raise ValueError(f"Aresta desconhecida: {edge}")
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            if rows:
+                placeholders = ', '.join('?' * len(rows[0]))
+                self._conn.executemany(f"INSERT OR REPLACE INTO {_TABLES[edge]} VALUES ({placeholders})", rows)
+            if creatives:
+                self._write_creatives(creatives, now)
+
+        return len(rows) or len(creatives)
+
+    def _write_creatives(self, creatives: list[dict], now: float) -> None:
+        """Grava criativos e o vínculo criativo → hashes de imagem (chamar em transação)"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO creatives VALUES (?, ?, ?, ?, ?)",
+            [(c['id'], self.account_id, c.get('name'), c.get('status'), now) for c in creatives]
+        )
+        self._conn.executemany(
+            "DELETE FROM creative_images WHERE creative_id = ?",
+            [(c['id'],) for c in creatives]
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO creative_images VALUES (?, ?)",
+            [(c['id'], image_hash) for c in creatives for image_hash in creative_image_hashes(c)]
+        )
+
+    # Consultas
+
+    def find(
+        self,
+        edge: str,
+        name: str,
+        parent_id: Optional[str] = None,
+        include_inactive: bool = False
+    ) -> list[dict]:
+        """
+        Objetos da conta com o nome exato, do mais recente ao mais antigo
+
+        Args:
+            edge: 'campaigns', 'adsets', 'ads', 'adcreatives' ou 'adimages'
+            name: Nome do objeto
+            parent_id: Restringir à campanha (conjuntos) ou ao conjunto (anúncios)
+            include_inactive: Incluir objetos arquivados e excluídos
+
+        Returns:
+            Lista de registros (dicionários com as colunas do espelho)
+        """
+        table = _TABLES[edge]
+        sql = f"SELECT * FROM {table} WHERE account_id = ? AND name = ?"
+        params = [self.account_id, name]
+        if parent_id is not None:
+            parent = {'adsets': 'campaign_id', 'ads': 'ad_set_id'}.get(edge)
+            if parent is None:
+                raise ValueError(f"{edge} não tem objeto pai para filtrar")
+            sql += f" AND {parent} = ?"
+            params.append(parent_id)
+        if not include_inactive and edge in INCREMENTAL_EDGES:
+            sql += f" AND COALESCE(effective_status, '') NOT IN ({', '.join('?' * len(INACTIVE_STATUSES))})"
+            params.extend(INACTIVE_STATUSES)
+        order = "COALESCE(updated_time, mirrored_at)" if edge in INCREMENTAL_EDGES + ('adimages',) else "mirrored_at"
+        return self._select(f"{sql} ORDER BY {order} DESC", params)
+
+    def find_id(self, edge: str, name: str, parent_id: Optional[str] = None) -> Optional[str]:
+        """ID do objeto ativo mais recente com o nome (hash, para imagens), ou None"""
+        found = self.find(edge, name, parent_id)
+        if not found:
+            return None
+        return found[0]['hash' if edge == 'adimages' else 'id']
+
+    def get(self, edge: str, object_id: str) -> Optional[dict]:
+        """Registro de um objeto pelo ID (hash, para imagens), ou None"""
+        key = 'hash' if edge == 'adimages' else 'id'
+        rows = self._select(f"SELECT * FROM {_TABLES[edge]} WHERE account_id = ? AND {key} = ?",
+                            [self.account_id, object_id])
+        return rows[0] if rows else None
+
+    def children(self, edge: str, parent_id: str) -> list[dict]:
+        """Conjuntos de uma campanha ('adsets') ou anúncios de um conjunto/campanha ('ads')"""
+        if edge == 'adsets':
+            return self._select("SELECT * FROM ad_sets WHERE campaign_id = ?", [parent_id])
+        if edge == 'ads':
+            return self._select("SELECT * FROM ads WHERE ad_set_id = ? OR campaign_id = ?", [parent_id, parent_id])
+        raise ValueError(f"{edge} não tem objeto pai")
+
+    def ads_using_image(self, image_hash: str) -> list[dict]:
+        """Anúncios cujo criativo usa a imagem (inclusive por posicionamento)"""
+        return self._select(
+            # CROSS JOIN fixa a ordem no SQLite: parte do índice de hash, não do de conta
+            "SELECT ads.* FROM creative_images "
+            "CROSS JOIN ads ON ads.creative_id = creative_images.creative_id "
+            "WHERE creative_images.image_hash = ? AND ads.account_id = ?",
+            [image_hash, self.account_id]
+        )
+
+    def count(self, edge: str) -> int:
+        """Objetos da aresta no espelho"""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {_TABLES[edge]} WHERE account_id = ?", (self.account_id,)
+            ).fetchone()[0]
+
+    def _select(self, sql: str, params: list) -> list[dict]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def creative_image_hashes(creative: dict) -> list[str]:
+    """Hashes de imagem usados por um criativo (campo direto, object_story_spec e asset_feed_spec)"""
+    hashes = []
+    if creative.get('image_hash'):
+        hashes.append(creative['image_hash'])
+
+    story = creative.get('object_story_spec') or {}
+    if isinstance(story, str):
+        story = json.loads(story)
+    for key in ('link_data', 'photo_data'):
+        image_hash = (story.get(key) or {}).get('image_hash')
+        if image_hash:
+            hashes.append(image_hash)
+
+    feed = creative.get('asset_feed_spec') or {}
+    if isinstance(feed, str):
+        feed = json.loads(feed)
+    hashes.extend(image['hash'] for image in feed.get('images', []) if image.get('hash'))
+
+    return list(dict.fromkeys(hashes))
+
+
+def _unix_time(value) -> Optional[int]:
+    """updated_time da Graph API ('2025-10-01T12:00:00+0000') → segundos Unix"""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').timestamp())
+
+
+def _int(value) -> Optional[int]:
+    return int(value) if value not in (None, '') else None
@@ -0,0 +1,101 @@
+"""
+Journal durável das etapas concluídas de cada anúncio, para retomar execuções
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Optional
+
+
+DEFAULT_JOURNAL_PATH = './journal/ads_journal.jsonl'
+
+
+class AdJournal:
+    """
+    Registro append-only (JSON Lines) das etapas concluídas por anúncio
+
+    Cada linha guarda a chave do anúncio, a etapa (image, upload, campaign,
+    ad_set, creative, ad...) e os dados produzidos por ela (caminho da imagem,
+    hash, IDs). Cada gravação é sincronizada com o disco antes de retornar,
+    então uma execução interrompida pode ser refeita pulando o que já existe.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        """
+        Args:
+            path: Arquivo do journal (criado se não existir)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, dict]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        """
+        Reconstrói o estado a partir das linhas gravadas
+
+        Uma última linha sem quebra de linha foi truncada por uma interrupção:
+        o arquivo é cortado de volta ao fim da última linha completa, para que
+        a próxima gravação não seja colada a ela.
+        """
+        complete = 0
+        with open(self.path, 'rb+') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    f.truncate(complete)
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries.setdefault(record['key'], {})[record['stage']] = record['data']
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Gera uma chave estável a partir da configuração do anúncio
+
+        A mesma configuração sempre produz a mesma chave, então rodar o mesmo
+        lote de novo encontra as etapas já registradas.
+        """
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def get(self, key: str) -> dict[str, dict]:
+        """Retorna as etapas concluídas do anúncio (etapa → dados)"""
+        with self._lock:
+            return dict(self._entries.get(key, {}))
+
+    def stage(self, key: str, stage: str) -> Optional[dict]:
+        """Retorna os dados de uma etapa concluída, ou None"""
+        with self._lock:
+            return self._entries.get(key, {}).get(stage)
+
+    def record(self, key: str, stage: str, **data: Any) -> None:
+        """
+        Registra a conclusão de uma etapa e sincroniza com o disco
+
+        Args:
+            key: Chave do anúncio
+            stage: Nome da etapa
+            **data: Dados produzidos pela etapa (devem ser serializáveis em JSON)
+        """
+        line = json.dumps(
+            {'key': key, 'stage': stage, 'data': data, 'ts': time.time()},
+            ensure_ascii=False
+        )
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries.setdefault(key, {})[stage] = data
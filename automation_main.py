@@ -2,29 +2,110 @@
 Script principal de automação: Geração de imagens + Publicação de anúncios Meta
 """
 import os
-from dotenv import load_dotenv
+import threading
 from image_generator import ImageGenerator
 from meta_ads_manager import MetaAdsManager
 from typing import Optional
 import json
+import inspect
+import multiprocessing
+from contextlib import nullcontext
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pipeline import StagePipeline
+from retry import RetryPolicy, retry_call
+from ad_journal import AdJournal
+from run_store import RunStore
+from structured_logging import get_logger, flush_logs
+
+
+# Campos do resultado da imagem guardados no journal para a retomada
+JOURNAL_IMAGE_FIELDS = ('url', 'revised_prompt', 'size', 'quality', 'style', 'local_path', 'md5')
 
 
 class AdAutomation:
     """Classe principal para automação completa de anúncios"""
 
-    def __init__(self):
-        """Inicializa a automação carregando variáveis de ambiente"""
-        load_dotenv()
-
-        print("🚀 Inicializando Automação de Anúncios")
-        print("=" * 60)
+    def __init__(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        journal: Optional[AdJournal] = None,
+        quiet: bool = False,
+        run_store: Optional[RunStore] = None
+    ):
+        """
+        Inicializa a automação carregando variáveis de ambiente
 
-        self.image_generator = ImageGenerator()
-        self.meta_manager = MetaAdsManager()
+        Args:
+            retry_policy: Retentativas das etapas de geração e download da imagem
+                          (a publicação usa a política do MetaAdsManager)
+            journal: Journal de etapas concluídas; com ele, rodar de novo a mesma
+                     configuração retoma cada anúncio da última etapa registrada
+            quiet: Registrar só avisos e erros, aqui e no ImageGenerator e
+                   MetaAdsManager criados (ver structured_logging.py)
+            run_store: Registro dos resultados de cada anúncio (padrão: ./logs/runs.sqlite3)
+
+        O ImageGenerator, o MetaAdsManager e o RunStore só são criados no
+        primeiro uso, então comandos que tocam apenas um dos lados não
+        importam nem configuram o outro (credenciais ausentes aparecem nesse
+        momento).
+        """
+        from dotenv import load_dotenv
+        load_dotenv()
 
-        print("✅ Automação inicializada com sucesso!")
-        print("=" * 60 + "\n")
+        self.quiet = quiet
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.journal = journal
+        self._run_store = run_store
+        self.log = get_logger('automation', quiet=quiet)
+
+        self.log.info("🚀 Inicializando Automação de Anúncios")
+
+        self._image_generator: Optional[ImageGenerator] = None
+        self._meta_manager: Optional[MetaAdsManager] = None
+        self._components_lock = threading.Lock()
+
+        self.log.info("✅ Automação inicializada com sucesso!")
+        flush_logs()
+
+    @property
+    def image_generator(self) -> ImageGenerator:
+        """Gerador de imagens, criado no primeiro acesso"""
+        if self._image_generator is None:
+            with self._components_lock:
+                if self._image_generator is None:
+                    self._image_generator = ImageGenerator(quiet=self.quiet)
+        return self._image_generator
+
+    @image_generator.setter
+    def image_generator(self, generator: ImageGenerator) -> None:
+        self._image_generator = generator
+
+    @property
+    def meta_manager(self) -> MetaAdsManager:
+        """Gerenciador da Meta, criado no primeiro acesso"""
+        if self._meta_manager is None:
+            with self._components_lock:
+                if self._meta_manager is None:
+                    self._meta_manager = MetaAdsManager(quiet=self.quiet)
+        return self._meta_manager
+
+    @meta_manager.setter
+    def meta_manager(self, manager: MetaAdsManager) -> None:
+        self._meta_manager = manager
+
+    @property
+    def run_store(self) -> RunStore:
+        """Registro dos resultados, aberto no primeiro acesso"""
+        if self._run_store is None:
+            with self._components_lock:
+                if self._run_store is None:
+                    self._run_store = RunStore()
+        return self._run_store
+
+    @run_store.setter
+    def run_store(self, store: RunStore) -> None:
+        self._run_store = store
 
     def create_ad_with_ai_image(
         self,
@@ -33,6 +114,7 @@ class AdAutomation:
         image_size: str = "1024x1024",
         image_quality: str = "hd",
         image_style: str = "vivid",
+        image_response_format: str = "url",
 
         # Parâmetros do anúncio
         campaign_name: str = None,
@@ -47,7 +129,11 @@ class AdAutomation:
         # Configurações adicionais
         objective: str = "OUTCOME_TRAFFIC",
         call_to_action: str = "LEARN_MORE",
-        save_locally: bool = True
+        save_locally: bool = True,
+        share_ad_set: bool = False,
+        optimize_image: bool = False,
+        jpeg_quality: int = 85,
+        derive_placements: bool = False
     ) -> dict:
         """
         Cria um anúncio completo: gera imagem com IA e publica na Meta
@@ -57,6 +143,8 @@ class AdAutomation:
             image_size: Tamanho da imagem
             image_quality: Qualidade (standard/hd)
             image_style: Estilo (vivid/natural)
+            image_response_format: Entrega da imagem ('url' ou 'b64_json',
+                                   que evita o download do CDN)
             campaign_name: Nome da campanha
             ad_title: Título do anúncio
             ad_body: Texto principal
@@ -66,153 +154,501 @@ class AdAutomation:
             objective: Objetivo da campanha
             call_to_action: Tipo de CTA
             save_locally: Salvar imagem localmente
+            share_ad_set: Anexar o anúncio à campanha/conjunto já existentes
+                          para a mesma campanha, segmentação e orçamento
+            optimize_image: Converter a imagem em JPEG progressivo otimizado,
+                            sem metadados, antes do upload
+            jpeg_quality: Qualidade do JPEG otimizado
+            derive_placements: Gerar uma única imagem retangular e derivar dela,
+                               localmente, as versões 1:1, 4:5 e 9:16, publicadas
+                               em um só criativo com imagem por posicionamento
+                               (imagens quadradas passam a ser geradas em 1024x1792)
 
         Returns:
             Dicionário com informações da imagem e do anúncio criado
         """
-        print("\n" + "=" * 60)
-        print("🎯 INICIANDO AUTOMAÇÃO COMPLETA")
-        print("=" * 60)
-
+        ctx = self._new_context(
+            image_prompt=image_prompt,
+            image_size=image_size,
+            image_quality=image_quality,
+            image_style=image_style,
+            image_response_format=image_response_format,
+            campaign_name=campaign_name,
+            ad_title=ad_title,
+            ad_body=ad_body,
+            link_url=link_url,
+            daily_budget=daily_budget,
+            targeting=targeting,
+            objective=objective,
+            call_to_action=call_to_action,
+            save_locally=save_locally,
+            share_ad_set=share_ad_set,
+            optimize_image=optimize_image,
+            jpeg_quality=jpeg_quality,
+            derive_placements=derive_placements
+        )
         try:
-            # Gerar timestamp para nomes únicos
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return self._run_single(ctx)
+        finally:
+            self.run_store.flush()
+            flush_logs()
+
+    def _run_single(self, ctx: dict) -> dict:
+        """Executa todas as etapas de um anúncio em sequência"""
+        self.log.info("🎯 INICIANDO AUTOMAÇÃO COMPLETA", extra={'banner': '='})
 
+        completed = self._journaled_result(ctx)
+        if completed:
+            return completed
+
+        try:
             # 1. GERAR IMAGEM COM IA
-            print("\n📍 ETAPA 1/2: Gerando imagem com IA")
-            print("-" * 60)
-
-            image_path = None
-            if save_locally:
-                os.makedirs("./generated_images", exist_ok=True)
-                image_path = f"./generated_images/ad_image_{timestamp}.png"
-
-            image_result = self.image_generator.generate_image(
-                prompt=image_prompt,
-                size=image_size,
-                quality=image_quality,
-                style=image_style,
-                save_path=image_path
-            )
+            self.log.info("📍 ETAPA 1/2: Gerando imagem com IA", extra={'banner': '-'})
 
-            print(f"✅ Imagem gerada com sucesso!")
-            print(f"🔗 URL: {image_result['url']}")
+            self._generate_stage(ctx)
 
-            if not image_path:
-                print("\n⚠️  Aviso: Imagem não foi salva localmente.")
-                print("💡 Dica: Para publicar na Meta, a imagem precisa ser salva localmente.")
-                print("    Defina save_locally=True ou forneça um save_path.")
+            if not ctx['image_path']:
+                self.log.warning(
+                    "⚠️  Aviso: Imagem não foi salva localmente.\n"
+                    "💡 Dica: Para publicar na Meta, a imagem precisa ser salva localmente.\n"
+                    "    Defina save_locally=True ou forneça um save_path."
+                )
                 return {
                     'success': False,
-                    'image': image_result,
+                    'image': ctx['image_result'],
                     'error': 'Imagem não salva localmente'
                 }
 
+            self._download_stage(ctx)
+            self._optimize_stage(ctx)
+
             # 2. PUBLICAR ANÚNCIO NA META
-            print("\n📍 ETAPA 2/2: Publicando anúncio na Meta")
-            print("-" * 60)
-
-            # Configurar targeting padrão se não fornecido
-            if targeting is None:
-                targeting = {
-                    'geo_locations': {'countries': ['BR']},
-                    'age_min': 25,
-                    'age_max': 55,
-                }
+            self.log.info("📍 ETAPA 2/2: Publicando anúncio na Meta", extra={'banner': '-'})
 
-            # Usar nomes padrão se não fornecidos
-            campaign_name = campaign_name or f"Campaign_{timestamp}"
-            ad_title = ad_title or "Descubra algo incrível"
-            ad_body = ad_body or image_result.get('revised_prompt', image_prompt)[:500]
-            link_url = link_url or "https://www.exemplo.com"
-
-            meta_result = self.meta_manager.create_complete_ad(
-                campaign_name=campaign_name,
-                ad_name=f"Ad_{timestamp}",
-                image_path=image_path,
-                title=ad_title,
-                body=ad_body,
-                link_url=link_url,
-                daily_budget=daily_budget,
-                targeting=targeting,
-                objective=objective,
-                call_to_action=call_to_action
-            )
+            self._publish_stage(ctx)
 
             # 3. COMPILAR RESULTADOS
-            final_result = {
-                'success': True,
-                'timestamp': timestamp,
-                'image': {
-                    'url': image_result['url'],
-                    'local_path': image_path,
-                    'revised_prompt': image_result['revised_prompt'],
-                    'size': image_result['size'],
-                    'quality': image_result['quality']
-                },
-                'meta_ad': {
-                    'campaign_id': meta_result['campaign_id'],
-                    'ad_set_id': meta_result['ad_set_id'],
-                    'creative_id': meta_result['creative_id'],
-                    'ad_id': meta_result['ad_id'],
-                    'campaign_name': campaign_name,
-                    'title': ad_title,
-                    'body': ad_body,
-                    'link': link_url,
-                    'daily_budget': daily_budget
-                }
-            }
+            return self._finalize_stage(ctx)
 
-            # Salvar log em JSON
-            log_path = f"./logs/automation_log_{timestamp}.json"
-            os.makedirs("./logs", exist_ok=True)
-            with open(log_path, 'w', encoding='utf-8') as f:
-                json.dump(final_result, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return self._error_result(ctx, e)
 
-            print("\n" + "=" * 60)
-            print("🎉 AUTOMAÇÃO CONCLUÍDA COM SUCESSO!")
-            print("=" * 60)
-            print(f"📊 Log salvo em: {log_path}")
-            print(f"🖼️  Imagem: {image_path}")
-            print(f"📱 Campaign ID: {meta_result['campaign_id']}")
-            print(f"📱 Ad ID: {meta_result['ad_id']}")
-            print("=" * 60 + "\n")
+    def _new_context(self, index: Optional[int] = None, **config) -> dict:
+        """
+        Normaliza a configuração de um anúncio com os mesmos padrões de
+        create_ad_with_ai_image
 
-            return final_result
+        Args:
+            index: Posição do anúncio no lote (None para execução avulsa)
+            **config: Parâmetros aceitos por create_ad_with_ai_image
 
-        except Exception as e:
-            error_msg = f"Erro na automação: {str(e)}"
-            print(f"\n❌ {error_msg}")
+        Returns:
+            Contexto mutável compartilhado entre as etapas
+        """
+        bound = inspect.signature(self.create_ad_with_ai_image).bind(**config)
+        bound.apply_defaults()
+
+        # Gerar timestamp para nomes únicos (em lote, o índice evita colisões)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id = timestamp if index is None else f"{timestamp}_{index:03d}"
+
+        journal_key = None
+        if self.journal:
+            journal_key = AdJournal.make_key(bound.arguments, index)
+            previous = self.journal.stage(journal_key, 'context')
+            if previous:
+                # Retomada: manter nomes e caminhos da execução original
+                timestamp, run_id = previous['timestamp'], previous['run_id']
+            else:
+                self.journal.record(journal_key, 'context', timestamp=timestamp, run_id=run_id)
+
+        ctx = dict(bound.arguments)
+        if ctx['derive_placements'] and ctx['image_size'] == "1024x1024":
+            # O vertical cobre 9:16 sem perda e rende 1:1 e 4:5 por recorte
+            ctx['image_size'] = "1024x1792"
+
+        ctx.update({
+            'index': index,
+            'timestamp': timestamp,
+            'run_id': run_id,
+            'journal_key': journal_key,
+            'image_path': None,
+            'image_result': None,
+            'optimized': None,
+            'placements': None,
+            'meta_result': None
+        })
+        return ctx
+
+    def _journaled_result(self, ctx: dict) -> Optional[dict]:
+        """Retorna o resultado final registrado no journal, se o anúncio já foi concluído"""
+        if not self.journal:
+            return None
+
+        done = self.journal.stage(ctx['journal_key'], 'result')
+        if done:
+            self.log.info(f"⏭️  Anúncio já criado anteriormente (Ad ID: {done['meta_ad']['ad_id']})")
+        return done
+
+    def _generate_stage(self, ctx: dict) -> dict:
+        """
+        Etapa de geração: chama o DALL-E (o download é uma etapa à parte, para
+        que uma falha no download não gere a imagem de novo)
+
+        Args:
+            ctx: Contexto do anúncio
+
+        Returns:
+            O próprio contexto atualizado
+        """
+        if ctx['save_locally']:
+            os.makedirs("./generated_images", exist_ok=True)
+            ctx['image_path'] = f"./generated_images/ad_image_{ctx['run_id']}.png"
+
+            # Retomada: a imagem já foi gerada e salva em uma execução anterior
+            if self.journal:
+                done = self.journal.stage(ctx['journal_key'], 'image')
+                if done and os.path.exists(done['local_path']):
+                    self.log.info(f"⏭️  Imagem já gerada anteriormente: {done['local_path']}")
+                    ctx['image_result'] = dict(done)
+                    return ctx
+
+        ctx['image_result'] = retry_call(
+            self.image_generator.generate_image,
+            policy=self.retry_policy,
+            stage='image',
+            log=self.log,
+            prompt=ctx['image_prompt'],
+            size=ctx['image_size'],
+            quality=ctx['image_quality'],
+            style=ctx['image_style'],
+            response_format=ctx['image_response_format']
+        )
+
+        self.log.info("✅ Imagem gerada com sucesso!", extra={'run_id': ctx['run_id']})
+        if ctx['image_result']['url']:
+            self.log.debug("🔗 URL: %s", ctx['image_result']['url'])
+
+        return ctx
+
+    def _download_stage(self, ctx: dict) -> dict:
+        """
+        Etapa de download: salva localmente a imagem gerada
+
+        Args:
+            ctx: Contexto do anúncio
+
+        Returns:
+            O próprio contexto atualizado
+        """
+        if not ctx['image_path']:
+            raise ValueError('Imagem não salva localmente')
+
+        if ctx['image_result'].get('local_path'):
+            return ctx
+
+        retry_call(
+            self.image_generator.download_image,
+            ctx['image_result'],
+            ctx['image_path'],
+            policy=self.retry_policy,
+            stage='download',
+            log=self.log
+        )
+
+        if self.journal:
+            image_result = ctx['image_result']
+            self.journal.record(
+                ctx['journal_key'], 'image',
+                **{key: image_result.get(key) for key in JOURNAL_IMAGE_FIELDS}
+            )
+        return ctx
 
-            return {
-                'success': False,
-                'error': error_msg,
-                'timestamp': timestamp
+    def _optimize_stage(self, ctx: dict, pool: Optional[ProcessPoolExecutor] = None) -> dict:
+        """
+        Etapa de otimização: converte a imagem baixada em JPEG progressivo
+        dentro dos limites da Meta, reduzindo o volume enviado no upload (com
+        derive_placements, gera as versões de cada posicionamento)
+
+        Args:
+            ctx: Contexto do anúncio
+            pool: Pool de processos (em lote); sem ele, otimiza na thread atual
+
+        Returns:
+            O próprio contexto atualizado
+        """
+        # Pillow só é importado quando há imagem para processar
+        from image_optimizer import optimize_image as optimize_image_file
+        from placements import derive_placements as derive_placement_images
+
+        if ctx['derive_placements']:
+            if pool:
+                placements = pool.submit(
+                    derive_placement_images, ctx['image_path'], quality=ctx['jpeg_quality']
+                ).result()
+            else:
+                placements = derive_placement_images(ctx['image_path'], quality=ctx['jpeg_quality'])
+
+            ctx['placements'] = placements
+            self.log.info("✂️  Posicionamentos derivados: " + ", ".join(
+                f"{label} {result['width']}x{result['height']}" for label, result in placements.items()
+            ))
+            return ctx
+
+        if not ctx['optimize_image']:
+            return ctx
+
+        jpeg_path = os.path.splitext(ctx['image_path'])[0] + '.jpg'
+        if pool:
+            optimized = pool.submit(
+                optimize_image_file, ctx['image_path'], jpeg_path, quality=ctx['jpeg_quality']
+            ).result()
+        else:
+            optimized = optimize_image_file(ctx['image_path'], jpeg_path, quality=ctx['jpeg_quality'])
+
+        ctx['optimized'] = optimized
+        self.log.info(
+            f"🗜️  Imagem otimizada: {optimized['original_bytes'] / 1024:.0f} KB → "
+            f"{optimized['bytes'] / 1024:.0f} KB ({optimized['path']})",
+            extra={'run_id': ctx['run_id'], 'bytes': optimized['bytes']}
+        )
+        return ctx
+
+    def _publish_stage(self, ctx: dict) -> dict:
+        """
+        Etapa de publicação: cria campanha, conjunto, criativo e anúncio na Meta
+
+        Args:
+            ctx: Contexto do anúncio
+
+        Returns:
+            O próprio contexto atualizado
+        """
+        image_result = ctx['image_result']
+        optimized = ctx['optimized']
+
+        # Configurar targeting padrão se não fornecido
+        if ctx['targeting'] is None:
+            ctx['targeting'] = {
+                'geo_locations': {'countries': ['BR']},
+                'age_min': 25,
+                'age_max': 55,
+            }
+
+        # Usar nomes padrão se não fornecidos
+        ctx['campaign_name'] = ctx['campaign_name'] or f"Campaign_{ctx['run_id']}"
+        ctx['ad_title'] = ctx['ad_title'] or "Descubra algo incrível"
+        ctx['ad_body'] = ctx['ad_body'] or image_result.get('revised_prompt', ctx['image_prompt'])[:500]
+        ctx['link_url'] = ctx['link_url'] or "https://www.exemplo.com"
+
+        ctx['meta_result'] = self.meta_manager.create_complete_ad(
+            campaign_name=ctx['campaign_name'],
+            ad_name=f"Ad_{ctx['run_id']}",
+            image_path=optimized['path'] if optimized else ctx['image_path'],
+            title=ctx['ad_title'],
+            body=ctx['ad_body'],
+            link_url=ctx['link_url'],
+            daily_budget=ctx['daily_budget'],
+            targeting=ctx['targeting'],
+            objective=ctx['objective'],
+            call_to_action=ctx['call_to_action'],
+            image_md5=optimized['md5'] if optimized else image_result.get('md5'),
+            journal=self.journal,
+            journal_key=ctx['journal_key'],
+            share_ad_set=ctx['share_ad_set'],
+            placement_images={
+                label: result['path'] for label, result in ctx['placements'].items()
+            } if ctx['placements'] else None
+        )
+        return ctx
+
+    def _finalize_stage(self, ctx: dict) -> dict:
+        """
+        Compila o resultado final e o acrescenta ao registro de execuções
+
+        Args:
+            ctx: Contexto do anúncio
+
+        Returns:
+            Dicionário com informações da imagem e do anúncio criado
+        """
+        image_result = ctx['image_result']
+        meta_result = ctx['meta_result']
+
+        final_result = {
+            'success': True,
+            'timestamp': ctx['timestamp'],
+            'run_id': ctx['run_id'],
+            'image': {
+                'url': image_result['url'],
+                'local_path': ctx['image_path'],
+                'uploaded_path': ctx['optimized']['path'] if ctx['optimized'] else ctx['image_path'],
+                'placements': {
+                    label: result['path'] for label, result in ctx['placements'].items()
+                } if ctx['placements'] else None,
+                'revised_prompt': image_result['revised_prompt'],
+                'size': image_result['size'],
+                'quality': image_result['quality']
+            },
+            'meta_ad': {
+                'campaign_id': meta_result['campaign_id'],
+                'ad_set_id': meta_result['ad_set_id'],
+                'creative_id': meta_result['creative_id'],
+                'ad_id': meta_result['ad_id'],
+                'campaign_name': ctx['campaign_name'],
+                'title': ctx['ad_title'],
+                'body': ctx['ad_body'],
+                'link': ctx['link_url'],
+                'daily_budget': ctx['daily_budget']
+            }
+        }
+
+        self.run_store.record(final_result, run_id=ctx['run_id'], campaign_name=ctx['campaign_name'])
+
+        if self.journal:
+            self.journal.record(ctx['journal_key'], 'result', **final_result)
+
+        self.log.info(
+            "🎉 AUTOMAÇÃO CONCLUÍDA COM SUCESSO!\n"
+            f"📊 Run {ctx['run_id']} registrado (gravação em lote em {self.run_store.path})\n"
+            f"🖼️  Imagem: {ctx['image_path']}\n"
+            f"📱 Campaign ID: {meta_result['campaign_id']}\n"
+            f"📱 Ad ID: {meta_result['ad_id']}",
+            extra={
+                'banner': '=',
+                'run_id': ctx['run_id'],
+                'campaign_id': meta_result['campaign_id'],
+                'ad_id': meta_result['ad_id']
             }
+        )
+
+        return final_result
+
+    def _error_result(self, ctx: dict, error: BaseException) -> dict:
+        """Converte uma falha em qualquer etapa no dicionário de erro padrão"""
+        error_msg = f"Erro na automação: {str(error)}"
+        self.log.error(f"❌ {error_msg}", extra={'run_id': ctx['run_id']})
+
+        result = {
+            'success': False,
+            'error': error_msg,
+            'timestamp': ctx['timestamp'],
+            'run_id': ctx['run_id']
+        }
+        self.run_store.record(result, run_id=ctx['run_id'], campaign_name=ctx['campaign_name'])
+        return result
 
-    def create_multiple_ads(self, ads_config: list[dict]) -> list[dict]:
+    def create_multiple_ads(
+        self,
+        ads_config: list[dict],
+        concurrent: bool = False,
+        image_workers: int = 4,
+        download_workers: int = 4,
+        publish_workers: int = 2,
+        queue_size: int = 8,
+        optimize_workers: Optional[int] = None
+    ) -> list[dict]:
         """
         Cria múltiplos anúncios em lote
 
+        No modo concorrente, geração de imagem, download e publicação na Meta
+        rodam em pools de threads separados ligados por filas limitadas, de
+        modo que a imagem do anúncio N+1 é gerada enquanto o anúncio N é
+        publicado. A otimização das imagens, que usa CPU, roda em um pool de
+        processos.
+
         Args:
             ads_config: Lista de configurações de anúncios
+            concurrent: Executar em pipeline concorrente
+            image_workers: Chamadas simultâneas ao DALL-E
+            download_workers: Downloads simultâneos de imagens
+            publish_workers: Publicações simultâneas na Meta
+            queue_size: Capacidade das filas entre etapas (backpressure)
+            optimize_workers: Processos para otimizar imagens (padrão: número de CPUs)
 
         Returns:
-            Lista de resultados
+            Lista de resultados, na mesma ordem de ads_config
         """
-        print(f"\n🚀 Criando {len(ads_config)} anúncios em lote...")
-
-        results = []
-        for i, config in enumerate(ads_config, 1):
-            print(f"\n{'='*60}")
-            print(f"📍 Anúncio {i}/{len(ads_config)}")
-            print(f"{'='*60}")
+        self.log.info(f"🚀 Criando {len(ads_config)} anúncios em lote...")
+
+        if concurrent:
+            results = self._run_pipeline(
+                ads_config,
+                image_workers=image_workers,
+                download_workers=download_workers,
+                publish_workers=publish_workers,
+                queue_size=queue_size,
+                optimize_workers=optimize_workers or os.cpu_count() or 1
+            )
+        else:
+            results = []
+            for i, config in enumerate(ads_config):
+                self.log.info(f"📍 Anúncio {i + 1}/{len(ads_config)}", extra={'banner': '='})
 
-            result = self.create_ad_with_ai_image(**config)
-            results.append(result)
+                result = self._run_single(self._new_context(index=i, **config))
+                results.append(result)
 
         successful = sum(1 for r in results if r.get('success'))
-        print(f"\n✅ Concluído! {successful}/{len(ads_config)} anúncios criados com sucesso.")
+        self.log.info(f"✅ Concluído! {successful}/{len(ads_config)} anúncios criados com sucesso.")
+        self.run_store.flush()
+        flush_logs()
+
+        return results
+
+    def _run_pipeline(
+        self,
+        ads_config: list[dict],
+        image_workers: int,
+        download_workers: int,
+        publish_workers: int,
+        queue_size: int,
+        optimize_workers: int
+    ) -> list[dict]:
+        """Executa o lote no StagePipeline (geração → download → otimização → publicação)"""
+        contexts = []
+        results: list = [None] * len(ads_config)
+
+        for i, config in enumerate(ads_config):
+            try:
+                ctx = self._new_context(index=i, **config)
+                results[i] = self._journaled_result(ctx)
+                if results[i] is None:
+                    contexts.append(ctx)
+            except TypeError as e:
+                # Configuração inválida não derruba o lote inteiro
+                results[i] = {
+                    'success': False,
+                    'error': f"Erro na automação: {str(e)}",
+                    'timestamp': datetime.now().strftime("%Y%m%d_%H%M%S")
+                }
+
+        # Pool de processos só quando algum anúncio otimiza ou deriva imagens;
+        # 'spawn' evita que os processos herdem por fork locks das threads do pipeline
+        needs_pool = any(ctx['optimize_image'] or ctx['derive_placements'] for ctx in contexts)
+        pool_context = ProcessPoolExecutor(
+            max_workers=optimize_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        ) if needs_pool else nullcontext()
+
+        with pool_context as pool:
+            pipeline = StagePipeline(
+                stages=[
+                    ('image', self._generate_stage, image_workers),
+                    ('download', self._download_stage, download_workers),
+                    ('optimize', lambda ctx: self._optimize_stage(ctx, pool), optimize_workers),
+                    ('publish', lambda ctx: self._finalize_stage(self._publish_stage(ctx)), publish_workers),
+                ],
+                queue_size=queue_size
+            )
+
+            pipeline_results = iter(pipeline.run(
+                contexts,
+                on_error=lambda ctx, error, stage: self._error_result(ctx, error)
+            ))
+
+        for i in range(len(results)):
+            if results[i] is None:
+                results[i] = next(pipeline_results)
 
         return results
 
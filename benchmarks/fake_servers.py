@@ -0,0 +1,484 @@
+"""
+Servidores HTTP locais que imitam a API de imagens da OpenAI, o CDN das
+imagens geradas e a Graph API da Meta, para medir o pipeline sem custo
+"""
+import io
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import zipfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import urlsplit, parse_qs
+from PIL import Image
+
+
+# updated_time base dos objetos listados por FakeGraphServer (2025-10-01T12:00:00+0000)
+LIST_UPDATED_TIME = 1759320000
+
+# Arestas da conta listadas por FakeGraphServer → base dos IDs sintéticos
+_LIST_EDGES = {
+    'campaigns': 110000000000000,
+    'adsets': 115000000000000,
+    'ads': 120000000000000,
+    'adcreatives': 125000000000000,
+    'adimages': 0,
+}
+
+
+class LatencyProfile:
+    """
+    Latência simulada de uma resposta (distribuição log-normal) e taxa de erro
+
+    A mediana é `median_ms`; `sigma` controla a cauda (0 = latência fixa).
+    """
+
+    def __init__(
+        self,
+        median_ms: float = 0.0,
+        sigma: float = 0.5,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            median_ms: Latência mediana em milissegundos
+            sigma: Desvio padrão do logaritmo da latência
+            error_rate: Fração das requisições respondidas com erro (0-1)
+            seed: Semente do gerador aleatório (reprodutibilidade)
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> 'LatencyProfile':
+        """
+        Cria um perfil a partir de "mediana_ms[:sigma[:taxa_de_erro]]"
+
+        Exemplo: "800:0.4:0.02" → mediana de 800 ms, cauda moderada, 2% de erros
+        """
+        parts = [float(part) for part in spec.split(':')]
+        return cls(*parts[:3], seed=seed)
+
+    def sample(self) -> float:
+        """Sorteia uma latência, em segundos"""
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            factor = self._random.lognormvariate(0, self.sigma) if self.sigma > 0 else 1.0
+        return self.median_ms * factor / 1000
+
+    def should_fail(self) -> bool:
+        """Sorteia se a próxima resposta deve ser um erro"""
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def describe(self) -> dict:
+        return {'median_ms': self.median_ms, 'sigma': self.sigma, 'error_rate': self.error_rate}
+
+
+class FakeServer:
+    """
+    Servidor HTTP em thread própria; subclasses implementam handle()
+
+    Conta as requisições por rota em `counts` e aplica a latência e os erros
+    do LatencyProfile antes de cada resposta.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency: Optional[LatencyProfile] = None):
+        self.latency = latency or LatencyProfile()
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeServer':
+        """Sobe o servidor em uma porta livre de 127.0.0.1"""
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeçalhos e corpo saem em escritas separadas: sem isso o
+            # algoritmo de Nagle soma ~40 ms a cada resposta em keep-alive
+            disable_nagle_algorithm = True
+
+            def _dispatch(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                status, headers, payload = owner._respond(self.command, self.path, self.headers, body)
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name=f"{self.name}-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_counts(self) -> None:
+        with self._counts_lock:
+            self.counts.clear()
+
+    def __enter__(self) -> 'FakeServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, route: str) -> None:
+        with self._counts_lock:
+            self.counts[route] += 1
+
+    def _respond(self, method: str, path: str, headers, body: bytes) -> tuple[int, dict, bytes]:
+        delay = self.latency.sample()
+        if delay:
+            time.sleep(delay)
+
+        if self.latency.should_fail():
+            self._count('error')
+            return self.error_response()
+
+        return self.handle(method, path, headers, body)
+
+    def handle(self, method: str, path: str, headers, body: bytes) -> tuple[int, dict, bytes]:
+        raise NotImplementedError
+
+    def error_response(self) -> tuple[int, dict, bytes]:
+        return 503, {'Content-Type': 'text/plain'}, b'unavailable'
+
+
+def _graph_time(timestamp: int) -> str:
+    """Segundos Unix → formato de data da Graph API"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+0000')
+
+
+def _json(status: int, data, headers: Optional[dict] = None) -> tuple[int, dict, bytes]:
+    return status, {'Content-Type': 'application/json', **(headers or {})}, json.dumps(data).encode()
+
+
+class FakeCDNServer(FakeServer):
+    """Serve as imagens "geradas" (um PNG pré-renderizado do tamanho pedido)"""
+
+    name = 'cdn'
+
+    def __init__(self, latency: Optional[LatencyProfile] = None, image_px: int = 1024):
+        """
+        Args:
+            latency: Latência e erros simulados
+            image_px: Lado da imagem servida, em pixels
+        """
+        super().__init__(latency)
+        self.image_bytes = render_test_image(image_px)
+
+    def handle(self, method, path, headers, body):
+        self._count(f"{method} image")
+        return 200, {'Content-Type': 'image/png'}, self.image_bytes
+
+
+class FakeOpenAIServer(FakeServer):
+    """Imita POST /v1/images/generations, com resposta em 'url' ou 'b64_json'"""
+
+    name = 'openai'
+
+    def __init__(self, cdn: FakeCDNServer, latency: Optional[LatencyProfile] = None):
+        """
+        Args:
+            cdn: Servidor que entrega as imagens no modo 'url'
+            latency: Latência e erros simulados
+        """
+        super().__init__(latency)
+        self.cdn = cdn
+        self._ids = iter(range(1, 1 << 62))
+        self._ids_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """Valor para ImageGenerator(base_url=...) / OPENAI_BASE_URL"""
+        return f"{self.url}/v1"
+
+    def handle(self, method, path, headers, body):
+        route = urlsplit(path).path
+        if method != 'POST' or not route.endswith('/images/generations'):
+            self._count('not_found')
+            return _json(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+
+        self._count('POST images/generations')
+        request = json.loads(body or b'{}')
+        with self._ids_lock:
+            image_id = next(self._ids)
+
+        item = {'revised_prompt': request.get('prompt', '')}
+        if request.get('response_format') == 'b64_json':
+            item['b64_json'] = base64.b64encode(self.cdn.image_bytes).decode()
+        else:
+            item['url'] = f"{self.cdn.url}/images/{image_id}.png"
+
+        return _json(200, {'created': int(time.time()), 'data': [item]})
+
+    def error_response(self):
+        return _json(500, {'error': {'message': 'fake server error', 'type': 'server_error'}})
+
+
+class FakeGraphServer(FakeServer):
+    """
+    Imita as rotas da Graph API usadas pelo MetaAdsManager: criação de
+    campanhas, conjuntos, criativos e anúncios, upload de imagens (avulso ou
+    em zip), consulta de imagens por hash, leitura/atualização de objetos,
+    /batch, relatórios assíncronos de insights (uma linha por anúncio e
+    dia) e listagens paginadas das arestas da conta. Toda resposta traz os
+    cabeçalhos de uso com `usage_pct`.
+    """
+
+    name = 'graph'
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        usage_pct: float = 5.0,
+        insights_ads: int = 100,
+        list_objects: int = 0
+    ):
+        """
+        Args:
+            latency: Latência e erros simulados
+            usage_pct: Percentual de uso informado nos cabeçalhos de limite de taxa
+            insights_ads: Anúncios com linhas nos relatórios de insights
+            list_objects: Objetos sintéticos em cada listagem da conta
+                          (campaigns, adsets, ads, adcreatives, adimages)
+        """
+        super().__init__(latency)
+        self.usage_pct = usage_pct
+        self.insights_ads = insights_ads
+        self.list_objects = list_objects
+        self._ids = iter(range(120000000000001, 1 << 62))
+        self._ids_lock = threading.Lock()
+        self._reports: dict[str, dict] = {}
+
+    def _new_id(self) -> str:
+        with self._ids_lock:
+            return str(next(self._ids))
+
+    def _usage_headers(self, account_id: Optional[str]) -> dict:
+        pct = self.usage_pct
+        usage = {'call_count': pct, 'total_cputime': pct, 'total_time': pct}
+        headers = {'X-App-Usage': json.dumps(usage)}
+        if account_id:
+            business = {account_id[4:]: [dict(usage, type='ads_management', estimated_time_to_regain_access=0)]}
+            headers['X-Business-Use-Case-Usage'] = json.dumps(business)
+            headers['X-Ad-Account-Usage'] = json.dumps({'acc_id_util_pct': pct, 'reset_time_duration': 0})
+        return headers
+
+    def handle(self, method, path, headers, body):
+        url = urlsplit(path)
+        # /vXX.X/<nó>/<aresta>
+        parts = [part for part in url.path.split('/') if part][1:]
+        account_id = next((part for part in parts if part.startswith('act_')), None)
+        usage = self._usage_headers(account_id)
+
+        if method == 'POST' and not parts:
+            self._count('POST batch')
+            return _json(200, self._batch(body), usage)
+
+        edge = parts[1] if len(parts) > 1 else None
+        self._count(f"{method} {edge or 'node'}")
+
+        if edge == 'insights' and method == 'POST':
+            return _json(200, {'report_run_id': self._new_report(body)}, usage)
+
+        if parts and parts[0] in self._reports:
+            report = self._reports[parts[0]]
+            if edge == 'insights':
+                return _json(200, self._report_page(report, parse_qs(url.query)), usage)
+            report['polls'] += 1
+            done = report['polls'] >= 2
+            return _json(200, {
+                'id': parts[0],
+                'async_status': 'Job Completed' if done else 'Job Running',
+                'async_percent_completion': 100 if done else 50
+            }, usage)
+
+        if edge == 'adimages' and method == 'POST':
+            return _json(200, {'images': self._upload(headers, body)}, usage)
+
+        query = parse_qs(url.query)
+        if edge == 'adimages' and 'hashes' in query:
+            hashes = json.loads(query['hashes'][0])
+            return _json(200, {'data': [{'hash': h, 'status': 'ACTIVE'} for h in hashes]}, usage)
+
+        if method == 'GET' and account_id and edge in _LIST_EDGES:
+            return _json(200, self._list_page(edge, query), usage)
+
+        if method == 'POST' and edge:
+            return _json(200, {'id': self._new_id()}, usage)
+
+        if method == 'POST':
+            return _json(200, {'success': True}, usage)
+
+        if edge:
+            return _json(200, {'data': []}, usage)
+
+        return _json(200, {'id': parts[0] if parts else '', 'status': 'ACTIVE',
+                           'effective_status': 'ACTIVE'}, usage)
+
+    def _batch(self, body: bytes) -> list:
+        form = parse_qs(body.decode())
+        operations = json.loads(form.get('batch', ['[]'])[0])
+        return [
+            {'code': 200, 'headers': [], 'body': json.dumps({'id': self._new_id()})}
+            for _ in operations
+        ]
+
+    def _new_report(self, body: bytes) -> str:
+        form = parse_qs(body.decode())
+        time_range = json.loads(form.get('time_range', ['{}'])[0])
+        since = date.fromisoformat(time_range.get('since', date.today().isoformat()))
+        until = date.fromisoformat(time_range.get('until', since.isoformat()))
+        report_id = self._new_id()
+        self._reports[report_id] = {'since': since, 'days': (until - since).days + 1, 'polls': 0}
+        return report_id
+
+    def _report_page(self, report: dict, query: dict) -> dict:
+        """Página de linhas sintéticas (anúncio × dia) com cursor 'after'"""
+        total = report['days'] * self.insights_ads
+        start = int(query.get('after', ['0'])[0])
+        end = min(total, start + int(query.get('limit', ['25'])[0]))
+
+        rows = []
+        for i in range(start, end):
+            day = (report['since'] + timedelta(days=i // self.insights_ads)).isoformat()
+            ad = i % self.insights_ads
+            impressions = 1000 + (i * 7919) % 9000
+            clicks = impressions * (1 + ad % 5) // 100
+            spend = round(impressions * 0.012, 2)
+            rows.append({
+                'date_start': day, 'date_stop': day,
+                'campaign_id': str(110000000000000 + ad // 10), 'campaign_name': f"Campaign {ad // 10}",
+                'adset_id': str(115000000000000 + ad), 'ad_id': str(120000000000000 + ad),
+                'ad_name': f"Ad {ad}", 'impressions': str(impressions), 'reach': str(impressions * 4 // 5),
+                'clicks': str(clicks), 'inline_link_clicks': str(clicks * 3 // 4), 'spend': str(spend),
+                'ctr': str(round(clicks / impressions * 100, 4)), 'cpc': str(round(spend / clicks, 4)),
+                'cpm': str(round(spend / impressions * 1000, 4)), 'frequency': '1.25'
+            })
+
+        paging = {'cursors': {'before': str(start), 'after': str(end)}}
+        if end < total:
+            paging['next'] = f"{self.url}/next"
+        return {'data': rows, 'paging': paging}
+
+    def _list_page(self, edge: str, query: dict) -> dict:
+        """Página de objetos sintéticos da conta, só com os campos pedidos"""
+        # Campos de topo, ignorando subcampos de expansões como creative{id,name}
+        fields = re.findall(r'(\w+)(?:\{[^}]*\})?', query.get('fields', ['id,name'])[0])
+        total = self.list_objects
+
+        # O objeto i foi alterado em LIST_UPDATED_TIME + i segundos
+        first = 0
+        for rule in json.loads(query.get('filtering', ['[]'])[0]):
+            if rule['field'] == 'updated_time' and rule['operator'] == 'GREATER_THAN':
+                first = max(first, int(rule['value']) - LIST_UPDATED_TIME + 1)
+        start = max(first, int(query.get('after', ['0'])[0]))
+        end = min(total, start + int(query.get('limit', ['25'])[0]))
+
+        rows = []
+        for i in range(start, end):
+            obj = {
+                'id': str(_LIST_EDGES[edge] + i), 'hash': f"{i:032x}", 'name': f"{edge} {i}",
+                'status': 'ACTIVE', 'effective_status': 'ACTIVE', 'daily_budget': str(1000 + i % 50 * 100),
+                'campaign_id': str(_LIST_EDGES['campaigns'] + i // 10), 'adset_id': str(_LIST_EDGES['adsets'] + i),
+                'creative': {'id': str(_LIST_EDGES['adcreatives'] + i), 'image_hash': f"{i % 100:032x}"},
+                'image_hash': f"{i % 100:032x}",
+                'updated_time': _graph_time(LIST_UPDATED_TIME + i), 'created_time': _graph_time(LIST_UPDATED_TIME),
+            }
+            rows.append({field: obj[field] for field in fields if field in obj})
+
+        paging = {'cursors': {'before': str(start), 'after': str(end)}}
+        if end < total:
+            paging['next'] = f"{self.url}/next"
+        return {'data': rows, 'paging': paging}
+
+    def _upload(self, headers, body: bytes) -> dict:
+        """Lê o multipart e devolve o hash (MD5) de cada imagem, abrindo zips"""
+        images = {}
+        for filename, data in _multipart_files(headers.get('Content-Type', ''), body):
+            if zipfile.is_zipfile(io.BytesIO(data)):
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    for name in archive.namelist():
+                        images[name] = self._image_entry(archive.read(name))
+            else:
+                images[filename.rsplit('/', 1)[-1]] = self._image_entry(data)
+        return images
+
+    def _image_entry(self, data: bytes) -> dict:
+        image_hash = hashlib.md5(data).hexdigest()
+        return {'hash': image_hash, 'url': f"{self.url}/images/{image_hash}"}
+
+    def error_response(self):
+        return _json(500, {'error': {
+            'message': 'An unknown error occurred',
+            'type': 'OAuthException',
+            'code': 2,
+            'is_transient': True
+        }})
+
+
+def _multipart_files(content_type: str, body: bytes) -> list[tuple[str, bytes]]:
+    """Extrai (nome do arquivo, conteúdo) das partes de arquivo de um multipart/form-data"""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not match:
+        return []
+
+    files = []
+    for part in body.split(b'--' + match.group(1).encode())[1:-1]:
+        head, _, data = part.partition(b'\r\n\r\n')
+        filename = re.search(rb'filename="([^"]*)"', head)
+        if filename:
+            files.append((filename.group(1).decode(), data[:-2] if data.endswith(b'\r\n') else data))
+    return files
+
+
+def render_test_image(size: int) -> bytes:
+    """PNG determinístico com gradiente e ruído, de tamanho parecido com o do DALL-E"""
+    rng = random.Random(size)
+    noise = Image.frombytes('L', (size, size), bytes(rng.getrandbits(8) for _ in range(size * size)))
+    gradient = Image.linear_gradient('L').resize((size, size))
+    image = Image.merge('RGB', (gradient, Image.blend(gradient, noise, 0.3), noise.point(lambda v: v // 2)))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
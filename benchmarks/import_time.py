@@ -0,0 +1,128 @@
+"""
+Benchmark do tempo de inicialização: importação dos módulos e criação dos
+objetos principais, cada amostra em um interpretador novo (importações frias)
+
+Mede o que uma chamada curta (cron, backend do chatbot) paga antes de fazer
+qualquer trabalho, e quais dependências pesadas já foram carregadas nesse
+ponto. Nenhuma requisição é feita: as credenciais são fictícias.
+
+Uso:
+    python benchmarks/import_time.py --runs 10 --output import_time.json
+"""
+import os
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import _distribution
+
+
+# Alvo → (importação, criação do objeto)
+TARGETS = {
+    'automation_main': ('import automation_main', 'automation_main.AdAutomation(quiet=True)'),
+    'meta_ads_manager': ('import meta_ads_manager', 'meta_ads_manager.MetaAdsManager(quiet=True)'),
+    'image_generator': ('import image_generator', 'image_generator.ImageGenerator(quiet=True)'),
+}
+
+# Dependências cuja presença em sys.modules indica importação antecipada
+HEAVY_MODULES = ('facebook_business', 'openai', 'requests', 'PIL', 'numpy', 'asyncio')
+
+_CHILD = """
+import sys, json, time
+start = time.perf_counter()
+{import_stmt}
+imported = time.perf_counter()
+{init_expr}
+created = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start,
+    'init': created - imported,
+    'loaded': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+_CREDENTIALS = {
+    'OPENAI_API_KEY': 'sk-benchmark',
+    'META_APP_ID': 'benchmark-app',
+    'META_APP_SECRET': 'benchmark-secret',
+    'META_ACCESS_TOKEN': 'benchmark-token',
+    'META_AD_ACCOUNT_ID': 'act_1000000000',
+    'META_PAGE_ID': '2000000000',
+}
+
+
+def sample(target: str, workdir: str) -> dict:
+    """Executa uma amostra do alvo em um processo novo"""
+    import_stmt, init_expr = TARGETS[target]
+    code = _CHILD.format(import_stmt=import_stmt, init_expr=init_expr, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=ROOT, ADS_LOG_LEVEL='CRITICAL', **_CREDENTIALS)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=workdir, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(targets: list[str], runs: int) -> list[dict]:
+    results = []
+    for target in targets:
+        # Diretório próprio: caches e bancos criados pelos construtores ficam fora do projeto
+        workdir = tempfile.mkdtemp(prefix=f"bench-import-{target}-")
+        sample(target, workdir)  # aquece o __pycache__
+        samples = [sample(target, workdir) for _ in range(runs)]
+        results.append({
+            'target': target,
+            'import': _distribution([s['import'] for s in samples]),
+            'init': _distribution([s['init'] for s in samples]),
+            'loaded_modules': samples[-1]['loaded'],
+        })
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Alvos separados por vírgula ({', '.join(TARGETS)})")
+    parser.add_argument('--runs', type=int, default=10, help='Amostras por alvo')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        raise SystemExit(f"Alvos desconhecidos: {', '.join(sorted(unknown))}")
+
+    results = run(targets, args.runs)
+    for result in results:
+        print(f"⏱️  {result['target']}: importação p50 {result['import']['p50_ms']} ms, "
+              f"criação p50 {result['init']['p50_ms']} ms "
+              f"(carregados: {', '.join(result['loaded_modules']) or 'nenhum'})", file=sys.stderr)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': args.runs,
+        'results': results,
+    }
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        print(f"📊 Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
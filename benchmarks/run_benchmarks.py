@@ -0,0 +1,380 @@
+"""
+Benchmark de ponta a ponta do pipeline contra servidores locais (sem custo)
+
+Mede vazão, latência p50/p95/p99 por etapa e número de requisições de cada
+cenário para N anúncios, e grava o resultado em JSON para acompanhar
+regressões entre versões.
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes 1,10,100 --output bench.json
+    python benchmarks/run_benchmarks.py --scenarios concurrent --openai-latency 800:0.4:0.02
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_servers import LatencyProfile, FakeCDNServer, FakeOpenAIServer, FakeGraphServer
+from metrics import enable_metrics
+from structured_logging import configure_logging
+
+
+SCENARIOS = ('single', 'multiple', 'concurrent', 'meta', 'insights')
+
+# Dias de cada relatório do cenário insights (uma linha por anúncio e dia)
+INSIGHTS_DAYS = 90
+DEFAULT_SIZES = (1, 10, 100, 1000)
+
+# Métodos cronometrados em cada objeto: nome do método → etapa
+IMAGE_GENERATOR_STAGES = {'generate_image': 'image', 'download_image': 'download'}
+AUTOMATION_STAGES = {'_optimize_stage': 'optimize', '_publish_stage': 'publish'}
+META_STAGES = {
+    'upload_image': 'upload',
+    'create_campaign': 'campaign',
+    'create_ad_set': 'ad_set',
+    'create_ad_creative': 'creative',
+    'create_ad': 'ad',
+}
+
+
+class StageTimer:
+    """Acumula as durações de cada etapa (thread-safe)"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj, methods: dict[str, str]) -> None:
+        """Substitui os métodos da instância por versões cronometradas"""
+        for method_name, stage in methods.items():
+            original = getattr(obj, method_name)
+            setattr(obj, method_name, self._timed(stage, original))
+
+    def _timed(self, stage: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {stage: _distribution(values) for stage, values in sorted(self.samples.items())}
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _distribution(values: list[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(_percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(_percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(_percentile(ordered, 99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def _ad_config(index: int) -> dict:
+    """Configuração de anúncio com prompt único (evita acertos no cache de imagens)"""
+    return {
+        'image_prompt': f"Benchmark product photo #{index}, studio lighting",
+        'campaign_name': f"Benchmark Campaign {index}",
+        'ad_title': f"Benchmark {index}",
+        'ad_body': f"Benchmark ad body {index}",
+        'link_url': 'https://www.example.com',
+    }
+
+
+def _configure_environment(openai: FakeOpenAIServer, graph: FakeGraphServer) -> None:
+    """Aponta os clientes para os servidores locais, com credenciais fictícias"""
+    os.environ.update({
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_BASE_URL': openai.base_url,
+        'META_APP_ID': 'benchmark-app',
+        'META_APP_SECRET': 'benchmark-secret',
+        'META_ACCESS_TOKEN': 'benchmark-token',
+        'META_AD_ACCOUNT_ID': 'act_1000000000',
+        'META_PAGE_ID': '2000000000',
+        'META_GRAPH_URL': graph.url,
+    })
+
+
+def _new_automation(timer: StageTimer, args):
+    from automation_main import AdAutomation
+    from retry import RetryPolicy
+
+    policy = RetryPolicy(max_attempts=args.retries, base_delay=args.retry_delay)
+    automation = AdAutomation(retry_policy=policy)
+    automation.meta_manager.retry_policy = policy
+    if not args.warm_upload_cache:
+        # Todas as imagens servidas são iguais: medir sempre o upload real
+        automation.meta_manager.upload_cache = None
+
+    timer.wrap(automation.image_generator, IMAGE_GENERATOR_STAGES)
+    timer.wrap(automation, AUTOMATION_STAGES)
+    timer.wrap(automation.meta_manager, META_STAGES)
+    return automation
+
+
+def _run_scenario(scenario: str, n: int, timer: StageTimer, args) -> list[dict]:
+    """Executa um cenário para N anúncios e retorna os resultados"""
+    if scenario == 'insights':
+        return _run_insights(n, timer, args)
+
+    if scenario == 'meta':
+        from meta_ads_manager import MetaAdsManager
+        from retry import RetryPolicy
+        from fake_servers import render_test_image
+
+        manager = MetaAdsManager(
+            retry_policy=RetryPolicy(max_attempts=args.retries, base_delay=args.retry_delay),
+            use_upload_cache=args.warm_upload_cache
+        )
+        timer.wrap(manager, META_STAGES)
+
+        image_path = os.path.abspath('benchmark_image.png')
+        with open(image_path, 'wb') as f:
+            f.write(render_test_image(args.image_px))
+
+        results = []
+        for i in range(n):
+            config = _ad_config(i)
+            start = time.perf_counter()
+            try:
+                manager.create_complete_ad(
+                    campaign_name=config['campaign_name'],
+                    ad_name=f"Benchmark Ad {i}",
+                    image_path=image_path,
+                    title=config['ad_title'],
+                    body=config['ad_body'],
+                    link_url=config['link_url'],
+                    daily_budget=5000,
+                    targeting={'geo_locations': {'countries': ['BR']}}
+                )
+                results.append({'success': True})
+            except Exception as e:
+                results.append({'success': False, 'error': str(e)})
+            timer.add('total', time.perf_counter() - start)
+        return results
+
+    automation = _new_automation(timer, args)
+    configs = [_ad_config(i) for i in range(n)]
+
+    if scenario == 'single':
+        results = []
+        for config in configs:
+            start = time.perf_counter()
+            results.append(automation.create_ad_with_ai_image(**config))
+            timer.add('total', time.perf_counter() - start)
+        return results
+
+    return automation.create_multiple_ads(
+        configs,
+        concurrent=(scenario == 'concurrent'),
+        image_workers=args.image_workers,
+        download_workers=args.download_workers,
+        publish_workers=args.publish_workers
+    )
+
+
+def _run_insights(n: int, timer: StageTimer, args) -> list[dict]:
+    """Relatório de INSIGHTS_DAYS dias para N anúncios: pedido, ingestão e leitura"""
+    from datetime import date, timedelta
+    from meta_ads_manager import MetaAdsManager
+    from retry import RetryPolicy
+    import insights
+
+    manager = MetaAdsManager(
+        retry_policy=RetryPolicy(max_attempts=args.retries, base_delay=args.retry_delay),
+        use_upload_cache=False
+    )
+    store = insights.InsightsStore('insights')
+
+    until = date(2025, 10, 31)
+    start = time.perf_counter()
+    report = insights.submit_report(manager, since=until - timedelta(days=INSIGHTS_DAYS - 1), until=until)
+    insights.wait_for_report(report, manager, poll_interval=0.01)
+    timer.add('report', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    rows = store.write('bench', insights.iter_report_rows(report, manager=manager))
+    timer.add('ingest', time.perf_counter() - start)
+
+    start = time.perf_counter()
+    data = store.load('bench', columns=['date_start', 'ad_id', 'impressions', 'clicks', 'spend'])
+    timer.add('load', time.perf_counter() - start)
+
+    ok = rows == n * INSIGHTS_DAYS and len(data['spend']) == rows
+    return [{'success': ok} for _ in range(n)]
+
+
+def run_benchmark(
+    scenario: str,
+    n: int,
+    servers: dict,
+    args
+) -> dict:
+    """
+    Mede um cenário para N anúncios em um diretório de trabalho isolado
+
+    Returns:
+        Métricas da execução (vazão, latências por etapa, requisições)
+    """
+    for server in servers.values():
+        server.reset_counts()
+    servers['graph'].insights_ads = n
+    metrics = enable_metrics()
+    metrics.reset()
+
+    timer = StageTimer()
+    workdir = tempfile.mkdtemp(prefix=f"bench-{scenario}-{n}-")
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        start = time.perf_counter()
+        results = _run_scenario(scenario, n, timer, args)
+        wall_time = time.perf_counter() - start
+    finally:
+        os.chdir(previous_dir)
+
+    succeeded = sum(1 for result in results if result.get('success'))
+    return {
+        'scenario': scenario,
+        'n': n,
+        'wall_time_s': round(wall_time, 4),
+        'throughput_ads_per_s': round(succeeded / wall_time, 3) if wall_time > 0 else None,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'stages': timer.summary(),
+        'requests': {
+            name: {'total': sum(server.counts.values()), **dict(sorted(server.counts.items()))}
+            for name, server in servers.items()
+        },
+        'counters': metrics.snapshot()['counters'],
+        'workdir': workdir,
+    }
+
+
+def parse_args(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Cenários separados por vírgula ({', '.join(SCENARIOS)})")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Quantidades de anúncios separadas por vírgula')
+    parser.add_argument('--openai-latency', default='50:0.3:0',
+                        help='Latência da geração: mediana_ms[:sigma[:taxa_de_erro]]')
+    parser.add_argument('--cdn-latency', default='5:0.3:0', help='Latência do download da imagem')
+    parser.add_argument('--graph-latency', default='10:0.3:0', help='Latência da Graph API')
+    parser.add_argument('--graph-usage', type=float, default=5.0,
+                        help='Percentual de uso informado nos cabeçalhos de limite da Meta')
+    parser.add_argument('--image-px', type=int, default=1024, help='Lado da imagem servida')
+    parser.add_argument('--image-workers', type=int, default=4)
+    parser.add_argument('--download-workers', type=int, default=4)
+    parser.add_argument('--publish-workers', type=int, default=2)
+    parser.add_argument('--retries', type=int, default=3, help='Tentativas por etapa')
+    parser.add_argument('--retry-delay', type=float, default=0.05, help='Espera base entre tentativas (s)')
+    parser.add_argument('--warm-upload-cache', action='store_true',
+                        help='Manter o cache de uploads (imagens repetidas não sobem de novo)')
+    parser.add_argument('--seed', type=int, default=1234, help='Semente das latências simuladas')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--verbose', action='store_true', help='Mostrar os logs do pipeline (stderr)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    args = parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    # Avisos de depreciação do SDK da Meta (logger raiz) poluem a saída a cada upload
+    logging.getLogger().setLevel(logging.ERROR)
+    # Logs do pipeline no stderr, para não misturar com o JSON do stdout
+    configure_logging(stream=sys.stderr, level=None if args.verbose else 'CRITICAL')
+
+    latencies = {
+        'openai': LatencyProfile.parse(args.openai_latency, seed=args.seed),
+        'cdn': LatencyProfile.parse(args.cdn_latency, seed=args.seed + 1),
+        'graph': LatencyProfile.parse(args.graph_latency, seed=args.seed + 2),
+    }
+
+    cdn = FakeCDNServer(latencies['cdn'], image_px=args.image_px).start()
+    openai = FakeOpenAIServer(cdn, latencies['openai']).start()
+    graph = FakeGraphServer(latencies['graph'], usage_pct=args.graph_usage).start()
+    servers = {'openai': openai, 'cdn': cdn, 'graph': graph}
+
+    try:
+        _configure_environment(openai, graph)
+        runs = []
+        for scenario in scenarios:
+            for n in sizes:
+                print(f"⏱️  {scenario} N={n}...", file=sys.stderr)
+                run = run_benchmark(scenario, n, servers, args)
+                print(f"   {run['throughput_ads_per_s']} anúncios/s, "
+                      f"{run['succeeded']}/{n} ok em {run['wall_time_s']}s", file=sys.stderr)
+                runs.append(run)
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'latency': {name: profile.describe() for name, profile in latencies.items()},
+            'graph_usage_pct': args.graph_usage,
+            'image_px': args.image_px,
+            'workers': {
+                'image': args.image_workers,
+                'download': args.download_workers,
+                'publish': args.publish_workers,
+            },
+            'warm_upload_cache': args.warm_upload_cache,
+            'seed': args.seed,
+        },
+        'runs': runs,
+    }
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload + '\n')
+        print(f"📊 Resultado salvo em: {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
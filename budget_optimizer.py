@@ -0,0 +1,296 @@
+"""
+Realocação vetorizada de orçamentos diários entre conjuntos de anúncios
+
+Recebe métricas por conjunto (gasto, cliques, leads) como arrays NumPy,
+pontua a eficiência de cada um e redistribui o orçamento total em uma única
+passagem vetorizada, respeitando orçamento mínimo/máximo e variação máxima
+por execução. Milhares de conjuntos levam poucos milissegundos, então o
+ajuste pode rodar de hora em hora.
+
+Uso:
+    data = InsightsStore().load('adsets_7d', columns=['adset_id', 'spend', 'clicks'])
+    budgets = manager.get_ad_set_budgets()
+    plan = plan_budgets(data['adset_id'], data['spend'], budgets, clicks=data['clicks'])
+    manager.update_ad_set_budgets(plan['updates'])
+"""
+from datetime import date, timedelta
+from typing import Optional, Union
+import numpy as np
+from structured_logging import AdsLogger, get_logger
+
+
+# Orçamento diário mínimo e máximo por conjunto, em centavos
+DEFAULT_MIN_BUDGET = 100
+DEFAULT_MAX_BUDGET = 10_000_000
+
+# Variação máxima por execução (a Meta recomenda até ~20% para não reiniciar o aprendizado)
+DEFAULT_MAX_CHANGE = 0.2
+
+# Variações menores que isto não são enviadas
+DEFAULT_MIN_UPDATE = 0.02
+
+# Iterações da bisseção que encontra o fator de escala do orçamento
+_BISECTION_STEPS = 64
+
+_log = get_logger('budget_optimizer')
+
+
+def aggregate_by_key(keys: np.ndarray, **columns: np.ndarray) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Soma colunas por chave (ex: linhas diárias → total por conjunto)
+
+    Args:
+        keys: Chave de cada linha (ex: adset_id)
+        **columns: Colunas numéricas a somar (NaN conta como zero)
+
+    Returns:
+        (chaves distintas, dicionário coluna → soma por chave)
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = {
+        name: np.bincount(inverse, weights=np.nan_to_num(np.asarray(values, dtype=np.float64)),
+                          minlength=len(unique))
+        for name, values in columns.items()
+    }
+    return unique, sums
+
+
+def efficiency_scores(
+    spend: np.ndarray,
+    clicks: Optional[np.ndarray] = None,
+    leads: Optional[np.ndarray] = None,
+    prior_spend: Optional[float] = None
+) -> np.ndarray:
+    """
+    Eficiência relativa de cada conjunto (1.0 = média da conta)
+
+    Usa leads por gasto quando há leads, senão cliques por gasto (1/CPC). A
+    taxa de cada conjunto é suavizada em direção à média da conta com peso
+    `prior_spend`, para que conjuntos com pouco gasto não recebam notas
+    extremas por acaso.
+
+    Args:
+        spend: Gasto no período
+        clicks: Cliques no período
+        leads: Leads (ou outra conversão) no período
+        prior_spend: Gasto equivalente da média da conta (padrão: gasto médio)
+
+    Returns:
+        Array de notas >= 0
+    """
+    spend = np.nan_to_num(np.asarray(spend, dtype=np.float64))
+    conversions = None
+    if leads is not None and np.nansum(leads) > 0:
+        conversions = leads
+    elif clicks is not None:
+        conversions = clicks
+    if conversions is None:
+        raise ValueError("Informe clicks ou leads para pontuar os conjuntos")
+    conversions = np.nan_to_num(np.asarray(conversions, dtype=np.float64))
+
+    total_spend = spend.sum()
+    if total_spend <= 0:
+        return np.ones_like(spend)
+
+    account_rate = conversions.sum() / total_spend
+    if account_rate <= 0:
+        return np.ones_like(spend)
+
+    prior = spend.mean() if prior_spend is None else prior_spend
+    rate = (conversions + prior * account_rate) / (spend + prior)
+    return rate / account_rate
+
+
+def reallocate_budgets(
+    current: np.ndarray,
+    scores: np.ndarray,
+    total: Optional[float] = None,
+    min_budget: float = DEFAULT_MIN_BUDGET,
+    max_budget: float = DEFAULT_MAX_BUDGET,
+    max_change: float = DEFAULT_MAX_CHANGE,
+    exponent: float = 1.0
+) -> np.ndarray:
+    """
+    Distribui o orçamento total proporcionalmente às notas, dentro dos limites
+
+    Cada conjunto recebe clip(λ · nota^exponent, limite inferior, limite
+    superior), com λ escolhido para que a soma seja o total. Os limites vêm
+    do mínimo/máximo absolutos e da variação máxima sobre o orçamento atual.
+
+    Args:
+        current: Orçamento diário atual (centavos)
+        scores: Notas de eficiência (ver efficiency_scores)
+        total: Orçamento total a distribuir (padrão: a soma atual); fica
+               dentro do que os limites permitem
+        min_budget: Orçamento mínimo por conjunto
+        max_budget: Orçamento máximo por conjunto
+        max_change: Variação relativa máxima (0.2 = ±20%)
+        exponent: Agressividade (>1 concentra mais nos melhores conjuntos)
+
+    Returns:
+        Novos orçamentos (int64, centavos)
+    """
+    current = np.asarray(current, dtype=np.float64)
+    weights = np.power(np.clip(np.nan_to_num(np.asarray(scores, dtype=np.float64)), 0, None), exponent)
+
+    low = np.clip(current * (1 - max_change), min_budget, max_budget)
+    high = np.clip(current * (1 + max_change), min_budget, max_budget)
+    high = np.maximum(high, low)
+
+    total = current.sum() if total is None else total
+    total = min(max(total, low.sum()), high.sum())
+
+    positive = weights > 0
+    if not positive.any():
+        return np.rint(np.clip(current, low, high)).astype(np.int64)
+
+    # Soma de clip(λ·w) cresce com λ: bisseção vetorizada no intervalo [0, λ_max]
+    lam_low, lam_high = 0.0, float(np.max(high[positive] / weights[positive]))
+    for _ in range(_BISECTION_STEPS):
+        lam = (lam_low + lam_high) / 2
+        if np.clip(lam * weights, low, high).sum() < total:
+            lam_low = lam
+        else:
+            lam_high = lam
+
+    budgets = np.clip(lam_high * weights, low, high)
+
+    # Centavos inteiros sem perder o total: arredonda para baixo e devolve a
+    # sobra aos conjuntos com maior parte fracionária que ainda têm folga
+    ceiling = np.floor(high)
+    rounded = np.clip(np.floor(budgets), np.ceil(low), ceiling)
+    remainder = int(round(total - rounded.sum()))
+    if remainder > 0:
+        fraction = np.where(rounded < ceiling, budgets - rounded, -np.inf)
+        order = np.argsort(-fraction, kind='stable')[:remainder]
+        rounded[order[np.isfinite(fraction[order])]] += 1
+    return rounded.astype(np.int64)
+
+
+def plan_budgets(
+    adset_ids: np.ndarray,
+    spend: np.ndarray,
+    current_budgets: dict[str, int],
+    clicks: Optional[np.ndarray] = None,
+    leads: Optional[np.ndarray] = None,
+    total: Optional[float] = None,
+    min_budget: float = DEFAULT_MIN_BUDGET,
+    max_budget: float = DEFAULT_MAX_BUDGET,
+    max_change: float = DEFAULT_MAX_CHANGE,
+    min_update: float = DEFAULT_MIN_UPDATE,
+    exponent: float = 1.0,
+    log: Optional[AdsLogger] = None
+) -> dict:
+    """
+    Calcula a nova distribuição de orçamento a partir de insights por conjunto
+
+    Linhas repetidas do mesmo conjunto (ex: uma por dia) são somadas.
+    Conjuntos sem orçamento próprio em `current_budgets` (ex: orçamento na
+    campanha) ficam de fora; conjuntos com orçamento mas sem insights entram
+    com gasto zero (nota da média da conta).
+
+    Args:
+        adset_ids: ID do conjunto de cada linha
+        spend, clicks, leads: Métricas de cada linha
+        current_budgets: ID do conjunto → orçamento diário atual (centavos)
+        total, min_budget, max_budget, max_change, exponent: Ver reallocate_budgets
+        min_update: Variação relativa mínima para gerar atualização
+        log: Logger do chamador (padrão: o do módulo)
+
+    Returns:
+        Dicionário com os arrays 'adset_id', 'current', 'proposed' e 'score'
+        e 'updates' (ID → novo orçamento, só as variações relevantes)
+    """
+    ids = np.array(list(current_budgets), dtype=str)
+    current = np.array(list(current_budgets.values()), dtype=np.float64)
+
+    columns = {'spend': spend}
+    if clicks is not None:
+        columns['clicks'] = clicks
+    if leads is not None:
+        columns['leads'] = leads
+    keys, sums = aggregate_by_key(np.asarray(adset_ids, dtype=str), **columns)
+
+    # Alinhar as somas aos conjuntos com orçamento (ausentes: zero)
+    position = np.searchsorted(keys, ids)
+    position = np.minimum(position, max(len(keys) - 1, 0))
+    found = (keys[position] == ids) if len(keys) else np.zeros(len(ids), dtype=bool)
+    aligned = {
+        name: np.where(found, values[position], 0.0) if len(keys) else np.zeros(len(ids))
+        for name, values in sums.items()
+    }
+
+    scores = efficiency_scores(aligned['spend'], aligned.get('clicks'), aligned.get('leads'))
+    proposed = reallocate_budgets(
+        current, scores, total=total, min_budget=min_budget, max_budget=max_budget,
+        max_change=max_change, exponent=exponent
+    )
+
+    change = np.abs(proposed - current) / np.maximum(current, 1)
+    changed = change >= min_update
+    updates = dict(zip(ids[changed].tolist(), proposed[changed].tolist()))
+
+    (log or _log).info(f"💰 Orçamentos recalculados: {len(ids)} conjuntos, {len(updates)} com alteração "
+                       f"(total {current.sum() / 100:.2f} → {proposed.sum() / 100:.2f})",
+                       extra={'adsets': len(ids), 'updates': len(updates)})
+
+    return {
+        'adset_id': ids,
+        'current': current.astype(np.int64),
+        'proposed': proposed,
+        'score': scores,
+        'updates': updates
+    }
+
+
+def optimize_budgets(
+    manager,
+    store,
+    dataset: str,
+    days: int = 7,
+    today: Optional[Union[date, str]] = None,
+    apply: bool = False,
+    **plan_kwargs
+) -> dict:
+    """
+    Recalcula (e opcionalmente aplica) os orçamentos a partir de um conjunto
+    de insights em nível de conjunto já ingerido (ver insights.py)
+
+    Args:
+        manager: MetaAdsManager da conta
+        store: InsightsStore com o conjunto de dados
+        dataset: Conjunto de dados com colunas adset_id, spend e clicks
+                 (e leads, gravada por ingest_insights a partir de actions)
+        days: Dias mais recentes considerados
+        today: Data de referência (padrão: hoje)
+        apply: Enviar as atualizações para a Meta
+        **plan_kwargs: Parâmetros de plan_budgets
+
+    Returns:
+        Plano de plan_budgets, com 'errors' (ID → erro) quando aplicado;
+        sem insights no período, um plano vazio
+    """
+    today = date.fromisoformat(today) if isinstance(today, str) else (today or date.today())
+    data = store.load(dataset, date_from=today - timedelta(days=days), date_to=today - timedelta(days=1))
+
+    # Nenhum bloco cobre o período: nada a recalcular
+    if 'adset_id' not in data:
+        manager.log.info(f"💰 Sem insights em '{dataset}' nos últimos {days} dias; orçamentos mantidos")
+        plan = {
+            'adset_id': np.array([], dtype=str),
+            'current': np.array([], dtype=np.int64),
+            'proposed': np.array([], dtype=np.int64),
+            'score': np.array([], dtype=np.float64),
+            'updates': {}
+        }
+        if apply:
+            plan['errors'] = {}
+        return plan
+
+    plan = plan_budgets(
+        data['adset_id'], data['spend'], manager.get_ad_set_budgets(),
+        clicks=data.get('clicks'), leads=data.get('leads'), log=manager.log, **plan_kwargs
+    )
+    if apply:
+        plan['errors'] = manager.update_ad_set_budgets(plan['updates'])
+    return plan
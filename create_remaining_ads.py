@@ -10,7 +10,7 @@ if sys.platform == 'win32':
 from dotenv import load_dotenv
 from image_generator import ImageGenerator
 from meta_ads_manager import MetaAdsManager
-import time
+from retry import RetryPolicy, retry_call
 
 load_dotenv()
 
@@ -24,58 +24,57 @@ meta_manager = MetaAdsManager()
 print("      [OK] APIs inicializadas com sucesso!")
 
 def create_ad_with_retry(ad_config, max_retries=3):
-    """Cria um anuncio com retry logic para erros transientes"""
-    for attempt in range(1, max_retries + 1):
-        try:
-            print(f"\n[Tentativa {attempt}/{max_retries}]")
-
-            # Gerar imagem
-            print(f"      Gerando imagem com IA...")
-            image = image_gen.generate_image(
-                prompt=ad_config['prompt'],
-                save_path=ad_config['image_path']
-            )
-            print(f"      [OK] Imagem gerada: {image['local_path']}")
-
-            # Criar anuncio completo
-            print(f"      Criando anuncio na Meta...")
-            result = meta_manager.create_complete_ad(
-                campaign_name=ad_config['campaign_name'],
-                ad_name=ad_config['ad_name'],
-                image_path=image['local_path'],
-                title=ad_config['title'],
-                body=ad_config['body'],
-                link_url=ad_config['link_url'],
-                daily_budget=ad_config['daily_budget'],
-                targeting=ad_config['targeting'],
-                special_ad_categories=ad_config['special_ad_categories']
-            )
-
-            print(f"      [OK] Anuncio criado!")
-            print(f"      Campaign ID: {result['campaign_id']}")
-            print(f"      Ad ID: {result['ad_id']}")
-            return result
-
-        except Exception as e:
-            error_msg = str(e)
-
-            # Verificar se e erro transiente (500)
-            if '"is_transient": true' in error_msg or 'code": 2' in error_msg:
-                if attempt < max_retries:
-                    wait_time = attempt * 5  # Espera crescente: 5s, 10s, 15s
-                    print(f"      [AVISO] Erro transiente da Meta API")
-                    print(f"      Aguardando {wait_time} segundos antes de tentar novamente...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"      [ERRO] Falhou apos {max_retries} tentativas")
-                    raise
-            else:
-                # Erro nao transiente, nao vale a pena retry
-                print(f"      [ERRO] {error_msg}")
-                raise
-
-    raise Exception("Numero maximo de tentativas excedido")
+    """
+    Cria um anuncio repetindo apenas a etapa que falhou em erros transientes
+
+    A imagem e gerada uma unica vez e o download e repetido a parte, sem
+    gerar de novo; upload, campanha, conjunto, criativo e anuncio sao
+    repetidos individualmente dentro de create_complete_ad.
+    """
+    policy = RetryPolicy(max_attempts=max_retries, base_delay=5.0)
+    meta_manager.retry_policy = policy
+
+    try:
+        # Gerar imagem
+        print(f"      Gerando imagem com IA...")
+        image = retry_call(
+            image_gen.generate_image,
+            prompt=ad_config['prompt'],
+            policy=policy,
+            stage='image'
+        )
+        retry_call(
+            image_gen.download_image,
+            image,
+            ad_config['image_path'],
+            policy=policy,
+            stage='download'
+        )
+        print(f"      [OK] Imagem gerada: {image['local_path']}")
+
+        # Criar anuncio completo
+        print(f"      Criando anuncio na Meta...")
+        result = meta_manager.create_complete_ad(
+            campaign_name=ad_config['campaign_name'],
+            ad_name=ad_config['ad_name'],
+            image_path=image['local_path'],
+            title=ad_config['title'],
+            body=ad_config['body'],
+            link_url=ad_config['link_url'],
+            daily_budget=ad_config['daily_budget'],
+            targeting=ad_config['targeting'],
+            special_ad_categories=ad_config['special_ad_categories'],
+            image_md5=image.get('md5')
+        )
+
+        print(f"      [OK] Anuncio criado!")
+        print(f"      Campaign ID: {result['campaign_id']}")
+        print(f"      Ad ID: {result['ad_id']}")
+        return result
+
+    except Exception as e:
+        print(f"      [ERRO] {e}")
+        raise
 
 # Configuracao dos anuncios restantes
 ads_config = [
@@ -0,0 +1,456 @@
+"""
+Gravação e reprodução ("cassetes") do tráfego HTTP do ImageGenerator e do
+MetaAdsManager, para perfilar e testar o pipeline offline com payloads reais
+"""
+import os
+import io
+import gzip
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from typing import Literal, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from structured_logging import get_logger
+
+
+CASSETTE_VERSION = 1
+
+# Parâmetros com credenciais: removidos das URLs/corpos gravados e da comparação
+SECRET_PARAMS = {'access_token', 'appsecret_proof', 'api_key', 'client_secret'}
+
+# Cabeçalhos de resposta que não fazem sentido ao reproduzir o corpo já decodificado
+DROPPED_RESPONSE_HEADERS = {
+    'content-encoding', 'transfer-encoding', 'content-length', 'connection',
+    'set-cookie', 'keep-alive'
+}
+
+
+class Cassette:
+    """
+    Arquivo com as interações HTTP (requisição → resposta) de uma execução
+
+    No modo 'record', as requisições seguem para a rede e cada resposta é
+    guardada; no modo 'replay', nenhuma requisição sai da máquina e as
+    respostas gravadas são devolvidas, com a latência original multiplicada
+    por `time_scale` (1 = tempo real, 0.1 = 10x mais rápido, 0 = imediato).
+    Com time_scale > 0 a linha do tempo da gravação também é respeitada:
+    nenhuma resposta volta antes do instante (escalado) em que chegou na
+    gravação, contado a partir da criação do cassete.
+
+    Na reprodução, cada requisição recebe a próxima resposta gravada para o
+    mesmo método, URL e corpo; se o corpo mudou (ex: nomes com timestamp),
+    vale a próxima resposta gravada para o mesmo método e URL.
+
+    Corpos idênticos (ex: a mesma imagem baixada várias vezes) são guardados
+    uma única vez, e o arquivo é comprimido com gzip.
+
+    Uso:
+        with Cassette('runs/lote.cassette', mode='record') as cassette:
+            cassette.install(automation.image_generator, automation.meta_manager)
+            automation.create_multiple_ads(configs)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: Literal["record", "replay"] = "replay",
+        time_scale: float = 1.0,
+        quiet: bool = False
+    ):
+        """
+        Args:
+            path: Arquivo do cassete
+            mode: 'record' grava o tráfego real; 'replay' reproduz o arquivo
+            time_scale: Fator aplicado à latência gravada na reprodução
+            quiet: Registrar só avisos e erros (ver structured_logging.py)
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError("mode precisa ser 'record' ou 'replay'")
+
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.log = get_logger('cassette', quiet=quiet)
+
+        self._lock = threading.Lock()
+        self._interactions: list[dict] = []
+        self._blobs: dict[str, str] = {}
+        self._by_body: dict[tuple, deque] = {}
+        self._by_route: dict[tuple, deque] = {}
+
+        if mode == 'replay':
+            self._load()
+        self._started = time.monotonic()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    def __enter__(self) -> 'Cassette':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.recording:
+            self.save()
+
+    # Persistência
+
+    def _load(self) -> None:
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Versão de cassete não suportada: {data.get('version')}")
+
+        self._blobs = data['blobs']
+        self._interactions = data['interactions']
+        for interaction in self._interactions:
+            route = (interaction['method'], interaction['url'])
+            self._by_body.setdefault(route + (interaction['request_sha'],), deque()).append(interaction)
+            self._by_route.setdefault(route, deque()).append(interaction)
+
+    def save(self) -> None:
+        """Grava o cassete (gzip + JSON) de forma atômica"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            data = {
+                'version': CASSETTE_VERSION,
+                'interactions': list(self._interactions),
+                'blobs': dict(self._blobs)
+            }
+
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+        self.log.info(f"📼 Cassete salvo: {self.path} ({len(data['interactions'])} interações)")
+
+    # Gravação e reprodução
+
+    def record(
+        self,
+        client: str,
+        method: str,
+        url: str,
+        request_body: Optional[bytes],
+        request_content_type: Optional[str],
+        status: int,
+        headers: dict,
+        body: bytes,
+        elapsed: float
+    ) -> None:
+        """Registra uma interação concluída"""
+        body_sha = None
+        if body:
+            body_sha = hashlib.sha256(body).hexdigest()
+
+        interaction = {
+            'client': client,
+            'method': method.upper(),
+            'url': normalize_url(url),
+            'request_sha': request_fingerprint(request_body, request_content_type),
+            'status': status,
+            'headers': {
+                key: value for key, value in headers.items()
+                if key.lower() not in DROPPED_RESPONSE_HEADERS
+            },
+            'body': body_sha,
+            'elapsed': round(elapsed, 6),
+            'offset': round(time.monotonic() - self._started, 6)
+        }
+
+        with self._lock:
+            if body_sha and body_sha not in self._blobs:
+                self._blobs[body_sha] = base64.b64encode(body).decode('ascii')
+            self._interactions.append(interaction)
+
+    def play(
+        self,
+        method: str,
+        url: str,
+        request_body: Optional[bytes],
+        request_content_type: Optional[str]
+    ) -> tuple[dict, bytes]:
+        """
+        Retorna a próxima resposta gravada para a requisição
+
+        Returns:
+            (interação gravada, corpo da resposta)
+        """
+        route = (method.upper(), normalize_url(url))
+        fingerprint = request_fingerprint(request_body, request_content_type)
+
+        with self._lock:
+            interaction = _pop_unplayed(self._by_body.get(route + (fingerprint,)))
+            if interaction is None:
+                interaction = _pop_unplayed(self._by_route.get(route))
+            if interaction is None:
+                raise LookupError(
+                    f"Nenhuma resposta gravada para {route[0]} {route[1]} em {self.path}"
+                )
+            interaction['_played'] = True
+
+        body = base64.b64decode(self._blobs[interaction['body']]) if interaction['body'] else b''
+        return interaction, body
+
+    def replay_delay(self, interaction: dict) -> float:
+        """
+        Espera (s) antes de devolver a resposta reproduzida
+
+        A latência gravada (escalada), estendida até o instante da gravação
+        em que a resposta chegou (`offset`, também escalado) quando a
+        reprodução está adiantada em relação à gravação
+        """
+        delay = interaction['elapsed'] * self.time_scale
+        offset = interaction.get('offset')
+        if offset is None or self.time_scale <= 0:
+            return delay
+
+        until_offset = offset * self.time_scale - (time.monotonic() - self._started)
+        return max(delay, until_offset)
+
+    # Integração com os clientes HTTP
+
+    def requests_adapter(self, client: str) -> 'CassetteAdapter':
+        """Adapter para montar em uma requests.Session"""
+        return CassetteAdapter(self, client)
+
+    def httpx_client(self, client: str = 'openai'):
+        """Cliente httpx síncrono para OpenAI(http_client=...)"""
+        from openai import DefaultHttpxClient
+        return DefaultHttpxClient(transport=_httpx_transport(self, client))
+
+    def async_httpx_client(self, client: str = 'openai'):
+        """Cliente httpx assíncrono para AsyncOpenAI(http_client=...)"""
+        from openai import DefaultAsyncHttpxClient
+        return DefaultAsyncHttpxClient(transport=_async_httpx_transport(self, client))
+
+    def install(self, image_generator=None, meta_manager=None) -> None:
+        """
+        Passa a gravar/reproduzir todo o tráfego dos objetos informados
+
+        Args:
+            image_generator: ImageGenerator (ou AsyncImageGenerator): chamadas à
+                             OpenAI e downloads das imagens
+            meta_manager: MetaAdsManager: requisições à Graph API
+        """
+        if image_generator is not None:
+            image_generator.client = image_generator.client.with_options(
+                http_client=self.httpx_client('openai')
+            )
+            if getattr(image_generator, 'async_client', None) is not None:
+                image_generator.async_client = image_generator.async_client.with_options(
+                    http_client=self.async_httpx_client('openai')
+                )
+            adapter = self.requests_adapter('download')
+            image_generator.session.mount('https://', adapter)
+            image_generator.session.mount('http://', adapter)
+
+        if meta_manager is not None:
+            session = meta_manager.api._session.requests
+            adapter = self.requests_adapter('graph')
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Adapter do requests que grava ou reproduz as requisições de uma Session"""
+
+    def __init__(self, cassette: Cassette, client: str, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.client = client
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if hasattr(body, 'read'):
+            body = body.read()
+            request.body = body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        content_type = request.headers.get('Content-Type')
+
+        if not self.cassette.recording:
+            interaction, content = self.cassette.play(request.method, request.url, body, content_type)
+            delay = self.cassette.replay_delay(interaction)
+            if delay > 0:
+                time.sleep(delay)
+            return self._build_response(request, interaction, content)
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content
+        self.cassette.record(
+            self.client, request.method, request.url, body, content_type,
+            response.status_code, dict(response.headers), content,
+            time.perf_counter() - start
+        )
+        return response
+
+    def _build_response(self, request, interaction: dict, content: bytes) -> Response:
+        response = Response()
+        response.status_code = interaction['status']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.headers['Content-Length'] = str(len(content))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(content)
+        response._content = content
+        response._content_consumed = True
+        response.reason = ''
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+def _httpx_transport(cassette: Cassette, client: str):
+    """Transporte httpx síncrono (httpx é dependência do SDK da OpenAI)"""
+    import httpx
+
+    class CassetteTransport(httpx.BaseTransport):
+        def __init__(self):
+            self._wrapped = httpx.HTTPTransport()
+
+        def handle_request(self, request):
+            body = request.read()
+            content_type = request.headers.get('content-type')
+
+            if not cassette.recording:
+                interaction, content = cassette.play(request.method, str(request.url), body, content_type)
+                delay = cassette.replay_delay(interaction)
+                if delay > 0:
+                    time.sleep(delay)
+                return httpx.Response(
+                    interaction['status'], headers=interaction['headers'],
+                    content=content, request=request
+                )
+
+            start = time.perf_counter()
+            response = self._wrapped.handle_request(request)
+            try:
+                content = response.read()
+            finally:
+                response.close()
+            cassette.record(
+                client, request.method, str(request.url), body, content_type,
+                response.status_code, dict(response.headers), content,
+                time.perf_counter() - start
+            )
+            return httpx.Response(
+                response.status_code, headers=_replayable_headers(response.headers),
+                content=content, request=request
+            )
+
+        def close(self):
+            self._wrapped.close()
+
+    return CassetteTransport()
+
+
+def _async_httpx_transport(cassette: Cassette, client: str):
+    """Transporte httpx assíncrono, para o AsyncOpenAI"""
+    import httpx
+
+    class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self._wrapped = httpx.AsyncHTTPTransport()
+
+        async def handle_async_request(self, request):
+            body = await request.aread()
+            content_type = request.headers.get('content-type')
+
+            if not cassette.recording:
+                interaction, content = cassette.play(request.method, str(request.url), body, content_type)
+                delay = cassette.replay_delay(interaction)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                return httpx.Response(
+                    interaction['status'], headers=interaction['headers'],
+                    content=content, request=request
+                )
+
+            start = time.perf_counter()
+            response = await self._wrapped.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+            cassette.record(
+                client, request.method, str(request.url), body, content_type,
+                response.status_code, dict(response.headers), content,
+                time.perf_counter() - start
+            )
+            return httpx.Response(
+                response.status_code, headers=_replayable_headers(response.headers),
+                content=content, request=request
+            )
+
+        async def aclose(self):
+            await self._wrapped.aclose()
+
+    return AsyncCassetteTransport()
+
+
+def _replayable_headers(headers) -> dict:
+    """Cabeçalhos sem codificação de transporte (o corpo já está decodificado)"""
+    return {key: value for key, value in headers.items() if key.lower() not in DROPPED_RESPONSE_HEADERS}
+
+
+def _pop_unplayed(queue: Optional[deque]) -> Optional[dict]:
+    """Próxima interação ainda não reproduzida da fila"""
+    while queue:
+        interaction = queue.popleft()
+        if not interaction.get('_played'):
+            return interaction
+    return None
+
+
+def normalize_url(url: str) -> str:
+    """URL sem credenciais e com a query em ordem estável"""
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in SECRET_PARAMS
+    )
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def request_fingerprint(body: Optional[bytes], content_type: Optional[str]) -> Optional[str]:
+    """
+    Hash do corpo da requisição, ignorando credenciais e a ordem dos campos
+    (formulários e JSON); multipart e outros formatos usam os bytes brutos
+    """
+    if not body:
+        return None
+
+    content_type = (content_type or '').lower()
+    if 'application/x-www-form-urlencoded' in content_type:
+        fields = sorted(
+            (key, value) for key, value in parse_qsl(body.decode('utf-8', 'replace'), keep_blank_values=True)
+            if key not in SECRET_PARAMS
+        )
+        canonical = urlencode(fields).encode()
+    elif 'application/json' in content_type:
+        try:
+            canonical = json.dumps(json.loads(body), sort_keys=True).encode()
+        except ValueError:
+            canonical = body
+    else:
+        canonical = body
+
+    return hashlib.sha256(canonical).hexdigest()
@@ -0,0 +1,186 @@
+"""
+Cache em disco das imagens geradas pelo DALL-E, indexado pelo prompt
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import atexit
+import weakref
+import threading
+from typing import Optional
+from local_store import SqliteIndex, DEFAULT_CACHE_DIR
+
+
+# Orçamento padrão de disco para as imagens em cache
+DEFAULT_IMAGE_CACHE_BYTES = 512 * 1024 * 1024
+
+
+# Caches abertos, fechados (com os acessos pendentes gravados) na saída do processo
+_open_caches: 'weakref.WeakSet[ImageCache]' = weakref.WeakSet()
+
+
+def _close_open_caches() -> None:
+    for cache in list(_open_caches):
+        cache.close()
+
+
+atexit.register(_close_open_caches)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Remove espaços e quebras de linha redundantes do prompt"""
+    return ' '.join(prompt.split())
+
+
+class ImageCache:
+    """
+    Cache LRU em disco de imagens geradas
+
+    A chave é o hash do prompt normalizado + parâmetros de geração. Cada
+    entrada guarda os bytes da imagem e os metadados (revised_prompt, url
+    original etc.). Quando o total passa do orçamento, as entradas usadas há
+    mais tempo são descartadas.
+
+    Leituras não gravam no índice: o último acesso de cada acerto fica em
+    memória e só é persistido no próximo put(), na remoção por orçamento, em
+    close() ou na saída do processo.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_IMAGE_CACHE_BYTES):
+        """
+        Args:
+            directory: Pasta do cache (padrão: ./cache/images)
+            max_bytes: Tamanho máximo total das imagens em cache
+        """
+        self.directory = directory or os.path.join(DEFAULT_CACHE_DIR, 'images')
+        self.max_bytes = max_bytes
+        self.index = SqliteIndex(os.path.join(self.directory, 'index.sqlite3'))
+        # O índice é fechado por close(), depois de gravar os acessos pendentes
+        atexit.unregister(self.index.close)
+        self._evict_lock = threading.Lock()
+        self._accessed: dict[str, float] = {}
+        self._accessed_lock = threading.Lock()
+        _open_caches.add(self)
+
+    def close(self) -> None:
+        """Grava os acessos pendentes e fecha o índice"""
+        if self not in _open_caches:
+            return
+        self.flush_access_times()
+        self.index.close()
+        _open_caches.discard(self)
+
+    @staticmethod
+    def make_key(prompt: str, **params) -> str:
+        """
+        Gera a chave do cache
+
+        Args:
+            prompt: Prompt original
+            **params: Parâmetros de geração (model, size, quality, style...)
+
+        Returns:
+            Hash SHA-256 em hexadecimal
+        """
+        payload = json.dumps(
+            {'prompt': normalize_prompt(prompt), **params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _image_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.img")
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Busca uma entrada e registra o acesso (em memória)
+
+        Returns:
+            Metadados da entrada com 'path' dos bytes, ou None
+        """
+        entry = self.index.get(key)
+        if not entry:
+            return None
+
+        path = self._image_path(key)
+        if not os.path.exists(path):
+            with self._accessed_lock:
+                self._accessed.pop(key, None)
+            self.index.delete(key)
+            return None
+
+        now = time.time()
+        with self._accessed_lock:
+            self._accessed[key] = now
+        return {**entry, 'last_access': now, 'path': path}
+
+    def flush_access_times(self) -> int:
+        """
+        Persiste os últimos acessos acumulados em memória, em uma transação
+
+        Returns:
+            Número de entradas atualizadas
+        """
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+        updates = {}
+        for key, last_access in accessed.items():
+            entry = self.index.get(key)
+            if entry and last_access > entry.get('last_access', 0):
+                updates[key] = {**entry, 'last_access': last_access}
+        self.index.update(updates)
+        return len(updates)
+
+    def put(self, key: str, source_path: str, metadata: dict) -> None:
+        """
+        Copia a imagem para o cache e registra os metadados
+
+        Args:
+            key: Chave gerada por make_key
+            source_path: Arquivo com os bytes da imagem
+            metadata: Dados a devolver em um acerto (revised_prompt, url...)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.img-', suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, self._image_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        now = time.time()
+        self.index.set(key, {
+            **metadata,
+            'bytes': os.path.getsize(self._image_path(key)),
+            'created': now,
+            'last_access': now
+        })
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas até caber no orçamento"""
+        with self._evict_lock:
+            self.flush_access_times()
+            entries = sorted(self.index.items(), key=lambda item: item[1].get('last_access', 0))
+            total = sum(entry.get('bytes', 0) for _, entry in entries)
+
+            evicted = []
+            for key, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                total -= entry.get('bytes', 0)
+                evicted.append(key)
+                try:
+                    os.remove(self._image_path(key))
+                except FileNotFoundError:
+                    pass
+
+            self.index.delete(*evicted)
@@ -2,27 +2,133 @@
 Módulo de geração de imagens usando OpenAI DALL-E 3
 """
 import os
-import requests
-from openai import OpenAI
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
 from typing import Optional, Literal
 import base64
+from image_cache import ImageCache
+from metrics import MetricsRegistry, get_metrics
+from structured_logging import get_logger
+from lazy_imports import lazy_import
+
+# Importados no primeiro uso: só o openai leva perto de um segundo, e o
+# asyncio (usado apenas pelo AsyncImageGenerator) dezenas de milissegundos
+asyncio = lazy_import('asyncio')
+OpenAI = lazy_import('openai', 'OpenAI')
+AsyncOpenAI = lazy_import('openai', 'AsyncOpenAI')
+requests = lazy_import('requests')
+HTTPAdapter = lazy_import('requests.adapters', 'HTTPAdapter')
+
+
+# Tamanho dos blocos lidos/gravados durante downloads e cópias
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def _decode_base64_to(data: str, out) -> str:
+    """
+    Decodifica base64 em blocos, gravando em `out` e calculando o MD5
+
+    Returns:
+        MD5 do conteúdo decodificado em hexadecimal
+    """
+    digest = hashlib.md5()
+    # Múltiplo de 4 caracteres para cada bloco decodificar de forma independente
+    step = (DOWNLOAD_CHUNK_SIZE // 3) * 4
+    for start in range(0, len(data), step):
+        chunk = base64.b64decode(data[start:start + step])
+        digest.update(chunk)
+        out.write(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _atomic_file(path: str):
+    """
+    Abre um arquivo temporário na mesma pasta de `path` e o renomeia para
+    `path` ao final; em caso de erro o temporário é descartado
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.download-', suffix='.part')
+    try:
+        with os.fdopen(fd, 'w+b') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 class ImageGenerator:
     """Classe para gerar imagens usando a API OpenAI DALL-E 3"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        image_cache: Optional[ImageCache] = None,
+        use_image_cache: bool = True,
+        download_pool_size: int = 16,
+        base_url: Optional[str] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        quiet: bool = False
+    ):
         """
         Inicializa o gerador de imagens
 
         Args:
             api_key: Chave da API OpenAI (se None, usa variável de ambiente)
+            image_cache: Cache de imagens geradas (padrão: ./cache/images)
+            use_image_cache: Habilitar o cache de imagens geradas
+            download_pool_size: Conexões simultâneas mantidas para downloads
+            base_url: Endpoint da API OpenAI (padrão: OPENAI_BASE_URL ou o oficial),
+                      útil para apontar para um servidor local de testes
+            metrics: Registro de métricas (padrão: o do processo, ver metrics.py)
+            quiet: Registrar só avisos e erros (ver structured_logging.py)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY não encontrada. Configure no .env ou passe como parâmetro")
 
-        self.client = OpenAI(api_key=self.api_key)
+        self.base_url = base_url or os.getenv('OPENAI_BASE_URL')
+        self.download_pool_size = download_pool_size
+
+        # Cliente e sessão criados no primeiro uso (ver as propriedades abaixo)
+        self._client = None
+        self._session = None
+        self._clients_lock = threading.Lock()
+        self.image_cache = (image_cache or ImageCache()) if use_image_cache else None
+        self.metrics = metrics or get_metrics()
+        self.log = get_logger('image_generator', quiet=quiet)
+
+    @property
+    def client(self) -> OpenAI:
+        """Cliente da OpenAI, criado no primeiro acesso"""
+        if self._client is None:
+            with self._clients_lock:
+                if self._client is None:
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    @client.setter
+    def client(self, client: OpenAI) -> None:
+        self._client = client
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Sessão compartilhada dos downloads: reaproveita conexões TLS"""
+        if self._session is None:
+            with self._clients_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.download_pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
 
     def generate_image(
         self,
@@ -30,7 +136,9 @@ class ImageGenerator:
         size: Literal["1024x1024", "1792x1024", "1024x1792"] = "1024x1024",
         quality: Literal["standard", "hd"] = "standard",
         style: Literal["vivid", "natural"] = "vivid",
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        cache: Literal["read", "write", "bypass"] = "read",
+        response_format: Literal["url", "b64_json"] = "url"
     ) -> dict:
         """
         Gera uma imagem usando DALL-E 3
@@ -41,78 +149,294 @@ class ImageGenerator:
             quality: Qualidade da imagem ('standard' ou 'hd')
             style: Estilo ('vivid' para dramático ou 'natural' para realista)
             save_path: Caminho para salvar a imagem localmente
+            cache: 'read' reaproveita uma imagem idêntica já gerada e guarda as
+                   novas; 'write' sempre gera e substitui a entrada; 'bypass'
+                   ignora o cache
+            response_format: 'url' baixa a imagem do CDN da OpenAI; 'b64_json'
+                             recebe os bytes na própria resposta, sem a
+                             segunda conexão (nesse caso 'url' é None)
 
         Returns:
             dict com 'url', 'revised_prompt' e opcionalmente 'local_path'
+            (sem save_path no modo 'b64_json', o conteúdo fica em 'b64_json' e
+            é decodificado em blocos por download_image)
         """
-        if len(prompt) > 4000:
-            raise ValueError("Prompt muito longo. Máximo 4000 caracteres para DALL-E 3")
+        cache_key = self._prepare_request(prompt, size, quality, style, cache)
+        if cache_key and cache == "read":
+            cached = self._cached_result(cache_key, save_path)
+            if cached:
+                return cached
 
-        print(f"🎨 Gerando imagem com DALL-E 3...")
-        print(f"📝 Prompt: {prompt[:100]}...")
+        self.log.info("🎨 Gerando imagem com DALL-E 3...", extra={'size': size, 'quality': quality})
+        self.log.debug("📝 Prompt: %s", prompt)
 
         try:
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                style=style,
-                n=1  # DALL-E 3 só suporta n=1
+            self.metrics.inc('requests', service='openai')
+            with self.metrics.span('generate_image', quality=quality):
+                response = self.client.images.generate(
+                    **self._request_params(prompt, size, quality, style, response_format)
+                )
+
+            return self._handle_response(
+                response, size, quality, style, save_path, cache_key, response_format
             )
 
-            image_url = response.data[0].url
-            revised_prompt = response.data[0].revised_prompt
+        except Exception as e:
+            self.log.error(f"❌ Erro ao gerar imagem: {str(e)}")
+            raise
 
-            result = {
-                'url': image_url,
-                'revised_prompt': revised_prompt,
-                'size': size,
-                'quality': quality,
-                'style': style
-            }
+    def _prepare_request(
+        self,
+        prompt: str,
+        size: str,
+        quality: str,
+        style: str,
+        cache: str
+    ) -> Optional[str]:
+        """
+        Valida o prompt e calcula a chave do cache
 
-            # Salvar imagem localmente se solicitado
+        Returns:
+            Chave do cache, ou None se o cache estiver desativado/ignorado
+        """
+        if len(prompt) > 4000:
+            raise ValueError("Prompt muito longo. Máximo 4000 caracteres para DALL-E 3")
+
+        if not self.image_cache or cache == "bypass":
+            return None
+
+        return ImageCache.make_key(
+            prompt, model="dall-e-3", size=size, quality=quality, style=style
+        )
+
+    @staticmethod
+    def _request_params(
+        prompt: str,
+        size: str,
+        quality: str,
+        style: str,
+        response_format: str
+    ) -> dict:
+        """Monta os parâmetros da chamada images.generate"""
+        return {
+            'model': "dall-e-3",
+            'prompt': prompt,
+            'size': size,
+            'quality': quality,
+            'style': style,
+            'response_format': response_format,
+            'n': 1  # DALL-E 3 só suporta n=1
+        }
+
+    def _handle_response(
+        self,
+        response,
+        size: str,
+        quality: str,
+        style: str,
+        save_path: Optional[str],
+        cache_key: Optional[str],
+        response_format: str
+    ) -> dict:
+        """Monta o resultado de generate_image e salva a imagem se solicitado"""
+        image_url = response.data[0].url
+        revised_prompt = response.data[0].revised_prompt
+
+        result = {
+            'url': image_url,
+            'revised_prompt': revised_prompt,
+            'size': size,
+            'quality': quality,
+            'style': style
+        }
+
+        if cache_key:
+            result['cache_key'] = cache_key
+
+        if response_format == "b64_json":
+            b64_data = response.data[0].b64_json
             if save_path:
-                local_path = self._download_image(image_url, save_path)
-                result['local_path'] = local_path
-                print(f"✅ Imagem salva em: {local_path}")
+                # Decodificar direto para o disco, sem materializar os bytes
+                with _atomic_file(save_path) as out:
+                    md5 = _decode_base64_to(b64_data, out)
+                self._store_in_cache(result, save_path)
+                result['local_path'] = save_path
+                result['md5'] = md5
+                self.log.info(f"✅ Imagem salva em: {save_path}", extra={'path': save_path})
+            else:
+                result['b64_json'] = b64_data
+
+        # Salvar imagem localmente se solicitado
+        elif save_path:
+            local_path = self.download_image(result, save_path)
+            self.log.info(f"✅ Imagem salva em: {local_path}", extra={'path': local_path})
+
+        self.log.info("✅ Imagem gerada com sucesso!")
+        if image_url:
+            self.log.debug("🔗 URL: %s", image_url)
+        self.log.debug("📝 Prompt revisado pela IA: %s", revised_prompt)
+
+        return result
+
+    def _cached_result(self, cache_key: str, save_path: Optional[str]) -> Optional[dict]:
+        """Monta o resultado a partir do cache, copiando a imagem se solicitado"""
+        entry = self.image_cache.get(cache_key)
+        self.metrics.inc('image_cache', result='hit' if entry else 'miss')
+        if not entry:
+            return None
+
+        result = {
+            'url': entry.get('url'),
+            'revised_prompt': entry.get('revised_prompt'),
+            'size': entry.get('size'),
+            'quality': entry.get('quality'),
+            'style': entry.get('style'),
+            'cached': True,
+            'cache_path': entry['path']
+        }
+
+        if save_path:
+            self.download_image(result, save_path)
+
+        self.log.info("♻️  Imagem reaproveitada do cache (prompt idêntico)")
+        return result
+
+    def download_image(self, image_result: dict, save_path: str) -> str:
+        """
+        Salva localmente uma imagem retornada por generate_image
 
-            print(f"✅ Imagem gerada com sucesso!")
-            print(f"🔗 URL: {image_url}")
-            print(f"📝 Prompt revisado pela IA: {revised_prompt}")
+        Imagens vindas do cache são copiadas do disco, as recebidas em
+        'b64_json' são decodificadas em blocos para o disco e as demais são
+        baixadas da URL.
+        Se o cache estiver ativo, imagens novas são guardadas nele.
 
-            return result
+        Args:
+            image_result: Resultado de generate_image
+            save_path: Caminho onde salvar
 
-        except Exception as e:
-            print(f"❌ Erro ao gerar imagem: {str(e)}")
-            raise
+        Returns:
+            Caminho completo do arquivo salvo
+        """
+        if image_result.get('cache_path'):
+            md5 = self._copy_image(image_result['cache_path'], save_path)
+        else:
+            if image_result.get('b64_json') is not None:
+                with _atomic_file(save_path) as out:
+                    md5 = _decode_base64_to(image_result['b64_json'], out)
+                # Só descartar depois de gravado, para o download poder ser repetido
+                del image_result['b64_json']
+            else:
+                _, md5 = self._download_image_with_md5(image_result['url'], save_path)
+
+            self._store_in_cache(image_result, save_path)
+
+        image_result['local_path'] = save_path
+        image_result['md5'] = md5
+        return save_path
+
+    def _store_in_cache(self, image_result: dict, path: str) -> None:
+        """Guarda no cache uma imagem recém-gerada, se o cache estiver ativo"""
+        if not self.image_cache or not image_result.get('cache_key'):
+            return
+
+        self.image_cache.put(image_result['cache_key'], path, {
+            'url': image_result['url'],
+            'revised_prompt': image_result['revised_prompt'],
+            'size': image_result['size'],
+            'quality': image_result['quality'],
+            'style': image_result['style']
+        })
+
+    def _copy_image(self, source_path: str, save_path: str) -> str:
+        """
+        Copia uma imagem calculando o MD5 durante a cópia
 
-    def _download_image(self, url: str, save_path: str) -> str:
+        Returns:
+            MD5 do conteúdo em hexadecimal
         """
-        Baixa a imagem da URL e salva localmente
+        digest = hashlib.md5()
+        with _atomic_file(save_path) as out, open(source_path, 'rb') as src:
+            for chunk in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        return digest.hexdigest()
+
+    def _download_image(self, url: str, save_path: str, max_resumes: int = 3) -> str:
+        """
+        Baixa a imagem da URL em streaming e salva localmente
 
         Args:
             url: URL da imagem
             save_path: Caminho onde salvar
+            max_resumes: Máximo de retomadas após queda de conexão
 
         Returns:
             Caminho completo do arquivo salvo
         """
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+        path, _ = self._download_image_with_md5(url, save_path, max_resumes)
+        return path
+
+    def _download_image_with_md5(
+        self,
+        url: str,
+        save_path: str,
+        max_resumes: int = 3
+    ) -> tuple[str, str]:
+        """
+        Baixa a imagem como _download_image e devolve também o MD5 do conteúdo
 
-            # Criar diretório se não existir
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        Os blocos vão direto para um arquivo temporário renomeado ao final, e
+        o MD5 (hash de imagem da Meta) é calculado durante o download. Se a
+        conexão cair, o download continua de onde parou via cabeçalho Range.
 
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
+        Args:
+            url: URL da imagem
+            save_path: Caminho onde salvar
+            max_resumes: Máximo de retomadas após queda de conexão
 
-            return save_path
+        Returns:
+            (caminho completo do arquivo salvo, MD5 do conteúdo)
+        """
+        try:
+            with self.metrics.span('download_image'), _atomic_file(save_path) as out:
+                digest = hashlib.md5()
+                written = 0
+                resumes = 0
+
+                while True:
+                    headers = {'Range': f"bytes={written}-"} if written else {}
+                    self.metrics.inc('requests', service='cdn')
+                    try:
+                        with self.session.get(url, stream=True, timeout=30, headers=headers) as response:
+                            response.raise_for_status()
+
+                            # Servidor ignorou o Range: recomeçar do zero
+                            if written and response.status_code != 206:
+                                out.seek(0)
+                                out.truncate()
+                                digest = hashlib.md5()
+                                written = 0
+
+                            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                                out.write(chunk)
+                                digest.update(chunk)
+                                written += len(chunk)
+                        break
+
+                    except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                        if resumes >= max_resumes:
+                            raise
+                        resumes += 1
+                        self.log.warning(
+                            f"⚠️  Conexão interrompida em {written} bytes, retomando ({resumes}/{max_resumes})...",
+                            extra={'bytes': written}
+                        )
+
+            self.metrics.inc('bytes_downloaded', written)
+            return save_path, digest.hexdigest()
 
         except Exception as e:
-            print(f"❌ Erro ao baixar imagem: {str(e)}")
+            self.log.error(f"❌ Erro ao baixar imagem: {str(e)}")
             raise
 
     def generate_multiple_variations(
@@ -136,7 +460,7 @@ class ImageGenerator:
 
         for i, variation in enumerate(variations, 1):
             full_prompt = f"{base_prompt}. {variation}"
-            print(f"\n🎨 Gerando variação {i}/{len(variations)}")
+            self.log.info(f"🎨 Gerando variação {i}/{len(variations)}")
 
             result = self.generate_image(prompt=full_prompt, **kwargs)
             results.append({
@@ -147,6 +471,163 @@ class ImageGenerator:
         return results
 
 
+class AsyncImageGenerator(ImageGenerator):
+    """
+    Versão assíncrona do gerador de imagens, baseada em AsyncOpenAI
+
+    As chamadas ao DALL-E rodam em paralelo, limitadas por um semáforo; o
+    cache e a gravação/download das imagens reaproveitam a implementação
+    síncrona em threads auxiliares.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 5,
+        **kwargs
+    ):
+        """
+        Inicializa o gerador assíncrono
+
+        Args:
+            api_key: Chave da API OpenAI (se None, usa variável de ambiente)
+            max_concurrency: Máximo de gerações simultâneas no DALL-E
+            **kwargs: Demais parâmetros de ImageGenerator
+        """
+        super().__init__(api_key=api_key, **kwargs)
+
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency precisa ser pelo menos 1")
+
+        self._async_client = None
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional['asyncio.Semaphore'] = None
+        self._semaphore_loop = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Cliente assíncrono da OpenAI, criado no primeiro acesso"""
+        if self._async_client is None:
+            with self._clients_lock:
+                if self._async_client is None:
+                    self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._async_client
+
+    @async_client.setter
+    def async_client(self, client: AsyncOpenAI) -> None:
+        self._async_client = client
+
+    def _get_semaphore(self) -> 'asyncio.Semaphore':
+        """Retorna o semáforo do event loop atual (criado no primeiro uso)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        size: Literal["1024x1024", "1792x1024", "1024x1792"] = "1024x1024",
+        quality: Literal["standard", "hd"] = "standard",
+        style: Literal["vivid", "natural"] = "vivid",
+        save_path: Optional[str] = None,
+        cache: Literal["read", "write", "bypass"] = "read",
+        response_format: Literal["url", "b64_json"] = "url"
+    ) -> dict:
+        """
+        Gera uma imagem usando DALL-E 3 sem bloquear o event loop
+
+        Mesmos parâmetros e retorno de generate_image.
+        """
+        cache_key = self._prepare_request(prompt, size, quality, style, cache)
+        if cache_key and cache == "read":
+            cached = await asyncio.to_thread(self._cached_result, cache_key, save_path)
+            if cached:
+                return cached
+
+        self.log.info("🎨 Gerando imagem com DALL-E 3...", extra={'size': size, 'quality': quality})
+        self.log.debug("📝 Prompt: %s", prompt)
+
+        try:
+            async with self._get_semaphore():
+                self.metrics.inc('requests', service='openai')
+                with self.metrics.span('generate_image', quality=quality):
+                    response = await self.async_client.images.generate(
+                        **self._request_params(prompt, size, quality, style, response_format)
+                    )
+
+            return await asyncio.to_thread(
+                self._handle_response,
+                response, size, quality, style, save_path, cache_key, response_format
+            )
+
+        except asyncio.CancelledError:
+            self.log.warning(f"⚠️  Geração cancelada: {prompt[:50]}...")
+            raise
+
+        except Exception as e:
+            self.log.error(f"❌ Erro ao gerar imagem: {str(e)}")
+            raise
+
+    async def agenerate_multiple_variations(
+        self,
+        base_prompt: str,
+        variations: list[str],
+        **kwargs
+    ) -> list[dict]:
+        """
+        Gera todas as variações ao mesmo tempo
+
+        Se uma variação falhar, as que ainda estão em andamento são canceladas
+        e o erro é propagado, como na versão síncrona. Cancelar a chamada
+        também cancela todas as gerações pendentes.
+
+        Args:
+            base_prompt: Prompt base
+            variations: Lista de modificações para criar variações
+            **kwargs: Parâmetros adicionais para agenerate_image
+
+        Returns:
+            Lista de resultados, na mesma ordem de `variations`
+        """
+        # asyncio.wait não aceita um conjunto vazio de tarefas
+        if not variations:
+            return []
+
+        self.log.info(f"🎨 Gerando {len(variations)} variações em paralelo "
+                      f"(até {self.max_concurrency} simultâneas)")
+
+        tasks = [
+            asyncio.ensure_future(
+                self.agenerate_image(prompt=f"{base_prompt}. {variation}", **kwargs)
+            )
+            for variation in variations
+        ]
+
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            # Em caso de erro ou cancelamento externo, não deixar gerações órfãs
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return [
+            {'variation': variation, **task.result()}
+            for variation, task in zip(variations, tasks)
+        ]
+
+    async def aclose(self) -> None:
+        """Fecha o cliente HTTP assíncrono (se chegou a ser criado)"""
+        if self._async_client is not None:
+            await self._async_client.close()
+
+
 # Exemplo de uso
 if __name__ == "__main__":
     from dotenv import load_dotenv
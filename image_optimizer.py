@@ -0,0 +1,150 @@
+"""
+Otimização de imagens com Pillow antes do upload para a Meta
+"""
+import io
+import os
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from PIL import Image
+
+
+# Limite de tamanho de arquivo de imagem aceito pela Meta
+META_MAX_IMAGE_BYTES = 30 * 1024 * 1024
+
+# Qualidade mínima aceita ao reduzir o arquivo para caber no limite
+MIN_JPEG_QUALITY = 60
+
+
+def optimize_image(
+    source_path: str,
+    output_path: Optional[str] = None,
+    quality: int = 85,
+    max_bytes: int = META_MAX_IMAGE_BYTES,
+    max_dimension: Optional[int] = None
+) -> dict:
+    """
+    Converte uma imagem em JPEG progressivo otimizado, sem metadados
+
+    Se o resultado passar de `max_bytes`, a qualidade é reduzida em passos
+    até MIN_JPEG_QUALITY e, se ainda for preciso, a imagem é redimensionada.
+
+    Args:
+        source_path: Imagem original (ex: PNG do DALL-E)
+        output_path: Caminho do JPEG (padrão: mesmo nome com extensão .jpg)
+        quality: Qualidade JPEG inicial (1-95)
+        max_bytes: Tamanho máximo do arquivo final
+        max_dimension: Maior lado permitido em pixels (opcional)
+
+    Returns:
+        dict com 'path', 'bytes', 'original_bytes', 'width', 'height',
+        'quality' e 'md5' do arquivo gerado
+    """
+    output_path = output_path or os.path.splitext(source_path)[0] + '.jpg'
+
+    with Image.open(source_path) as original:
+        image = _to_rgb(original)
+
+    if max_dimension and max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    result = save_optimized(image, output_path, quality, max_bytes)
+    result['original_bytes'] = os.path.getsize(source_path)
+    return result
+
+
+def save_optimized(
+    image: Image.Image,
+    output_path: str,
+    quality: int = 85,
+    max_bytes: int = META_MAX_IMAGE_BYTES
+) -> dict:
+    """
+    Grava uma imagem já carregada como JPEG progressivo dentro de `max_bytes`
+
+    Returns:
+        dict com 'path', 'bytes', 'width', 'height', 'quality' e 'md5'
+    """
+    if image.mode != 'RGB':
+        image = _to_rgb(image)
+
+    data = _encode_jpeg(image, quality)
+    while len(data) > max_bytes and quality > MIN_JPEG_QUALITY:
+        quality = max(MIN_JPEG_QUALITY, quality - 10)
+        data = _encode_jpeg(image, quality)
+
+    while len(data) > max_bytes:
+        width, height = image.size
+        image = image.resize((int(width * 0.85), int(height * 0.85)), Image.LANCZOS)
+        data = _encode_jpeg(image, quality)
+
+    _write_atomic(output_path, data)
+
+    return {
+        'path': output_path,
+        'bytes': len(data),
+        'width': image.size[0],
+        'height': image.size[1],
+        'quality': quality,
+        'md5': hashlib.md5(data).hexdigest()
+    }
+
+
+def optimize_images(
+    paths: list[str],
+    workers: Optional[int] = None,
+    **kwargs
+) -> list[dict]:
+    """
+    Otimiza várias imagens em paralelo usando um pool de processos
+
+    Args:
+        paths: Imagens de origem
+        workers: Processos no pool (padrão: número de CPUs)
+        **kwargs: Parâmetros de optimize_image (exceto output_path)
+
+    Returns:
+        Resultados de optimize_image, na mesma ordem de `paths`
+    """
+    if len(paths) <= 1 or workers == 1:
+        return [optimize_image(path, **kwargs) for path in paths]
+
+    # 'spawn': processos limpos, sem herdar por fork locks de threads do chamador
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(optimize_image, path, **kwargs) for path in paths]
+        return [future.result() for future in futures]
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Converte para RGB, aplicando transparência sobre fundo branco"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    """Codifica em JPEG progressivo; sem exif/icc, nenhum metadado é gravado"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Grava via arquivo temporário + rename"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.optimized-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
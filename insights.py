@@ -0,0 +1,535 @@
+"""
+Leitura de desempenho (insights) da Meta para um armazenamento colunar local
+
+Os relatórios são pedidos de forma assíncrona (AdReportRun), acompanhados
+com backoff até ficarem prontos e lidos página a página por um gerador, sem
+carregar o relatório inteiro na memória. As linhas são gravadas em blocos de
+colunas .npy, que depois carregam direto como arrays NumPy.
+
+Uso:
+    manager = MetaAdsManager()
+    store = InsightsStore()
+    ingest_insights(manager, store, 'ads_90d', since='2025-08-01', until='2025-10-29')
+    data = store.load('ads_90d', columns=['date_start', 'ad_id', 'spend', 'clicks'])
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Union
+import numpy as np
+from retry import retry_call
+from lazy_imports import lazy_import
+from local_store import DEFAULT_CACHE_DIR
+from structured_logging import get_logger
+
+AdReportRun = lazy_import('facebook_business.adobjects.adreportrun', 'AdReportRun')
+
+
+DEFAULT_INSIGHTS_DIR = os.path.join(DEFAULT_CACHE_DIR, 'insights')
+
+DEFAULT_INSIGHTS_FIELDS = (
+    'date_start', 'date_stop', 'campaign_id', 'campaign_name', 'adset_id', 'ad_id', 'ad_name',
+    'impressions', 'reach', 'clicks', 'inline_link_clicks', 'spend', 'ctr', 'cpc', 'cpm', 'frequency',
+    'actions'
+)
+
+# Tipos de ação contados como lead, em ordem de preferência: 'lead' já é o
+# total dos demais, então só o primeiro presente em cada linha é usado
+LEAD_ACTION_TYPES = ('lead', 'onsite_conversion.lead_grouped', 'offsite_conversion.fb_pixel_lead')
+
+# Linhas por página lida do relatório
+INSIGHTS_PAGE_SIZE = 500
+
+# Linhas por bloco gravado (limita a memória usada na ingestão)
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Espera entre consultas ao status do relatório: inicial, fator e teto (s)
+REPORT_POLL_INTERVAL = 1.0
+REPORT_POLL_BACKOFF = 1.5
+REPORT_POLL_MAX_INTERVAL = 30.0
+REPORT_TIMEOUT = 3600.0
+
+REPORT_FAILED_STATUSES = {'Job Failed', 'Job Skipped'}
+REPORT_COMPLETED_STATUS = 'Job Completed'
+
+# Tipo de cada métrica conhecida; as demais colunas são texto
+INT_FIELDS = {'impressions', 'reach', 'clicks', 'inline_link_clicks', 'unique_clicks',
+              'unique_inline_link_clicks', 'leads'}
+FLOAT_FIELDS = {'spend', 'ctr', 'cpc', 'cpm', 'cpp', 'frequency', 'unique_ctr',
+                'inline_link_click_ctr', 'cost_per_inline_link_click'}
+DATE_FIELDS = {'date_start', 'date_stop'}
+
+_log = get_logger('insights')
+
+
+def submit_report(
+    manager,
+    since: Union[date, str],
+    until: Union[date, str],
+    level: str = 'ad',
+    fields: Iterable[str] = DEFAULT_INSIGHTS_FIELDS,
+    breakdowns: Optional[list[str]] = None,
+    time_increment: Union[int, str] = 1
+) -> AdReportRun:
+    """
+    Pede um relatório assíncrono de insights da conta
+
+    Args:
+        manager: MetaAdsManager (usa a conta, a política de retentativas e as métricas dele)
+        since: Primeiro dia do período
+        until: Último dia do período (inclusivo)
+        level: Nível das linhas ('account', 'campaign', 'adset' ou 'ad')
+        fields: Campos de cada linha
+        breakdowns: Detalhamentos (ex: ['age', 'gender'], ['publisher_platform'])
+        time_increment: Dias por linha (1 = diário) ou 'monthly'/'all_days'
+
+    Returns:
+        AdReportRun ainda em processamento
+    """
+    params = {
+        'level': level,
+        'time_range': {'since': _date_str(since), 'until': _date_str(until)},
+        'time_increment': time_increment,
+    }
+    if breakdowns:
+        params['breakdowns'] = list(breakdowns)
+
+    report = retry_call(
+        manager.ad_account.get_insights,
+        policy=manager.retry_policy,
+        stage='insights',
+        fields=list(fields),
+        params=params,
+        is_async=True,
+        log=manager.log
+    )
+    manager.log.info(f"📈 Relatório de insights solicitado: {report.get_id()} ({params['time_range']['since']} a "
+                     f"{params['time_range']['until']}, nível {level})", extra={'report_run_id': report.get_id()})
+    return report
+
+
+def wait_for_report(
+    report: AdReportRun,
+    manager=None,
+    poll_interval: float = REPORT_POLL_INTERVAL,
+    max_poll_interval: float = REPORT_POLL_MAX_INTERVAL,
+    timeout: float = REPORT_TIMEOUT
+) -> AdReportRun:
+    """
+    Consulta o status do relatório, com espera crescente, até ele terminar
+
+    Args:
+        report: Relatório retornado por submit_report
+        manager: MetaAdsManager, para usar a mesma política de retentativas
+        poll_interval: Espera (s) antes da segunda consulta
+        max_poll_interval: Espera máxima (s) entre consultas
+        timeout: Tempo máximo (s) de espera
+
+    Returns:
+        O próprio relatório, concluído
+
+    Raises:
+        RuntimeError: A Meta informou falha no relatório
+        TimeoutError: O relatório não terminou dentro de `timeout`
+    """
+    policy = manager.retry_policy if manager else None
+    log = manager.log if manager else _log
+    deadline = time.monotonic() + timeout
+    delay = poll_interval
+
+    while True:
+        retry_call(
+            report.api_get,
+            policy=policy,
+            stage='insights_poll',
+            log=log,
+            fields=[AdReportRun.Field.async_status, AdReportRun.Field.async_percent_completion]
+        )
+        status = report.get(AdReportRun.Field.async_status)
+        if status == REPORT_COMPLETED_STATUS:
+            return report
+        if status in REPORT_FAILED_STATUSES:
+            raise RuntimeError(f"Relatório de insights {report.get_id()} falhou: {status}")
+
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Relatório de insights {report.get_id()} não terminou em {timeout:.0f}s")
+
+        log.debug("⏳ Relatório %s: %s (%s%%), nova consulta em %.1fs", report.get_id(), status,
+                  report.get(AdReportRun.Field.async_percent_completion), delay)
+        time.sleep(delay)
+        delay = min(delay * REPORT_POLL_BACKOFF, max_poll_interval)
+
+
+def iter_report_rows(
+    report: AdReportRun,
+    page_size: int = INSIGHTS_PAGE_SIZE,
+    manager=None
+) -> Iterator[dict]:
+    """
+    Gera as linhas de um relatório concluído, uma página por requisição
+
+    Só a página atual fica em memória, então relatórios de qualquer tamanho
+    podem ser consumidos em streaming. As páginas são lidas como JSON cru
+    (api.call), sem montar um AdsInsights por linha, o que domina o tempo
+    de relatórios grandes; os valores chegam como texto, como na API.
+
+    Args:
+        report: Relatório concluído
+        page_size: Linhas por página
+        manager: MetaAdsManager, para usar a mesma política de retentativas
+    """
+    api = report.get_api_assured()
+    policy = manager.retry_policy if manager else None
+    log = manager.log if manager else _log
+    params = {'limit': page_size}
+
+    while True:
+        response = retry_call(
+            api.call, 'GET', (report.get_id(), 'insights'),
+            params=dict(params), policy=policy, stage='insights_page', log=log
+        ).json()
+        yield from response.get('data', [])
+
+        paging = response.get('paging', {})
+        after = paging.get('cursors', {}).get('after')
+        if 'next' not in paging or not after:
+            return
+        params['after'] = after
+
+
+def ingest_insights(
+    manager,
+    store: 'InsightsStore',
+    dataset: str,
+    since: Union[date, str],
+    until: Union[date, str],
+    level: str = 'ad',
+    fields: Iterable[str] = DEFAULT_INSIGHTS_FIELDS,
+    breakdowns: Optional[list[str]] = None,
+    time_increment: Union[int, str] = 1,
+    page_size: int = INSIGHTS_PAGE_SIZE,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    poll_interval: float = REPORT_POLL_INTERVAL
+) -> int:
+    """
+    Pede, espera e grava um relatório de insights no armazenamento colunar
+
+    Args:
+        manager: MetaAdsManager da conta
+        store: Armazenamento de destino
+        dataset: Nome do conjunto de dados no armazenamento (linhas já
+                 gravadas com date_start no período são substituídas, então
+                 reingerir um período não duplica linhas)
+        since, until, level, fields, breakdowns, time_increment: Ver submit_report
+        page_size: Linhas por página lida
+        chunk_rows: Linhas por bloco gravado
+        poll_interval: Espera inicial entre consultas de status
+
+    Returns:
+        Número de linhas gravadas
+    """
+    with manager.metrics.span('insights_report', level=level):
+        report = submit_report(manager, since, until, level, fields, breakdowns, time_increment)
+        wait_for_report(report, manager, poll_interval=poll_interval)
+
+    with manager.metrics.span('insights_ingest', level=level):
+        rows = store.replace_range(
+            dataset, map(_with_leads, iter_report_rows(report, page_size, manager)),
+            since, until, chunk_rows=chunk_rows
+        )
+
+    manager.metrics.inc('insights_rows', rows, level=level)
+    manager.log.info(f"✅ {rows} linhas de insights gravadas em '{dataset}'", extra={'rows': rows})
+    return rows
+
+
+class InsightsStore:
+    """
+    Armazenamento colunar em disco: cada conjunto de dados é uma sequência de
+    blocos, e cada bloco tem um arquivo .npy por coluna
+
+    Métricas viram int64/float64, datas viram datetime64[D] e textos (IDs,
+    nomes, detalhamentos) são codificados por dicionário (códigos int32 +
+    valores distintos), como em formatos tipo Parquet. O intervalo de
+    date_start de cada bloco fica no meta.json, então filtros por data pulam
+    blocos inteiros sem abri-los.
+
+    Layout:
+        <directory>/<dataset>/part-000000/meta.json
+        <directory>/<dataset>/part-000000/spend.npy
+        <directory>/<dataset>/part-000000/ad_id.codes.npy
+        <directory>/<dataset>/part-000000/ad_id.values.npy
+    """
+
+    def __init__(self, directory: str = DEFAULT_INSIGHTS_DIR):
+        """
+        Args:
+            directory: Pasta raiz dos conjuntos de dados
+        """
+        self.directory = directory
+
+    def datasets(self) -> list[str]:
+        """Nomes dos conjuntos de dados existentes"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def delete(self, dataset: str) -> None:
+        """Remove um conjunto de dados inteiro"""
+        shutil.rmtree(self._dataset_dir(dataset), ignore_errors=True)
+
+    def write(self, dataset: str, rows: Iterable[dict], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+        """
+        Grava linhas em blocos de até `chunk_rows`, consumindo o iterável aos poucos
+
+        Returns:
+            Número de linhas gravadas
+        """
+        columns: dict[str, list] = {}
+        buffered = 0
+        total = 0
+
+        for row in rows:
+            for name in row.keys() - columns.keys():
+                # Coluna nova: as linhas anteriores do bloco ficam sem valor
+                columns[name] = [None] * buffered
+            for name, values in columns.items():
+                values.append(row.get(name))
+            buffered += 1
+
+            if buffered >= chunk_rows:
+                self._write_chunk(dataset, columns, buffered)
+                total += buffered
+                columns, buffered = {}, 0
+
+        if buffered:
+            self._write_chunk(dataset, columns, buffered)
+            total += buffered
+        return total
+
+    def replace_range(
+        self,
+        dataset: str,
+        rows: Iterable[dict],
+        date_from: Union[date, str],
+        date_to: Union[date, str],
+        chunk_rows: int = DEFAULT_CHUNK_ROWS
+    ) -> int:
+        """
+        Grava linhas substituindo as já existentes com date_start no período
+
+        Os blocos novos são publicados primeiro; depois os blocos antigos que
+        cobrem o período são removidos, ou regravados só com as linhas de
+        fora dele quando o cobrem em parte. Se a gravação falhar, os dados
+        antigos ficam intactos.
+
+        Args:
+            dataset: Nome do conjunto de dados
+            rows: Linhas novas
+            date_from: Primeiro dia substituído
+            date_to: Último dia substituído (inclusivo)
+            chunk_rows: Linhas por bloco gravado
+
+        Returns:
+            Número de linhas novas gravadas
+        """
+        low = np.datetime64(_date_str(date_from), 'D')
+        high = np.datetime64(_date_str(date_to), 'D')
+
+        # Blocos existentes antes da gravação, para não tocar nos novos
+        overlapping = [
+            (part_dir, meta) for part_dir, meta in self._chunks(dataset)
+            if meta.get('date_start')
+            and np.datetime64(meta['date_start'][0], 'D') <= high
+            and np.datetime64(meta['date_start'][1], 'D') >= low
+        ]
+
+        total = self.write(dataset, rows, chunk_rows=chunk_rows)
+
+        for part_dir, meta in overlapping:
+            first, last = (np.datetime64(day, 'D') for day in meta['date_start'])
+            if first < low or last > high:
+                dates = _read_column(part_dir, 'date_start', meta)
+                keep = np.isnat(dates) | (dates < low) | (dates > high)
+                columns = {}
+                for name, kind in meta['columns'].items():
+                    values = _read_column(part_dir, name, meta)[keep]
+                    columns[name] = values.astype(str).tolist() if kind == 'date' else values.tolist()
+                self._write_chunk(dataset, columns, int(keep.sum()))
+            shutil.rmtree(part_dir, ignore_errors=True)
+
+        return total
+
+    def load(
+        self,
+        dataset: str,
+        columns: Optional[list[str]] = None,
+        date_from: Optional[Union[date, str]] = None,
+        date_to: Optional[Union[date, str]] = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Carrega colunas de um conjunto de dados como arrays NumPy
+
+        Args:
+            dataset: Nome do conjunto de dados
+            columns: Colunas desejadas (padrão: todas)
+            date_from: Primeiro date_start incluído
+            date_to: Último date_start incluído
+
+        Returns:
+            Dicionário coluna → array, todos com o mesmo comprimento
+        """
+        low = np.datetime64(_date_str(date_from), 'D') if date_from else None
+        high = np.datetime64(_date_str(date_to), 'D') if date_to else None
+
+        parts = []
+        for part_dir, meta in self._chunks(dataset):
+            span = meta.get('date_start')
+            if span and ((low is not None and np.datetime64(span[1], 'D') < low)
+                         or (high is not None and np.datetime64(span[0], 'D') > high)):
+                continue
+            parts.append((part_dir, meta))
+
+        if columns is None:
+            columns = list(dict.fromkeys(name for _, meta in parts for name in meta['columns']))
+        needed = list(dict.fromkeys(columns + (['date_start'] if low is not None or high is not None else [])))
+
+        loaded: dict[str, list[np.ndarray]] = {name: [] for name in needed}
+        for part_dir, meta in parts:
+            for name in needed:
+                loaded[name].append(_read_column(part_dir, name, meta))
+
+        data = {name: _concat(arrays) for name, arrays in loaded.items()}
+
+        if (low is not None or high is not None) and len(data['date_start']):
+            mask = np.ones(len(data['date_start']), dtype=bool)
+            if low is not None:
+                mask &= data['date_start'] >= low
+            if high is not None:
+                mask &= data['date_start'] <= high
+            data = {name: values[mask] for name, values in data.items()}
+
+        return {name: data[name] for name in columns}
+
+    def row_count(self, dataset: str) -> int:
+        """Total de linhas do conjunto de dados, sem ler as colunas"""
+        return sum(meta['rows'] for _, meta in self._chunks(dataset))
+
+    def _dataset_dir(self, dataset: str) -> str:
+        return os.path.join(self.directory, dataset)
+
+    def _chunks(self, dataset: str) -> Iterator[tuple[str, dict]]:
+        directory = self._dataset_dir(dataset)
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            meta_path = os.path.join(directory, name, 'meta.json')
+            if name.startswith('part-') and os.path.exists(meta_path):
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    yield os.path.join(directory, name), json.load(f)
+
+    def _write_chunk(self, dataset: str, columns: dict[str, list], rows: int) -> None:
+        """Grava um bloco em pasta temporária e o publica com um rename atômico"""
+        directory = self._dataset_dir(dataset)
+        os.makedirs(directory, exist_ok=True)
+
+        meta = {'rows': rows, 'columns': {}}
+        tmp_dir = tempfile.mkdtemp(dir=directory, prefix='.part-')
+        try:
+            for name, values in columns.items():
+                kind = _encode_column(tmp_dir, name, values)
+                meta['columns'][name] = kind
+                if name == 'date_start' and kind == 'date':
+                    dates = np.load(os.path.join(tmp_dir, f"{name}.npy"))
+                    valid = dates[~np.isnat(dates)]
+                    if len(valid):
+                        meta['date_start'] = [str(valid.min()), str(valid.max())]
+
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+            # Próximo número livre; o rename falha se outro processo pegou o mesmo
+            existing = [name for name in os.listdir(directory) if name.startswith('part-')]
+            sequence = max((int(name[5:]) for name in existing), default=-1) + 1
+            os.rename(tmp_dir, os.path.join(directory, f"part-{sequence:06d}"))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+
+def _with_leads(row: dict) -> dict:
+    """Acrescenta a coluna 'leads' às linhas com 'actions' (lista de tipo → valor)"""
+    actions = row.get('actions')
+    if not isinstance(actions, list):
+        return row
+
+    counts = {action.get('action_type'): action.get('value') for action in actions}
+    leads = next((counts[kind] for kind in LEAD_ACTION_TYPES if kind in counts), 0)
+    return {**row, 'leads': leads}
+
+
+def _encode_column(directory: str, name: str, values: list) -> str:
+    """Grava uma coluna no formato do seu tipo e retorna o tipo usado"""
+    if name in INT_FIELDS:
+        array = np.array([int(v) if v not in (None, '') else 0 for v in values], dtype=np.int64)
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+        return 'int'
+
+    if name in FLOAT_FIELDS:
+        array = np.array([float(v) if v not in (None, '') else np.nan for v in values], dtype=np.float64)
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+        return 'float'
+
+    if name in DATE_FIELDS:
+        array = np.array([v or 'NaT' for v in values], dtype='datetime64[D]')
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+        return 'date'
+
+    # Texto: listas/dicionários (ex: actions) viram JSON
+    strings = [
+        '' if v is None else v if isinstance(v, str) else json.dumps(v, ensure_ascii=False, sort_keys=True)
+        for v in values
+    ]
+    distinct, codes = np.unique(np.array(strings, dtype=str), return_inverse=True)
+    np.save(os.path.join(directory, f"{name}.values.npy"), distinct)
+    np.save(os.path.join(directory, f"{name}.codes.npy"), codes.astype(np.int32))
+    return 'dict'
+
+
+def _read_column(part_dir: str, name: str, meta: dict) -> np.ndarray:
+    """Lê uma coluna de um bloco (coluna ausente vem preenchida com o valor vazio do tipo)"""
+    kind = meta['columns'].get(name)
+    rows = meta['rows']
+
+    if kind == 'dict':
+        values = np.load(os.path.join(part_dir, f"{name}.values.npy"))
+        codes = np.load(os.path.join(part_dir, f"{name}.codes.npy"), mmap_mode='r')
+        return values[codes]
+    if kind is not None:
+        return np.load(os.path.join(part_dir, f"{name}.npy"), mmap_mode='r')
+
+    if name in INT_FIELDS:
+        return np.zeros(rows, dtype=np.int64)
+    if name in FLOAT_FIELDS:
+        return np.full(rows, np.nan)
+    if name in DATE_FIELDS:
+        return np.full(rows, np.datetime64('NaT'), dtype='datetime64[D]')
+    return np.full(rows, '', dtype=str)
+
+
+def _concat(arrays: list[np.ndarray]) -> np.ndarray:
+    if not arrays:
+        return np.array([])
+    return np.concatenate(arrays) if len(arrays) > 1 else np.array(arrays[0])
+
+
+def _date_str(value: Union[date, datetime, str]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat() if isinstance(value, date) else value
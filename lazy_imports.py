@@ -0,0 +1,66 @@
+"""
+Importação sob demanda das dependências pesadas (SDK da Meta, OpenAI, requests)
+
+Só importar facebook_business ou openai já custa de centenas de milissegundos
+a mais de um segundo. Os módulos da automação referenciam essas dependências
+por meio de lazy_import, e a importação de verdade acontece no primeiro uso
+(ex: ao ler Campaign.Field.name ou chamar AdImage(...)), de modo que
+comandos curtos só pagam pelo que usam.
+"""
+import importlib
+from typing import Any, Optional
+
+
+class LazyImport:
+    """
+    Módulo, ou atributo de módulo, importado no primeiro acesso
+
+    Repassa atributos e chamadas ao objeto real, então pode substituir um
+    `from modulo import Classe` nos usos comuns (Classe.Field.x, Classe(...)).
+    Não serve para isinstance() nem como classe base.
+    """
+
+    __slots__ = ('_module', '_attribute', '_target')
+
+    def __init__(self, module: str, attribute: Optional[str] = None):
+        """
+        Args:
+            module: Nome completo do módulo (ex: 'facebook_business.adobjects.ad')
+            attribute: Atributo do módulo (ex: 'Ad'); None para o próprio módulo
+        """
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+
+    def resolve(self) -> Any:
+        """Importa (uma vez) e retorna o objeto real"""
+        if self._target is None:
+            # import_module já é thread-safe; no pior caso duas threads
+            # atribuem o mesmo objeto
+            target = importlib.import_module(self._module)
+            if self._attribute:
+                target = getattr(target, self._attribute)
+            self._target = target
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module}.{self._attribute}" if self._attribute else self._module
+        state = 'importado' if self._target is not None else 'pendente'
+        return f"<LazyImport {name} ({state})>"
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> LazyImport:
+    """
+    Referência preguiçosa a um módulo ou a um atributo dele
+
+    Exemplo:
+        Campaign = lazy_import('facebook_business.adobjects.campaign', 'Campaign')
+        Campaign.Field.name  # importa o SDK aqui, não na importação do módulo
+    """
+    return LazyImport(module, attribute)
@@ -0,0 +1,134 @@
+"""
+Índice local persistente (chave → documento JSON) em SQLite, usado pelos
+caches do projeto
+"""
+import os
+import json
+import atexit
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Iterator, Optional
+
+
+DEFAULT_CACHE_DIR = os.getenv('ADS_CACHE_DIR', './cache')
+
+# Segundos que uma escrita espera por outro processo com o banco travado
+SQLITE_BUSY_TIMEOUT = 30.0
+
+
+class SqliteIndex:
+    """
+    Dicionário persistido em uma tabela SQLite (modo WAL)
+
+    Cada chave é uma linha: gravar uma entrada custa uma escrita de uma linha,
+    não a reescrita do índice inteiro, e processos diferentes gravando no
+    mesmo arquivo não perdem as entradas uns dos outros. O acesso é
+    protegido por lock para uso a partir de várias threads.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Arquivo do banco (criado se não existir)
+        """
+        self.path = path
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Fecha o banco"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna o valor associado à chave"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any) -> None:
+        """Grava um valor"""
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)", (key, payload))
+
+    def update(self, values: dict) -> None:
+        """Grava vários valores em uma única transação"""
+        if not values:
+            return
+        rows = [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)", rows)
+
+    def delete(self, *keys: str) -> None:
+        """Remove chaves (ignorando as inexistentes)"""
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def items(self, prefix: Optional[str] = None) -> Iterator[tuple[str, Any]]:
+        """Itera sobre uma cópia dos pares (chave, valor), opcionalmente filtrando por prefixo"""
+        with self._lock:
+            if prefix is None:
+                rows = self._conn.execute("SELECT key, value FROM entries").fetchall()
+            else:
+                # Faixa [prefixo, prefixo + maior caractere): usa o índice da chave
+                rows = self._conn.execute(
+                    "SELECT key, value FROM entries WHERE key >= ? AND key < ?",
+                    (prefix, prefix + chr(0x10FFFF))
+                ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+
+def canonical_hash(value: Any, sort_lists: bool = False) -> str:
+    """
+    Hash estável de uma estrutura JSON (ordem das chaves não importa)
+
+    Args:
+        value: Estrutura serializável em JSON
+        sort_lists: Tratar listas como conjuntos (ordem dos itens não importa),
+                    útil para segmentação, onde ['BR', 'PT'] == ['PT', 'BR']
+
+    Returns:
+        SHA-256 em hexadecimal
+    """
+    if sort_lists:
+        value = _sorted_lists(value)
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _sorted_lists(value: Any) -> Any:
+    """Ordena recursivamente todas as listas da estrutura"""
+    if isinstance(value, dict):
+        return {key: _sorted_lists(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_sorted_lists(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    return value
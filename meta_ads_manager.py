@@ -2,14 +2,86 @@
 Módulo de gerenciamento de anúncios na Meta (Facebook, Instagram, WhatsApp)
 """
 import os
-from typing import Optional, Literal
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.adset import AdSet
-from facebook_business.adobjects.ad import Ad
-from facebook_business.adobjects.adcreative import AdCreative
-from facebook_business.adobjects.adimage import AdImage
+import json
+import time
+import sqlite3
+import zipfile
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, Optional, Literal, Union
+from urllib.parse import urlencode
+from lazy_imports import lazy_import
+from upload_cache import UploadCache, file_md5
+from rate_limiter import MetaRateLimiter, get_shared_rate_limiter
+from retry import RetryPolicy, retry_call
+from ad_journal import AdJournal
+from account_mirror import AccountMirror, MIRROR_EDGES
+from local_store import SqliteIndex, DEFAULT_CACHE_DIR, canonical_hash
+from metrics import MetricsRegistry, get_metrics, instrument_graph_api
+from structured_logging import get_logger, flush_logs
+
+# SDK da Meta importado no primeiro uso (ver lazy_imports.py)
+FacebookAdsApi = lazy_import('facebook_business.api', 'FacebookAdsApi')
+AdAccount = lazy_import('facebook_business.adobjects.adaccount', 'AdAccount')
+Campaign = lazy_import('facebook_business.adobjects.campaign', 'Campaign')
+AdSet = lazy_import('facebook_business.adobjects.adset', 'AdSet')
+Ad = lazy_import('facebook_business.adobjects.ad', 'Ad')
+AdCreative = lazy_import('facebook_business.adobjects.adcreative', 'AdCreative')
+AdImage = lazy_import('facebook_business.adobjects.adimage', 'AdImage')
+
+
+# Limite de operações por requisição /batch da Graph API
+BATCH_MAX_OPERATIONS = 50
+
+# Objetos criados por anúncio completo, na ordem em que entram no batch
+BATCH_STAGES = ('campaign', 'ad_set', 'creative', 'ad')
+
+# Hashes consultados por requisição ao revalidar o cache de uploads
+IMAGE_HASH_LOOKUP_SIZE = 100
+
+# Folga (s) para diferença de relógio ao procurar, antes de repetir uma
+# criação, um objeto criado pela tentativa anterior
+CREATE_LOOKUP_SKEW = 60
+
+# Depois deste prazo um criativo do índice de deduplicação precisa ser
+# confirmado na conta antes de ser reutilizado
+DEFAULT_CREATIVE_TTL = 7 * 24 * 3600
+
+# Objetos por página nas listagens (iter_campaigns, iter_ads...)
+LIST_PAGE_SIZE = 500
+
+# Campos lidos por padrão em cada listagem (projeção explícita, sem os padrões do SDK)
+DEFAULT_LIST_FIELDS = {
+    'campaigns': ('id', 'name', 'objective', 'status', 'effective_status', 'daily_budget', 'updated_time'),
+    'adsets': ('id', 'name', 'campaign_id', 'status', 'effective_status', 'daily_budget', 'updated_time'),
+    'ads': ('id', 'name', 'campaign_id', 'adset_id', 'creative', 'status', 'effective_status', 'updated_time'),
+    'adcreatives': ('id', 'name', 'status', 'image_hash', 'object_story_spec'),
+    'adimages': ('hash', 'name', 'url', 'width', 'height', 'status', 'created_time', 'updated_time'),
+}
+
+# Tamanho máximo de cada arquivo zip enviado por upload_images
+UPLOAD_ZIP_MAX_BYTES = 25 * 1024 * 1024
+
+# Posicionamentos cobertos por cada rótulo de imagem (ver placements.py), em
+# ordem de prioridade: a última regra vale para os posicionamentos restantes
+PLACEMENT_CUSTOMIZATION = {
+    'vertical': {
+        'publisher_platforms': ['facebook', 'instagram', 'messenger'],
+        'facebook_positions': ['story', 'facebook_reels'],
+        'instagram_positions': ['story', 'reels'],
+        'messenger_positions': ['story'],
+    },
+    'portrait': {
+        'publisher_platforms': ['facebook', 'instagram'],
+        'facebook_positions': ['feed'],
+        'instagram_positions': ['stream', 'explore'],
+    },
+    'square': {
+        'publisher_platforms': ['facebook', 'instagram', 'audience_network', 'messenger'],
+    },
+}
 
 
 class MetaAdsManager:
@@ -20,7 +92,21 @@ class MetaAdsManager:
         app_id: Optional[str] = None,
         app_secret: Optional[str] = None,
         access_token: Optional[str] = None,
-        ad_account_id: Optional[str] = None
+        ad_account_id: Optional[str] = None,
+        upload_cache: Optional[UploadCache] = None,
+        use_upload_cache: bool = True,
+        rate_limiter: Optional[MetaRateLimiter] = None,
+        throttle: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        ad_group_index: Optional[SqliteIndex] = None,
+        creative_index: Optional[SqliteIndex] = None,
+        dedupe_creatives: bool = True,
+        creative_ttl: int = DEFAULT_CREATIVE_TTL,
+        graph_url: Optional[str] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        quiet: bool = False,
+        mirror: Optional[AccountMirror] = None,
+        use_mirror: bool = True
     ):
         """
         Inicializa o gerenciador de anúncios Meta
@@ -30,11 +116,30 @@ class MetaAdsManager:
             app_secret: Secret do aplicativo
             access_token: Token de acesso do usuário
             ad_account_id: ID da conta de anúncios (formato: act_xxxxx)
+            upload_cache: Índice de imagens já enviadas (padrão: ./cache)
+            use_upload_cache: Consultar o índice antes de cada upload
+            rate_limiter: Limitador de taxa (padrão: compartilhado no processo)
+            throttle: Desacelerar as chamadas conforme o uso informado pela Meta
+            retry_policy: Retentativas de cada etapa de create_complete_ad
+            ad_group_index: Índice de campanhas/conjuntos compartilhados
+                            (padrão: ./cache/ad_groups.sqlite3)
+            creative_index: Índice de criativos já criados (padrão: ./cache/creatives.sqlite3)
+            dedupe_creatives: Reutilizar criativos com object_story_spec idêntico
+            creative_ttl: Segundos até um criativo do índice precisar ser
+                          confirmado na conta antes de ser reutilizado
+            graph_url: URL base da Graph API (padrão: META_GRAPH_URL ou a oficial),
+                       útil para apontar para um servidor local de testes
+            metrics: Registro de métricas (padrão: o do processo, ver metrics.py)
+            quiet: Registrar só avisos e erros (ver structured_logging.py)
+            mirror: Espelho local da conta (padrão: ./cache/account_mirror.sqlite3)
+            use_mirror: Registrar os objetos criados no espelho e permitir
+                        buscas por nome sem chamadas à API
         """
         self.app_id = app_id or os.getenv('META_APP_ID')
         self.app_secret = app_secret or os.getenv('META_APP_SECRET')
         self.access_token = access_token or os.getenv('META_ACCESS_TOKEN')
         self.ad_account_id = ad_account_id or os.getenv('META_AD_ACCOUNT_ID')
+        self.log = get_logger('meta_ads', quiet=quiet, account=self.ad_account_id)
 
         # Validar credenciais
         if not all([self.app_id, self.app_secret, self.access_token, self.ad_account_id]):
@@ -43,46 +148,504 @@ class MetaAdsManager:
                 "META_ACCESS_TOKEN e META_AD_ACCOUNT_ID no .env"
             )
 
-        # Inicializar API
-        FacebookAdsApi.init(
-            app_id=self.app_id,
-            app_secret=self.app_secret,
-            access_token=self.access_token
-        )
+        # A API só é inicializada no primeiro uso de self.api (ver _connect)
+        self.graph_url = graph_url or os.getenv('META_GRAPH_URL')
+        self.rate_limiter = (rate_limiter or get_shared_rate_limiter()) if throttle else None
+        self.metrics = metrics or get_metrics()
+        self._api = None
+        self._ad_account = None
+        self._api_lock = threading.Lock()
+
+        # Índices e caches locais só são abertos no primeiro uso (ver _lazy_store)
+        self._upload_cache = upload_cache
+        self._use_upload_cache = use_upload_cache
+        self._ad_group_index = ad_group_index
+        self._creative_index = creative_index
+        self._dedupe_creatives = dedupe_creatives
+        self._mirror = mirror
+        self._use_mirror = use_mirror
+        self._stores_lock = threading.Lock()
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._ad_group_locks: dict[str, threading.Lock] = {}
+        self.creative_ttl = creative_ttl
+        self._ad_group_locks_guard = threading.Lock()
+        self.log.info(f"✅ Meta Ads API inicializada para conta: {self.ad_account_id}")
+
+    @property
+    def api(self) -> FacebookAdsApi:
+        """Cliente da Graph API, criado no primeiro acesso"""
+        if self._api is None:
+            self._connect()
+        return self._api
+
+    @property
+    def ad_account(self) -> AdAccount:
+        """Conta de anúncios no SDK, criada junto com o cliente"""
+        if self._ad_account is None:
+            self._connect()
+        return self._ad_account
+
+    def _lazy_store(self, attr: str, enabled: bool, factory):
+        """Abre um índice/cache local no primeiro acesso (None se desativado)"""
+        value = getattr(self, attr)
+        if value is None and enabled:
+            with self._stores_lock:
+                value = getattr(self, attr)
+                if value is None:
+                    value = factory()
+                    setattr(self, attr, value)
+        return value
+
+    @property
+    def upload_cache(self) -> Optional[UploadCache]:
+        """Cache de uploads (padrão: ./cache/uploaded_images.sqlite3), aberto no primeiro acesso"""
+        return self._lazy_store('_upload_cache', self._use_upload_cache, UploadCache)
+
+    @upload_cache.setter
+    def upload_cache(self, cache: Optional[UploadCache]) -> None:
+        self._upload_cache = cache
+        self._use_upload_cache = cache is not None
+
+    @property
+    def ad_group_index(self) -> SqliteIndex:
+        """Índice de campanhas/conjuntos compartilhados, aberto no primeiro acesso"""
+        return self._lazy_store('_ad_group_index', True, lambda: SqliteIndex(
+            os.path.join(DEFAULT_CACHE_DIR, 'ad_groups.sqlite3')
+        ))
+
+    @ad_group_index.setter
+    def ad_group_index(self, index: SqliteIndex) -> None:
+        self._ad_group_index = index
+
+    @property
+    def creative_index(self) -> Optional[SqliteIndex]:
+        """Índice de criativos já criados, aberto no primeiro acesso (None sem deduplicação)"""
+        return self._lazy_store('_creative_index', self._dedupe_creatives, lambda: SqliteIndex(
+            os.path.join(DEFAULT_CACHE_DIR, 'creatives.sqlite3')
+        ))
+
+    @creative_index.setter
+    def creative_index(self, index: Optional[SqliteIndex]) -> None:
+        self._creative_index = index
+        self._dedupe_creatives = index is not None
+
+    @property
+    def mirror(self) -> Optional[AccountMirror]:
+        """Espelho local da conta, aberto no primeiro acesso (None se desativado)"""
+        return self._lazy_store('_mirror', self._use_mirror, lambda: AccountMirror(self.ad_account_id))
+
+    @mirror.setter
+    def mirror(self, mirror: Optional[AccountMirror]) -> None:
+        self._mirror = mirror
+        self._use_mirror = mirror is not None
+
+    def _connect(self) -> None:
+        """
+        Inicializa o SDK da Meta, o limitador de taxa e a instrumentação
+
+        Adiado até a primeira chamada à API: comandos que só consultam o
+        espelho ou os caches locais nem importam o SDK.
+        """
+        with self._api_lock:
+            if self._api is not None:
+                return
+
+            api = FacebookAdsApi.init(
+                app_id=self.app_id,
+                app_secret=self.app_secret,
+                access_token=self.access_token
+            )
+            if self.graph_url:
+                api._session.GRAPH = self.graph_url.rstrip('/')
+
+            # Instrumentação por dentro do limitador: graph_request mede só a
+            # requisição, sem a espera por limite de uso
+            instrument_graph_api(api, self.metrics)
+            if self.rate_limiter:
+                self.rate_limiter.install(api, default_account_id=self.ad_account_id, log=self.log)
 
-        self.ad_account = AdAccount(self.ad_account_id)
-        print(f"✅ Meta Ads API inicializada para conta: {self.ad_account_id}")
+            self._ad_account = AdAccount(self.ad_account_id, api=api)
+            self._api = api
 
-    def upload_image(self, image_path: str, image_name: Optional[str] = None) -> str:
+    def upload_image(
+        self,
+        image_path: str,
+        image_name: Optional[str] = None,
+        image_md5: Optional[str] = None
+    ) -> str:
         """
         Faz upload de uma imagem para a biblioteca de anúncios
 
+        Se os mesmos bytes já foram enviados para esta conta, o hash é
+        retornado do cache local sem novo upload.
+
         Args:
             image_path: Caminho local da imagem
             image_name: Nome da imagem (opcional)
+            image_md5: MD5 do arquivo, se já conhecido (evita reler o arquivo)
 
         Returns:
             Hash da imagem para usar em criativos
         """
-        print(f"📤 Fazendo upload da imagem: {image_path}")
+        md5 = None
+        if self.upload_cache:
+            md5 = image_md5 or file_md5(image_path)
+            cached_hash = self._cached_image_hash(md5)
+            self.metrics.inc('upload_cache', result='hit' if cached_hash else 'miss')
+            if cached_hash:
+                self.log.info(f"♻️  Imagem já enviada anteriormente: {image_path} (hash: {cached_hash})")
+                return cached_hash
+
+        self.log.info(f"📤 Fazendo upload da imagem: {image_path}")
 
         try:
-            image = AdImage(parent_id=self.ad_account_id)
+            image = AdImage(parent_id=self.ad_account_id, api=self.api)
             image[AdImage.Field.filename] = image_path
 
             if image_name:
                 image[AdImage.Field.name] = image_name
 
-            image.remote_create()
+            with self.metrics.span('upload_image'):
+                image.remote_create()
             image_hash = image[AdImage.Field.hash]
+            self.metrics.inc('bytes_uploaded', os.path.getsize(image_path))
+
+            if self.upload_cache:
+                self.upload_cache.record(self.ad_account_id, md5, image_hash)
 
-            print(f"✅ Upload concluído! Hash: {image_hash}")
+            self.log.info(f"✅ Upload concluído! Hash: {image_hash}", extra={'image_hash': image_hash})
             return image_hash
 
         except Exception as e:
-            print(f"❌ Erro no upload da imagem: {str(e)}")
+            self.log.error(f"❌ Erro no upload da imagem: {str(e)}")
             raise
 
+    def _cached_image_hash(self, md5: str) -> Optional[str]:
+        """Consulta o cache de uploads, revalidando entradas vencidas na conta"""
+        image_hash, stale = self.upload_cache.lookup(self.ad_account_id, md5)
+        if not image_hash or not stale:
+            return image_hash
+
+        # Entrada vencida: aproveitar a consulta para revalidar todas de uma vez
+        self.revalidate_uploaded_images()
+        image_hash, stale = self.upload_cache.lookup(self.ad_account_id, md5)
+        return image_hash if not stale else None
+
+    def revalidate_uploaded_images(self) -> dict:
+        """
+        Confirma na conta, em lote, as entradas vencidas do cache de uploads
+
+        Usa adimages?hashes=[...], que retorna só as imagens ainda existentes.
+        Entradas cujas imagens sumiram ou foram excluídas são descartadas.
+
+        Returns:
+            Dicionário com a quantidade de entradas 'valid' e 'removed'
+        """
+        if not self.upload_cache:
+            return {'valid': 0, 'removed': 0}
+
+        stale = self.upload_cache.stale_entries(self.ad_account_id)
+        if not stale:
+            return {'valid': 0, 'removed': 0}
+
+        self.log.info(f"🔎 Revalidando {len(stale)} imagens do cache de uploads...")
+
+        md5_by_hash = {image_hash: md5 for md5, image_hash in stale.items()}
+        hashes = list(md5_by_hash)
+        found = set()
+
+        for start in range(0, len(hashes), IMAGE_HASH_LOOKUP_SIZE):
+            chunk = hashes[start:start + IMAGE_HASH_LOOKUP_SIZE]
+            images = self.ad_account.get_ad_images(
+                fields=[AdImage.Field.hash, AdImage.Field.status],
+                params={'hashes': chunk}
+            )
+            for image in images:
+                if image.get(AdImage.Field.status, AdImage.Status.active) == AdImage.Status.active:
+                    found.add(image[AdImage.Field.hash])
+
+        valid = [md5_by_hash[h] for h in hashes if h in found]
+        removed = [md5_by_hash[h] for h in hashes if h not in found]
+
+        self.upload_cache.mark_validated(self.ad_account_id, valid)
+        self.upload_cache.forget(self.ad_account_id, removed)
+
+        self.log.info(f"✅ Cache revalidado: {len(valid)} válidas, {len(removed)} removidas")
+        return {'valid': len(valid), 'removed': len(removed)}
+
+    def upload_images(
+        self,
+        image_paths: list[str],
+        max_zip_bytes: int = UPLOAD_ZIP_MAX_BYTES,
+        workers: int = 1,
+        raise_on_error: bool = True
+    ) -> dict[str, str]:
+        """
+        Faz upload de várias imagens agrupadas em arquivos zip
+
+        O endpoint adimages aceita um zip e retorna o hash de cada imagem
+        contida nele, então cada zip é uma única requisição. Imagens já
+        enviadas (cache de uploads) e arquivos repetidos não sobem de novo.
+
+        Args:
+            image_paths: Caminhos locais das imagens
+            max_zip_bytes: Tamanho máximo de cada zip (uma imagem maior que o
+                           limite vai sozinha em seu próprio zip)
+            workers: Zips enviados em paralelo
+            raise_on_error: Propagar a falha de um zip; com False, as imagens
+                            dele simplesmente ficam fora do resultado
+
+        Returns:
+            Dicionário caminho → hash da imagem
+        """
+        hashes: dict[str, str] = {}
+        paths_by_md5: dict[str, list[str]] = {}
+
+        for path in dict.fromkeys(image_paths):
+            md5 = file_md5(path)
+            cached_hash = self._cached_image_hash(md5) if self.upload_cache else None
+            if cached_hash:
+                hashes[path] = cached_hash
+            else:
+                paths_by_md5.setdefault(md5, []).append(path)
+
+        if not paths_by_md5:
+            self.log.info(f"♻️  Todas as {len(hashes)} imagens já foram enviadas anteriormente")
+            return hashes
+
+        # Uma cópia de cada conteúdo, agrupada em zips de até max_zip_bytes
+        chunks: list[list[tuple[str, str]]] = [[]]
+        chunk_bytes = 0
+        for md5, paths in paths_by_md5.items():
+            size = os.path.getsize(paths[0])
+            if chunks[-1] and chunk_bytes + size > max_zip_bytes:
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append((md5, paths[0]))
+            chunk_bytes += size
+
+        self.log.info(f"📤 Enviando {len(paths_by_md5)} imagens em {len(chunks)} arquivo(s) zip "
+                      f"({len(hashes)} já no cache)")
+
+        def upload_chunk(chunk):
+            return self._with_retry('upload', self._upload_zip, chunk)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            futures = [pool.submit(upload_chunk, chunk) for chunk in chunks]
+            errors = []
+            for future in futures:
+                try:
+                    uploaded = future.result()
+                except Exception as e:
+                    self.log.error(f"❌ Erro no upload do zip: {str(e)}")
+                    errors.append(e)
+                    continue
+
+                for md5, image_hash in uploaded.items():
+                    for path in paths_by_md5[md5]:
+                        hashes[path] = image_hash
+                    if self.upload_cache:
+                        self.upload_cache.record(self.ad_account_id, md5, image_hash)
+
+        if errors and raise_on_error:
+            raise errors[0]
+
+        self.log.info(f"✅ Upload concluído! {len(hashes)}/{len(dict.fromkeys(image_paths))} imagens com hash")
+        return hashes
+
+    def _upload_zip(self, chunk: list[tuple[str, str]]) -> dict[str, str]:
+        """
+        Empacota as imagens em um zip temporário e envia em uma requisição
+
+        Args:
+            chunk: Pares (md5, caminho) das imagens do zip
+
+        Returns:
+            Dicionário md5 → hash da imagem
+        """
+        # Nomes únicos dentro do zip (arquivos de pastas diferentes podem ter o mesmo nome)
+        md5_by_name = {
+            f"{position:04d}_{os.path.basename(path)}": md5
+            for position, (md5, path) in enumerate(chunk)
+        }
+
+        fd, zip_path = tempfile.mkstemp(prefix='adimages-', suffix='.zip')
+        os.close(fd)
+        try:
+            # Imagens já são comprimidas: ZIP_STORED evita recomprimir
+            with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for name, (md5, path) in zip(md5_by_name, chunk):
+                    archive.write(path, arcname=name)
+
+            zip_bytes = os.path.getsize(zip_path)
+            with open(zip_path, 'rb') as f, self.metrics.span('upload_zip'):
+                response = self.api.call(
+                    'POST',
+                    (self.ad_account_id, AdImage.get_endpoint()),
+                    files={os.path.basename(zip_path): f}
+                )
+            self.metrics.inc('bytes_uploaded', zip_bytes)
+        finally:
+            os.remove(zip_path)
+
+        md5s = set(md5_by_name.values())
+        uploaded = {}
+        for name, image in response.json().get('images', {}).items():
+            image_hash = image[AdImage.Field.hash]
+            # Resposta indexada pelo nome no zip; o hash da Meta também é o MD5 do conteúdo
+            md5 = md5_by_name.get(os.path.basename(name))
+            if md5 is None and image_hash in md5s:
+                md5 = image_hash
+            if md5:
+                uploaded[md5] = image_hash
+        return uploaded
+
+    def _campaign_params(
+        self,
+        name: str,
+        objective: str,
+        status: str,
+        special_ad_categories: Optional[list]
+    ) -> dict:
+        """Monta os parâmetros de criação de campanha"""
+        params = {
+            Campaign.Field.name: name,
+            Campaign.Field.objective: objective,
+            Campaign.Field.status: status,
+        }
+
+        if special_ad_categories:
+            params[Campaign.Field.special_ad_categories] = special_ad_categories
+
+        # Novo requisito da Meta API: budget sharing
+        params['is_adset_budget_sharing_enabled'] = False
+
+        return params
+
+    def _ad_set_params(
+        self,
+        campaign_id: str,
+        name: str,
+        daily_budget: int,
+        targeting: dict,
+        optimization_goal: str = "LINK_CLICKS",
+        billing_event: str = "IMPRESSIONS",
+        bid_amount: Optional[int] = None
+    ) -> dict:
+        """Monta os parâmetros de criação de conjunto de anúncios"""
+        params = {
+            AdSet.Field.name: name,
+            AdSet.Field.campaign_id: campaign_id,
+            AdSet.Field.daily_budget: daily_budget,
+            AdSet.Field.billing_event: billing_event,
+            AdSet.Field.optimization_goal: optimization_goal,
+            AdSet.Field.targeting: targeting,
+            AdSet.Field.status: 'PAUSED',
+        }
+
+        # Definir bid_amount automaticamente se não fornecido
+        if bid_amount:
+            params[AdSet.Field.bid_amount] = bid_amount
+        else:
+            # Usar 10% do orçamento diário como lance padrão
+            params[AdSet.Field.bid_amount] = int(daily_budget * 0.1)
+
+        return params
+
+    def _ad_creative_params(
+        self,
+        name: str,
+        image_hash: str,
+        title: str,
+        body: str,
+        link_url: str,
+        call_to_action_type: str = "LEARN_MORE",
+        page_id: Optional[str] = None
+    ) -> dict:
+        """Monta os parâmetros de criação de criativo"""
+        page_id = page_id or os.getenv('META_PAGE_ID')
+
+        object_story_spec = {
+            'page_id': page_id,
+            'link_data': {
+                'image_hash': image_hash,
+                'link': link_url,
+                'message': body,
+                'name': title,
+                'call_to_action': {
+                    'type': call_to_action_type,
+                    'value': {
+                        'link': link_url
+                    }
+                }
+            }
+        }
+
+        return {
+            AdCreative.Field.name: name,
+            AdCreative.Field.object_story_spec: object_story_spec
+        }
+
+    def _placement_creative_params(
+        self,
+        name: str,
+        image_hashes: dict[str, str],
+        title: str,
+        body: str,
+        link_url: str,
+        call_to_action_type: str = "LEARN_MORE",
+        page_id: Optional[str] = None
+    ) -> dict:
+        """Monta os parâmetros de um criativo com imagem por posicionamento"""
+        page_id = page_id or os.getenv('META_PAGE_ID')
+        labels = [label for label in PLACEMENT_CUSTOMIZATION if label in image_hashes]
+        unknown = set(image_hashes) - set(labels)
+        if unknown:
+            raise ValueError(f"Posicionamentos desconhecidos: {', '.join(sorted(unknown))}")
+
+        asset_feed_spec = {
+            'images': [
+                {'hash': image_hashes[label], 'adlabels': [{'name': label}]}
+                for label in labels
+            ],
+            'bodies': [{'text': body}],
+            'titles': [{'text': title}],
+            'link_urls': [{'website_url': link_url}],
+            'call_to_action_types': [call_to_action_type],
+            'ad_formats': ['SINGLE_IMAGE'],
+            'optimization_type': 'PLACEMENT',
+            'asset_customization_rules': [
+                {
+                    'customization_spec': PLACEMENT_CUSTOMIZATION[label],
+                    'image_label': {'name': label},
+                    'priority': priority
+                }
+                for priority, label in enumerate(labels, start=1)
+            ]
+        }
+
+        return {
+            AdCreative.Field.name: name,
+            AdCreative.Field.object_story_spec: {'page_id': page_id},
+            AdCreative.Field.asset_feed_spec: asset_feed_spec
+        }
+
+    def _ad_params(
+        self,
+        ad_set_id: str,
+        creative_id: str,
+        name: str,
+        status: str = "PAUSED"
+    ) -> dict:
+        """Monta os parâmetros de criação de anúncio"""
+        return {
+            Ad.Field.name: name,
+            Ad.Field.adset_id: ad_set_id,
+            Ad.Field.creative: {'creative_id': creative_id},
+            Ad.Field.status: status,
+        }
+
     def create_campaign(
         self,
         name: str,
@@ -103,28 +666,20 @@ class MetaAdsManager:
         Returns:
             Objeto Campaign criado
         """
-        print(f"📢 Criando campanha: {name}")
+        self.log.info(f"📢 Criando campanha: {name}")
 
         try:
-            params = {
-                Campaign.Field.name: name,
-                Campaign.Field.objective: objective,
-                Campaign.Field.status: status,
-            }
-
-            if special_ad_categories:
-                params[Campaign.Field.special_ad_categories] = special_ad_categories
+            params = self._campaign_params(name, objective, status, special_ad_categories)
 
-            # Novo requisito da Meta API: budget sharing
-            params['is_adset_budget_sharing_enabled'] = False
+            with self.metrics.span('create_campaign'):
+                campaign = self.ad_account.create_campaign(params=params)
 
-            campaign = self.ad_account.create_campaign(params=params)
-
-            print(f"✅ Campanha criada! ID: {campaign.get_id()}")
+            self._mirror_created('campaigns', campaign.get_id(), params)
+            self.log.info(f"✅ Campanha criada! ID: {campaign.get_id()}", extra={'campaign_id': campaign.get_id()})
             return campaign
 
         except Exception as e:
-            print(f"❌ Erro ao criar campanha: {str(e)}")
+            self.log.error(f"❌ Erro ao criar campanha: {str(e)}")
             raise
 
     def create_ad_set(
@@ -152,33 +707,23 @@ class MetaAdsManager:
         Returns:
             Objeto AdSet criado
         """
-        print(f"🎯 Criando conjunto de anúncios: {name}")
+        self.log.info(f"🎯 Criando conjunto de anúncios: {name}")
 
         try:
-            params = {
-                AdSet.Field.name: name,
-                AdSet.Field.campaign_id: campaign_id,
-                AdSet.Field.daily_budget: daily_budget,
-                AdSet.Field.billing_event: billing_event,
-                AdSet.Field.optimization_goal: optimization_goal,
-                AdSet.Field.targeting: targeting,
-                AdSet.Field.status: 'PAUSED',
-            }
-
-            # Definir bid_amount automaticamente se não fornecido
-            if bid_amount:
-                params[AdSet.Field.bid_amount] = bid_amount
-            else:
-                # Usar 10% do orçamento diário como lance padrão
-                params[AdSet.Field.bid_amount] = int(daily_budget * 0.1)
+            params = self._ad_set_params(
+                campaign_id, name, daily_budget, targeting,
+                optimization_goal, billing_event, bid_amount
+            )
 
-            ad_set = self.ad_account.create_ad_set(params=params)
+            with self.metrics.span('create_ad_set'):
+                ad_set = self.ad_account.create_ad_set(params=params)
 
-            print(f"✅ Conjunto criado! ID: {ad_set.get_id()}")
+            self._mirror_created('adsets', ad_set.get_id(), params)
+            self.log.info(f"✅ Conjunto criado! ID: {ad_set.get_id()}", extra={'ad_set_id': ad_set.get_id()})
             return ad_set
 
         except Exception as e:
-            print(f"❌ Erro ao criar conjunto: {str(e)}")
+            self.log.error(f"❌ Erro ao criar conjunto: {str(e)}")
             raise
 
     def create_ad_creative(
@@ -203,44 +748,198 @@ class MetaAdsManager:
             call_to_action_type: Tipo de call-to-action
             page_id: ID da página do Facebook (opcional)
 
+        Se já existe um criativo com o mesmo object_story_spec (imagem, textos,
+        link, CTA e página), ele é reutilizado sem nova chamada à API.
+
         Returns:
-            Objeto AdCreative criado
+            Objeto AdCreative criado (ou reutilizado)
         """
-        print(f"🎨 Criando criativo: {name}")
+        params = self._ad_creative_params(
+            name, image_hash, title, body, link_url, call_to_action_type, page_id
+        )
+
+        creative_key = None
+        if self.creative_index is not None:
+            creative_key = self._creative_key(params[AdCreative.Field.object_story_spec])
+            existing = self._cached_creative_id(creative_key)
+            if existing:
+                self.log.info(f"♻️  Reutilizando criativo idêntico: {existing}")
+                return AdCreative(existing, api=self.api)
+
+        self.log.info(f"🎨 Criando criativo: {name}")
 
         try:
-            page_id = page_id or os.getenv('META_PAGE_ID')
-
-            object_story_spec = {
-                'page_id': page_id,
-                'link_data': {
-                    'image_hash': image_hash,
-                    'link': link_url,
-                    'message': body,
-                    'name': title,
-                    'call_to_action': {
-                        'type': call_to_action_type,
-                        'value': {
-                            'link': link_url
-                        }
-                    }
-                }
-            }
+            with self.metrics.span('create_ad_creative'):
+                creative = self.ad_account.create_ad_creative(params=params)
 
-            params = {
-                AdCreative.Field.name: name,
-                AdCreative.Field.object_story_spec: object_story_spec
-            }
+            if creative_key:
+                self._remember_creative(creative_key, creative.get_id(), name)
+            self._mirror_created('adcreatives', creative.get_id(), params)
+
+            self.log.info(f"✅ Criativo criado! ID: {creative.get_id()}", extra={'creative_id': creative.get_id()})
+            return creative
+
+        except Exception as e:
+            self.log.error(f"❌ Erro ao criar criativo: {str(e)}")
+            raise
 
-            creative = self.ad_account.create_ad_creative(params=params)
+    def create_placement_ad_creative(
+        self,
+        name: str,
+        image_hashes: dict[str, str],
+        title: str,
+        body: str,
+        link_url: str,
+        call_to_action_type: str = "LEARN_MORE",
+        page_id: Optional[str] = None
+    ) -> AdCreative:
+        """
+        Cria um criativo com uma imagem por posicionamento (asset customization)
 
-            print(f"✅ Criativo criado! ID: {creative.get_id()}")
+        Args:
+            name: Nome do criativo
+            image_hashes: Rótulo de posicionamento ('square', 'portrait',
+                          'vertical') → hash da imagem
+            title: Título do anúncio
+            body: Texto principal
+            link_url: URL de destino
+            call_to_action_type: Tipo de call-to-action
+            page_id: ID da página do Facebook (opcional)
+
+        Returns:
+            Objeto AdCreative criado (ou reutilizado)
+        """
+        params = self._placement_creative_params(
+            name, image_hashes, title, body, link_url, call_to_action_type, page_id
+        )
+
+        creative_key = None
+        if self.creative_index is not None:
+            creative_key = self._creative_key({
+                'object_story_spec': params[AdCreative.Field.object_story_spec],
+                'asset_feed_spec': params[AdCreative.Field.asset_feed_spec]
+            })
+            existing = self._cached_creative_id(creative_key)
+            if existing:
+                self.log.info(f"♻️  Reutilizando criativo idêntico: {existing}")
+                return AdCreative(existing, api=self.api)
+
+        self.log.info(f"🎨 Criando criativo por posicionamento: {name} ({', '.join(image_hashes)})")
+
+        try:
+            with self.metrics.span('create_ad_creative'):
+                creative = self.ad_account.create_ad_creative(params=params)
+
+            if creative_key:
+                self._remember_creative(creative_key, creative.get_id(), name)
+            self._mirror_created('adcreatives', creative.get_id(), params)
+
+            self.log.info(f"✅ Criativo criado! ID: {creative.get_id()}", extra={'creative_id': creative.get_id()})
             return creative
 
         except Exception as e:
-            print(f"❌ Erro ao criar criativo: {str(e)}")
+            self.log.error(f"❌ Erro ao criar criativo: {str(e)}")
             raise
 
+    def _creative_key(self, spec: dict) -> str:
+        """Chave do índice de criativos: conta + hash canônico da especificação"""
+        return f"{self.ad_account_id}:{canonical_hash(spec)}"
+
+    def _remember_creative(self, creative_key: str, creative_id: str, name: str) -> None:
+        """Registra um criativo recém-criado no índice de deduplicação"""
+        now = time.time()
+        self.creative_index.set(creative_key, {
+            'creative_id': creative_id,
+            'name': name,
+            'created_at': now,
+            'validated_at': now
+        })
+
+    def _creative_stale(self, entry: dict) -> bool:
+        """Se a entrada do índice de criativos passou do prazo de revalidação"""
+        validated_at = entry.get('validated_at', entry.get('created_at', 0))
+        return time.time() - validated_at > self.creative_ttl
+
+    def _cached_creative_id(self, creative_key: str) -> Optional[str]:
+        """Consulta o índice de criativos, revalidando entradas vencidas na conta"""
+        entry = self.creative_index.get(creative_key)
+        if not entry or not self._creative_stale(entry):
+            return entry['creative_id'] if entry else None
+
+        # Entrada vencida: aproveitar a consulta para revalidar todas de uma vez
+        self.revalidate_creatives()
+        entry = self.creative_index.get(creative_key)
+        return entry['creative_id'] if entry and not self._creative_stale(entry) else None
+
+    def revalidate_creatives(self) -> dict:
+        """
+        Confirma na conta, em lote, os criativos vencidos do índice de deduplicação
+
+        Cada criativo é lido com GET /{id} em requisições /batch de até 50
+        operações. Criativos excluídos ou inexistentes saem do índice; falhas
+        temporárias deixam a entrada vencida para a próxima revalidação.
+
+        Returns:
+            Dicionário com a quantidade de entradas 'valid' e 'removed'
+        """
+        if self.creative_index is None:
+            return {'valid': 0, 'removed': 0}
+
+        stale = {
+            key: entry
+            for key, entry in self.creative_index.items(f"{self.ad_account_id}:")
+            if self._creative_stale(entry)
+        }
+        if not stale:
+            return {'valid': 0, 'removed': 0}
+
+        self.log.info(f"🔎 Revalidando {len(stale)} criativos do índice de deduplicação...")
+
+        keys = list(stale)
+        valid, removed = [], []
+        for start in range(0, len(keys), BATCH_MAX_OPERATIONS):
+            chunk = keys[start:start + BATCH_MAX_OPERATIONS]
+            responses = self._with_retry('revalidate', self.execute_batch, [
+                {'method': 'GET', 'relative_url': f"{stale[key]['creative_id']}?fields=id,status"}
+                for key in chunk
+            ])
+            for key, response in zip(chunk, responses):
+                body = response['body'] if isinstance(response['body'], dict) else {}
+                if response['code'] == 200:
+                    (removed if body.get('status') == 'DELETED' else valid).append(key)
+                elif body.get('error', {}).get('code') == 100:
+                    # Objeto inexistente (ou sem permissão de leitura)
+                    removed.append(key)
+
+        now = time.time()
+        self.creative_index.update({key: {**stale[key], 'validated_at': now} for key in valid})
+        self.forget_creatives(removed)
+
+        self.log.info(f"✅ Índice de criativos revalidado: {len(valid)} válidos, {len(removed)} removidos")
+        return {'valid': len(valid), 'removed': len(removed)}
+
+    def forget_creatives(self, creative_keys: list[str]) -> None:
+        """Remove do índice de deduplicação criativos que não existem mais na conta"""
+        if self.creative_index is not None:
+            self.creative_index.delete(*creative_keys)
+
+    def _mirror_created(self, edge: str, object_id: str, params: dict, **fields) -> None:
+        """
+        Registra no espelho um objeto recém-criado, a partir dos parâmetros
+        de criação (`fields` sobrescreve campos, ex: IDs resolvidos no batch)
+
+        O espelho é só um índice: falhas nele não interrompem a criação.
+        """
+        if self.mirror is None or not object_id:
+            return
+        obj = {**params, 'id': object_id, **fields}
+        if edge == 'ads' and 'creative' not in fields:
+            obj['creative'] = {'id': params[Ad.Field.creative]['creative_id']}
+        try:
+            self.mirror.upsert(edge, [obj])
+        except sqlite3.Error as e:
+            self.log.warning(f"⚠️  Não foi possível atualizar o espelho da conta: {e}")
+
     def create_ad(
         self,
         ad_set_id: str,
@@ -260,23 +959,20 @@ class MetaAdsManager:
         Returns:
             Objeto Ad criado
         """
-        print(f"📱 Criando anúncio: {name}")
+        self.log.info(f"📱 Criando anúncio: {name}")
 
         try:
-            params = {
-                Ad.Field.name: name,
-                Ad.Field.adset_id: ad_set_id,
-                Ad.Field.creative: {'creative_id': creative_id},
-                Ad.Field.status: status,
-            }
+            params = self._ad_params(ad_set_id, creative_id, name, status)
 
-            ad = self.ad_account.create_ad(params=params)
+            with self.metrics.span('create_ad'):
+                ad = self.ad_account.create_ad(params=params)
 
-            print(f"✅ Anúncio criado! ID: {ad.get_id()}")
+            self._mirror_created('ads', ad.get_id(), params)
+            self.log.info(f"✅ Anúncio criado! ID: {ad.get_id()}", extra={'ad_id': ad.get_id()})
             return ad
 
         except Exception as e:
-            print(f"❌ Erro ao criar anúncio: {str(e)}")
+            self.log.error(f"❌ Erro ao criar anúncio: {str(e)}")
             raise
 
     def create_complete_ad(
@@ -291,7 +987,12 @@ class MetaAdsManager:
         targeting: dict,
         objective: str = "OUTCOME_TRAFFIC",
         call_to_action: str = "LEARN_MORE",
-        special_ad_categories: Optional[list] = None
+        special_ad_categories: Optional[list] = None,
+        image_md5: Optional[str] = None,
+        journal: Optional[AdJournal] = None,
+        journal_key: Optional[str] = None,
+        share_ad_set: bool = False,
+        placement_images: Optional[dict[str, str]] = None
     ) -> dict:
         """
         Cria um anúncio completo (campanha + conjunto + criativo + anúncio)
@@ -307,73 +1008,986 @@ class MetaAdsManager:
             targeting: Segmentação
             objective: Objetivo da campanha
             call_to_action: Tipo de CTA
+            image_md5: MD5 da imagem, se já calculado no download
+            journal: Journal de etapas; etapas já registradas são puladas e
+                     as novas são registradas assim que concluídas
+            journal_key: Chave do anúncio no journal (padrão: derivada dos
+                         parâmetros acima)
+            share_ad_set: Reutilizar a campanha e o conjunto de anúncios já
+                          criados para a mesma campanha/segmentação/orçamento,
+                          anexando o anúncio a eles
+            placement_images: Rótulo de posicionamento → caminho da imagem
+                              (ver placements.py); cria um único criativo com
+                              a imagem certa para cada posicionamento
 
         Returns:
             Dicionário com IDs de todos os objetos criados
         """
-        print(f"\n🚀 Criando anúncio completo: {campaign_name}")
-        print("=" * 60)
+        self.log.info(f"🚀 Criando anúncio completo: {campaign_name}", extra={'banner': '='})
 
-        try:
-            # 1. Upload da imagem
-            image_hash = self.upload_image(image_path)
+        if journal and not journal_key:
+            journal_key = AdJournal.make_key(
+                campaign_name, ad_name, image_path, title, body, link_url,
+                daily_budget, targeting, objective, call_to_action, special_ad_categories
+            )
 
-            # 2. Criar campanha
-            campaign = self.create_campaign(
-                name=campaign_name,
-                objective=objective,
-                status="PAUSED",
-                special_ad_categories=special_ad_categories
+        def run_stage(stage_name, field, func, *args, **kwargs):
+            return self._journaled_stage(
+                journal, journal_key, stage_name, field,
+                lambda: self._with_retry(stage_name, func, *args, **kwargs)
             )
 
-            # 3. Criar conjunto de anúncios
-            ad_set = self.create_ad_set(
-                campaign_id=campaign.get_id(),
-                name=f"{ad_name} - Ad Set",
-                daily_budget=daily_budget,
-                targeting=targeting
+        def run_create(stage_name, field, edge, parent, func, **kwargs):
+            return self._journaled_stage(
+                journal, journal_key, stage_name, field,
+                lambda: self._create_with_retry(stage_name, edge, kwargs['name'], parent, func, **kwargs)
             )
 
+        try:
+            # 1. Upload da imagem (ou de uma imagem por posicionamento)
+            placement_hashes = None
+            if placement_images:
+                placement_hashes = {
+                    label: run_stage(f'upload_{label}', 'image_hash', self.upload_image, path)
+                    for label, path in placement_images.items()
+                }
+                image_hash = next(iter(placement_hashes.values()))
+            else:
+                image_hash = run_stage(
+                    'upload', 'image_hash',
+                    self.upload_image, image_path, image_md5=image_md5
+                )
+
+            if share_ad_set:
+                # 2-3. Campanha e conjunto compartilhados pelo grupo
+                group = self.get_or_create_ad_group(
+                    campaign_name=campaign_name,
+                    daily_budget=daily_budget,
+                    targeting=targeting,
+                    objective=objective,
+                    special_ad_categories=special_ad_categories
+                )
+                campaign_id, ad_set_id = group['campaign_id'], group['ad_set_id']
+            else:
+                # 2. Criar campanha
+                campaign_id = run_create(
+                    'campaign', 'campaign_id', 'campaigns', None,
+                    self.create_campaign,
+                    name=campaign_name,
+                    objective=objective,
+                    status="PAUSED",
+                    special_ad_categories=special_ad_categories
+                )
+
+                # 3. Criar conjunto de anúncios
+                ad_set_id = run_create(
+                    'ad_set', 'ad_set_id', 'adsets', ('campaign_id', campaign_id),
+                    self.create_ad_set,
+                    campaign_id=campaign_id,
+                    name=f"{ad_name} - Ad Set",
+                    daily_budget=daily_budget,
+                    targeting=targeting
+                )
+
             # 4. Criar criativo
-            creative = self.create_ad_creative(
-                name=f"{ad_name} - Creative",
-                image_hash=image_hash,
-                title=title,
-                body=body,
-                link_url=link_url,
-                call_to_action_type=call_to_action
-            )
+            if placement_hashes:
+                creative_id = run_stage(
+                    'creative', 'creative_id',
+                    self.create_placement_ad_creative,
+                    name=f"{ad_name} - Creative",
+                    image_hashes=placement_hashes,
+                    title=title,
+                    body=body,
+                    link_url=link_url,
+                    call_to_action_type=call_to_action
+                )
+            else:
+                creative_id = run_stage(
+                    'creative', 'creative_id',
+                    self.create_ad_creative,
+                    name=f"{ad_name} - Creative",
+                    image_hash=image_hash,
+                    title=title,
+                    body=body,
+                    link_url=link_url,
+                    call_to_action_type=call_to_action
+                )
 
             # 5. Criar anúncio
-            ad = self.create_ad(
-                ad_set_id=ad_set.get_id(),
-                creative_id=creative.get_id(),
+            ad_id = run_create(
+                'ad', 'ad_id', 'ads', ('adset_id', ad_set_id),
+                self.create_ad,
+                ad_set_id=ad_set_id,
+                creative_id=creative_id,
                 name=ad_name,
                 status="PAUSED"
             )
 
             result = {
-                'campaign_id': campaign.get_id(),
-                'ad_set_id': ad_set.get_id(),
-                'creative_id': creative.get_id(),
-                'ad_id': ad.get_id(),
+                'campaign_id': campaign_id,
+                'ad_set_id': ad_set_id,
+                'creative_id': creative_id,
+                'ad_id': ad_id,
                 'image_hash': image_hash
             }
-
-            print("\n" + "=" * 60)
-            print("✅ ANÚNCIO COMPLETO CRIADO COM SUCESSO!")
-            print(f"📊 Campaign ID: {result['campaign_id']}")
-            print(f"📊 Ad Set ID: {result['ad_set_id']}")
-            print(f"📊 Creative ID: {result['creative_id']}")
-            print(f"📊 Ad ID: {result['ad_id']}")
-            print("=" * 60)
-
+            if placement_hashes:
+                result['placement_hashes'] = placement_hashes
+
+            self.log.info(
+                "✅ ANÚNCIO COMPLETO CRIADO COM SUCESSO!\n"
+                f"📊 Campaign ID: {result['campaign_id']}\n"
+                f"📊 Ad Set ID: {result['ad_set_id']}\n"
+                f"📊 Creative ID: {result['creative_id']}\n"
+                f"📊 Ad ID: {result['ad_id']}",
+                extra={'banner': '=', 'campaign_id': campaign_id, 'ad_id': ad_id}
+            )
             return result
 
         except Exception as e:
-            print(f"\n❌ Erro ao criar anúncio completo: {str(e)}")
+            self.log.error(f"❌ Erro ao criar anúncio completo: {str(e)}", extra={'campaign_name': campaign_name})
             raise
 
+        finally:
+            flush_logs()
+
+    def _with_retry(self, stage: str, func, *args, **kwargs):
+        """Executa uma etapa repetindo só ela em caso de erro transiente"""
+        return retry_call(func, *args, policy=self.retry_policy, stage=stage, log=self.log, **kwargs)
+
+    def _create_with_retry(
+        self,
+        stage: str,
+        edge: str,
+        object_name: str,
+        parent: Optional[tuple[str, str]],
+        func,
+        *args,
+        **kwargs
+    ) -> str:
+        """
+        Executa uma criação (POST não idempotente) repetindo-a sem duplicar o objeto
+
+        Um erro transiente não garante que a criação deixou de ser aplicada
+        (ex: timeout depois que a Meta gravou o objeto). Antes de cada nova
+        tentativa, o objeto é procurado pelo nome entre os criados desde a
+        primeira tentativa e, se encontrado, é reaproveitado.
+
+        Args:
+            stage: Nome da etapa, usado nas mensagens
+            edge: Aresta da conta onde o objeto é criado ('campaigns', 'adsets', 'ads')
+            object_name: Nome do objeto
+            parent: (campo, ID) do objeto pai, ex: ('campaign_id', '123')
+            func: Função de criação
+
+        Returns:
+            ID do objeto criado (ou encontrado)
+        """
+        started = time.time()
+        attempts = 0
+
+        def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                existing = self._find_created(edge, object_name, parent, started)
+                if existing:
+                    self.log.info(f"♻️  Etapa '{stage}' já aplicada na tentativa anterior: {existing}")
+                    return existing
+            return func(*args, **kwargs)
+
+        value = self._with_retry(stage, attempt)
+        return value if isinstance(value, str) else value.get_id()
+
+    def _find_created(
+        self,
+        edge: str,
+        name: str,
+        parent: Optional[tuple[str, str]],
+        since: float
+    ) -> Optional[str]:
+        """
+        ID do objeto mais recente da aresta com o nome (e pai) criado a partir de `since`
+
+        Consulta primeiro o espelho (após uma sincronização incremental da
+        aresta) e só pagina a aresta na Graph API se ele não tiver o objeto.
+        """
+        mirrored = self._mirror_lookup(edge, name, parent[1] if parent else None)
+        if mirrored and (mirrored.get('updated_time') or 0) >= since - CREATE_LOOKUP_SKEW:
+            return mirrored['id']
+
+        fields = ['id', 'name', 'created_time'] + ([parent[0]] if parent else [])
+        filtering = [{'field': 'name', 'operator': 'EQUAL', 'value': name}]
+
+        found = None
+        for obj in self._iter_edge(edge, fields, LIST_PAGE_SIZE, None, None, filtering, prefetch=False):
+            if obj.get('name') != name or (parent and obj.get(parent[0]) != parent[1]):
+                continue
+            created = datetime.strptime(obj['created_time'], '%Y-%m-%dT%H:%M:%S%z').timestamp()
+            if created >= since - CREATE_LOOKUP_SKEW and (not found or created > found[0]):
+                found = (created, obj['id'])
+
+        return found[1] if found else None
+
+    def _mirror_lookup(self, edge: str, name: str, parent_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Objeto ativo mais recente com o nome no espelho, ou None
+
+        Se a aresta já foi sincronizada alguma vez, traz antes só o que mudou
+        desde então (a primeira sincronização, completa, fica a cargo de
+        sync_mirror). O espelho é só um índice: falhas nele valem como
+        "não encontrado".
+        """
+        if self.mirror is None:
+            return None
+        try:
+            if self.mirror.watermark(edge) is not None:
+                self.mirror.sync(self, edges=(edge,))
+            found = self.mirror.find(edge, name, parent_id)
+        except Exception as e:
+            self.log.warning(f"⚠️  Espelho da conta indisponível para a busca por nome: {e}")
+            return None
+        return found[0] if found else None
+
+    def _journaled_stage(
+        self,
+        journal: Optional[AdJournal],
+        journal_key: Optional[str],
+        stage: str,
+        field: str,
+        execute
+    ) -> str:
+        """
+        Executa uma etapa de create_complete_ad, reaproveitando o resultado
+        registrado no journal quando a etapa já foi concluída
+
+        Args:
+            execute: Executa a etapa (já com retentativas) e devolve o
+                     resultado, chamado só se a etapa ainda não foi concluída
+
+        Returns:
+            Hash ou ID produzido pela etapa
+        """
+        if journal:
+            done = journal.stage(journal_key, stage)
+            if done:
+                self.log.info(f"⏭️  Etapa '{stage}' já concluída anteriormente: {done[field]}")
+                return done[field]
+
+        value = execute()
+        value = value if isinstance(value, str) else value.get_id()
+
+        if journal:
+            journal.record(journal_key, stage, **{field: value})
+
+        return value
+
+    def execute_batch(self, operations: list[dict]) -> list[dict]:
+        """
+        Executa até 50 operações da Graph API em uma única requisição /batch
+
+        Args:
+            operations: Lista de operações com 'method', 'relative_url' e,
+                        opcionalmente, 'name' (para referências JSONPath como
+                        {result=nome:$.id}) e 'body' (dicionário de parâmetros)
+
+        Returns:
+            Lista, na mesma ordem, com 'code', 'body' (JSON decodificado) e
+            'error' (mensagem ou None) de cada operação
+        """
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            raise ValueError(
+                f"Máximo de {BATCH_MAX_OPERATIONS} operações por batch "
+                f"({len(operations)} recebidas)"
+            )
+
+        batch = []
+        for operation in operations:
+            request = {
+                'method': operation['method'],
+                'relative_url': operation['relative_url'],
+            }
+            if operation.get('name'):
+                request['name'] = operation['name']
+                # Sem isso a Meta omite o corpo das operações referenciadas
+                request['omit_response_on_success'] = False
+            if operation.get('body'):
+                request['body'] = _encode_batch_body(operation['body'])
+            batch.append(request)
+
+        with self.metrics.span('execute_batch'):
+            response = self.api.call(
+                'POST',
+                (),
+                params={'batch': batch, 'include_headers': 'false'}
+            )
+        self.metrics.inc('batch_operations', len(batch))
+
+        results = []
+        for entry in response.json():
+            # Entradas nulas: a operação não rodou (ex: dependência falhou)
+            if entry is None:
+                results.append({
+                    'code': None,
+                    'body': None,
+                    'error': 'Operação não executada (dependência falhou)'
+                })
+                continue
+
+            try:
+                body = json.loads(entry.get('body') or 'null')
+            except ValueError:
+                body = entry.get('body')
+
+            error = None
+            if entry.get('code') != 200:
+                if isinstance(body, dict) and 'error' in body:
+                    error = body['error'].get('error_user_msg') or body['error'].get('message')
+                error = error or f"HTTP {entry.get('code')}"
+
+            results.append({'code': entry.get('code'), 'body': body, 'error': error})
+
+        return results
+
+    def iter_campaigns(
+        self,
+        fields: Optional[list[str]] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        effective_status: Optional[list[str]] = None,
+        updated_since: Optional[Union[datetime, int]] = None,
+        filtering: Optional[list[dict]] = None,
+        prefetch: bool = True
+    ) -> Iterator[dict]:
+        """
+        Percorre as campanhas da conta página a página
+
+        Args:
+            fields: Campos lidos (padrão: DEFAULT_LIST_FIELDS['campaigns'])
+            page_size: Objetos por requisição
+            effective_status: Filtrar por status efetivo (ex: ['ACTIVE', 'PAUSED'])
+            updated_since: Só objetos alterados depois deste momento
+            filtering: Filtros adicionais da Graph API ({'field', 'operator', 'value'})
+            prefetch: Buscar a próxima página em segundo plano
+
+        Returns:
+            Gerador de dicionários com os campos pedidos
+        """
+        return self._iter_edge('campaigns', fields, page_size, effective_status, updated_since, filtering, prefetch)
+
+    def iter_ad_sets(
+        self,
+        fields: Optional[list[str]] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        effective_status: Optional[list[str]] = None,
+        updated_since: Optional[Union[datetime, int]] = None,
+        filtering: Optional[list[dict]] = None,
+        prefetch: bool = True
+    ) -> Iterator[dict]:
+        """Percorre os conjuntos de anúncios da conta (mesmos parâmetros de iter_campaigns)"""
+        return self._iter_edge('adsets', fields, page_size, effective_status, updated_since, filtering, prefetch)
+
+    def iter_ads(
+        self,
+        fields: Optional[list[str]] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        effective_status: Optional[list[str]] = None,
+        updated_since: Optional[Union[datetime, int]] = None,
+        filtering: Optional[list[dict]] = None,
+        prefetch: bool = True
+    ) -> Iterator[dict]:
+        """Percorre os anúncios da conta (mesmos parâmetros de iter_campaigns)"""
+        return self._iter_edge('ads', fields, page_size, effective_status, updated_since, filtering, prefetch)
+
+    def iter_creatives(
+        self,
+        fields: Optional[list[str]] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        filtering: Optional[list[dict]] = None,
+        prefetch: bool = True
+    ) -> Iterator[dict]:
+        """Percorre os criativos da conta (sem filtro de status/alteração na Graph API)"""
+        return self._iter_edge('adcreatives', fields, page_size, None, None, filtering, prefetch)
+
+    def iter_images(
+        self,
+        fields: Optional[list[str]] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        filtering: Optional[list[dict]] = None,
+        prefetch: bool = True
+    ) -> Iterator[dict]:
+        """Percorre as imagens da biblioteca da conta"""
+        return self._iter_edge('adimages', fields, page_size, None, None, filtering, prefetch)
+
+    def _iter_edge(
+        self,
+        edge: str,
+        fields: Optional[list[str]],
+        page_size: int,
+        effective_status: Optional[list[str]],
+        updated_since: Optional[Union[datetime, int]],
+        filtering: Optional[list[dict]],
+        prefetch: bool
+    ) -> Iterator[dict]:
+        """
+        Gera os objetos de uma aresta da conta lendo as páginas como JSON cru
+
+        No máximo duas páginas ficam em memória (a atual e, com prefetch, a
+        seguinte, buscada em uma thread enquanto a atual é consumida), então
+        percorrer contas com dezenas de milhares de objetos usa memória
+        constante. Interromper a iteração cancela a busca pendente.
+        """
+        params = {
+            'fields': ','.join(fields or DEFAULT_LIST_FIELDS[edge]),
+            'limit': page_size,
+        }
+        if effective_status:
+            params['effective_status'] = list(effective_status)
+
+        filters = list(filtering or [])
+        if updated_since is not None:
+            timestamp = int(updated_since.timestamp()) if isinstance(updated_since, datetime) else int(updated_since)
+            filters.append({'field': 'updated_time', 'operator': 'GREATER_THAN', 'value': timestamp})
+        if filters:
+            params['filtering'] = filters
+
+        path = (self.ad_account_id, edge)
+
+        def fetch(page_params: dict) -> dict:
+            self.metrics.inc('list_pages', edge=edge)
+            return self._with_retry('list', self.api.call, 'GET', path, params=page_params).json()
+
+        def next_params(response: dict) -> Optional[dict]:
+            paging = response.get('paging', {})
+            after = paging.get('cursors', {}).get('after')
+            return {**params, 'after': after} if 'next' in paging and after else None
+
+        def pages():
+            response = fetch(params)
+            while True:
+                following = next_params(response)
+                yield response.get('data', []), following
+                if following is None:
+                    return
+                response = fetch(following)
+
+        if not prefetch:
+            for data, _ in pages():
+                yield from data
+            return
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"list-{edge}") as pool:
+            future = pool.submit(fetch, params)
+            try:
+                while future is not None:
+                    response = future.result()
+                    following = next_params(response)
+                    future = pool.submit(fetch, following) if following else None
+                    yield from response.get('data', [])
+            finally:
+                if future is not None:
+                    future.cancel()
+
+    def sync_mirror(self, full: bool = False, edges: tuple = MIRROR_EDGES) -> dict[str, int]:
+        """
+        Atualiza o espelho local com o que mudou na conta (ver AccountMirror.sync)
+
+        Args:
+            full: Percorrer a conta inteira, incluindo criativos e imagens
+            edges: Arestas a sincronizar
+
+        Returns:
+            Dicionário aresta → objetos gravados
+        """
+        return self._require_mirror().sync(self, edges=edges, full=full)
+
+    def find_campaign_id(self, name: str) -> Optional[str]:
+        """ID da campanha ativa/pausada mais recente com o nome, consultando só o espelho"""
+        return self._require_mirror().find_id('campaigns', name)
+
+    def find_ad_set_id(self, name: str, campaign_id: Optional[str] = None) -> Optional[str]:
+        """ID do conjunto com o nome (opcionalmente dentro da campanha), consultando só o espelho"""
+        return self._require_mirror().find_id('adsets', name, campaign_id)
+
+    def find_ad_id(self, name: str, ad_set_id: Optional[str] = None) -> Optional[str]:
+        """ID do anúncio com o nome (opcionalmente dentro do conjunto), consultando só o espelho"""
+        return self._require_mirror().find_id('ads', name, ad_set_id)
+
+    def find_ads_by_image(self, image_hash: str) -> list[dict]:
+        """Anúncios cujo criativo usa a imagem, consultando só o espelho"""
+        return self._require_mirror().ads_using_image(image_hash)
+
+    def _require_mirror(self) -> AccountMirror:
+        if self.mirror is None:
+            raise RuntimeError("Espelho da conta desativado (use_mirror=False)")
+        return self.mirror
+
+    def get_ad_set_budgets(self, include_paused: bool = False) -> dict[str, int]:
+        """
+        Lê o orçamento diário atual dos conjuntos da conta
+
+        Args:
+            include_paused: Incluir conjuntos pausados
+
+        Returns:
+            Dicionário ID do conjunto → orçamento diário (centavos); conjuntos
+            sem orçamento próprio (orçamento na campanha) ficam de fora
+        """
+        ad_sets = self.iter_ad_sets(
+            fields=[AdSet.Field.id, AdSet.Field.daily_budget],
+            effective_status=None if include_paused else ['ACTIVE']
+        )
+        return {
+            ad_set['id']: int(ad_set['daily_budget'])
+            for ad_set in ad_sets
+            if ad_set.get('daily_budget')
+        }
+
+    def update_ad_set_budgets(self, budgets: dict[str, int]) -> dict[str, str]:
+        """
+        Atualiza o orçamento diário de vários conjuntos via /batch
+
+        Args:
+            budgets: ID do conjunto → novo orçamento diário (centavos)
+
+        Returns:
+            ID do conjunto → mensagem de erro, só para os que falharam
+        """
+        items = list(budgets.items())
+        errors: dict[str, str] = {}
+
+        for start in range(0, len(items), BATCH_MAX_OPERATIONS):
+            chunk = items[start:start + BATCH_MAX_OPERATIONS]
+            operations = [
+                {'method': 'POST', 'relative_url': ad_set_id, 'body': {AdSet.Field.daily_budget: int(budget)}}
+                for ad_set_id, budget in chunk
+            ]
+            try:
+                # Definir o orçamento é idempotente: repetir o batch inteiro é seguro
+                responses = self._with_retry('budget', self.execute_batch, operations)
+            except Exception as e:
+                self.log.error(f"❌ Erro no batch de orçamentos: {str(e)}")
+                errors.update({ad_set_id: str(e) for ad_set_id, _ in chunk})
+                continue
+
+            for (ad_set_id, _), response in zip(chunk, responses):
+                if response['error']:
+                    errors[ad_set_id] = response['error']
+
+        self.log.info(f"💰 Orçamentos atualizados: {len(items) - len(errors)}/{len(items)}",
+                      extra={'updated': len(items) - len(errors), 'failed': len(errors)})
+        for ad_set_id, error in errors.items():
+            self.log.error(f"❌ Conjunto {ad_set_id}: {error}")
+        return errors
+
+    def create_complete_ads_batch(
+        self,
+        ads: list[dict],
+        ads_per_batch: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Cria vários anúncios completos usando requisições /batch
+
+        Cada anúncio gera 4 operações (campanha, conjunto, criativo e anúncio)
+        encadeadas por referências JSONPath dentro do mesmo batch, então até
+        12 anúncios cabem em uma única requisição. Anúncios com
+        'share_ad_set': True usam a campanha/conjunto compartilhados do grupo
+        e geram só 2 operações (criativo e anúncio); criativos idênticos a um
+        já existente, ou a outro do mesmo batch, também são reaproveitados.
+        As imagens são enviadas antes, pois uploads de arquivo não entram no
+        batch.
+
+        Args:
+            ads: Lista de dicionários com os mesmos parâmetros de create_complete_ad
+            ads_per_batch: Máximo de anúncios por requisição (padrão: o que couber
+                           no limite de operações)
+
+        Returns:
+            Lista, na ordem de `ads`, com 'success', os IDs criados e, em caso
+            de falha, 'error' e 'stage' da operação que falhou
+        """
+        self.log.info(f"🚀 Criando {len(ads)} anúncios via batch", extra={'banner': '='})
+
+        results: list = [None] * len(ads)
+
+        # 1. Upload das imagens (em zips) e grupos compartilhados (fora do batch)
+        uploaded = self.upload_images([ad['image_path'] for ad in ads], raise_on_error=False)
+        image_hashes = {}
+        groups = {}
+        for i, ad in enumerate(ads):
+            try:
+                image_hashes[i] = uploaded.get(ad['image_path']) or self._with_retry(
+                    'upload', self.upload_image, ad['image_path'], image_md5=ad.get('image_md5')
+                )
+            except Exception as e:
+                results[i] = {'success': False, 'stage': 'upload', 'error': str(e)}
+                continue
+
+            if ad.get('share_ad_set'):
+                try:
+                    groups[i] = self.get_or_create_ad_group(
+                        campaign_name=ad['campaign_name'],
+                        daily_budget=ad['daily_budget'],
+                        targeting=ad['targeting'],
+                        objective=ad.get('objective', 'OUTCOME_TRAFFIC'),
+                        special_ad_categories=ad.get('special_ad_categories')
+                    )
+                except Exception as e:
+                    results[i] = {'success': False, 'stage': 'ad_group', 'error': str(e)}
+
+        # 2. Operações encadeadas, em grupos que cabem em um batch
+        pending = [i for i in range(len(ads)) if results[i] is None]
+        operations_by_ad = {
+            i: self._complete_ad_operations(i, ads[i], image_hashes[i], groups.get(i))
+            for i in pending
+        }
+
+        for chunk in _batch_chunks(pending, operations_by_ad, ads_per_batch):
+            shared = self._share_batch_creatives(chunk, operations_by_ad)
+            operations = [op for i in chunk for op in operations_by_ad[i]]
+
+            try:
+                responses = self.execute_batch(operations)
+            except Exception as e:
+                self.log.error(f"❌ Erro no batch: {str(e)}")
+                for i in chunk:
+                    results[i] = {'success': False, 'stage': 'batch', 'error': str(e)}
+                continue
+
+            # Mapear cada resposta de volta ao anúncio de origem
+            position = 0
+            for i in chunk:
+                count = len(operations_by_ad[i])
+                results[i] = self._complete_ad_batch_result(
+                    operations_by_ad[i],
+                    responses[position:position + count],
+                    image_hashes[i],
+                    groups.get(i),
+                    results[shared[i]].get('creative_id') if i in shared else None
+                )
+                position += count
+
+        successful = sum(1 for r in results if r['success'])
+        self.log.info(f"✅ Batch concluído! {successful}/{len(ads)} anúncios criados com sucesso.")
+        for i, result in enumerate(results):
+            if not result['success']:
+                self.log.error(f"❌ Anúncio {i + 1} ({result['stage']}): {result['error']}")
+
+        flush_logs()
+        return results
+
+    def _complete_ad_operations(
+        self,
+        index: int,
+        ad: dict,
+        image_hash: str,
+        group: Optional[dict] = None
+    ) -> list[dict]:
+        """
+        Monta as operações encadeadas de um anúncio completo
+
+        Campanha e conjunto ficam de fora quando vêm de um grupo compartilhado,
+        e o criativo quando já existe um idêntico no índice. Cada operação
+        leva a etapa ('stage') a que pertence, usada para mapear as respostas.
+        """
+        account_path = self.ad_account_id
+        names = {stage: f"{stage}-{index}" for stage in BATCH_STAGES}
+        ad_name = ad['ad_name']
+        operations = []
+
+        if group:
+            ad_set_ref = group['ad_set_id']
+        else:
+            ad_set_ref = f"{{result={names['ad_set']}:$.id}}"
+            operations += [
+                {
+                    'stage': 'campaign',
+                    'method': 'POST',
+                    'relative_url': f"{account_path}/campaigns",
+                    'name': names['campaign'],
+                    'body': self._campaign_params(
+                        ad['campaign_name'],
+                        ad.get('objective', 'OUTCOME_TRAFFIC'),
+                        'PAUSED',
+                        ad.get('special_ad_categories')
+                    )
+                },
+                {
+                    'stage': 'ad_set',
+                    'method': 'POST',
+                    'relative_url': f"{account_path}/adsets",
+                    'name': names['ad_set'],
+                    'body': self._ad_set_params(
+                        f"{{result={names['campaign']}:$.id}}",
+                        f"{ad_name} - Ad Set",
+                        ad['daily_budget'],
+                        ad['targeting']
+                    )
+                },
+            ]
+
+        creative_params = self._ad_creative_params(
+            f"{ad_name} - Creative",
+            image_hash,
+            ad['title'],
+            ad['body'],
+            ad['link_url'],
+            ad.get('call_to_action', 'LEARN_MORE')
+        )
+        creative_key = self._creative_key(creative_params[AdCreative.Field.object_story_spec])
+        existing = None
+        if self.creative_index is not None:
+            existing = self._cached_creative_id(creative_key)
+
+        if existing:
+            creative_ref = existing
+        else:
+            creative_ref = f"{{result={names['creative']}:$.id}}"
+            operations.append({
+                'stage': 'creative',
+                'creative_key': creative_key,
+                'method': 'POST',
+                'relative_url': f"{account_path}/adcreatives",
+                'name': names['creative'],
+                'body': creative_params
+            })
+
+        operations.append({
+            'stage': 'ad',
+            'method': 'POST',
+            'relative_url': f"{account_path}/ads",
+            'name': names['ad'],
+            'body': self._ad_params(ad_set_ref, creative_ref, ad_name, 'PAUSED')
+        })
+        return operations
+
+    def _share_batch_creatives(self, chunk: list[int], operations_by_ad: dict[int, list]) -> dict[int, int]:
+        """
+        Deixa uma só operação de criativo por especificação no batch
+
+        Anúncios do lote com criativo idêntico (mesma chave do índice) ao de
+        um anúncio anterior perdem a própria operação de criativo e passam a
+        referenciar a dele. Retorna, para cada anúncio alterado, o índice do
+        anúncio que cria o criativo.
+        """
+        sources: dict[str, tuple[int, str]] = {}
+        shared = {}
+
+        for i in chunk:
+            operations = operations_by_ad[i]
+            creative = next((op for op in operations if op['stage'] == 'creative'), None)
+            if creative is None:
+                continue
+            if creative['creative_key'] not in sources:
+                sources[creative['creative_key']] = (i, creative['name'])
+                continue
+
+            source, name = sources[creative['creative_key']]
+            operations.remove(creative)
+            operations[-1]['body'][Ad.Field.creative] = {'creative_id': f"{{result={name}:$.id}}"}
+            shared[i] = source
+
+        return shared
+
+    def _complete_ad_batch_result(
+        self,
+        operations: list[dict],
+        responses: list[dict],
+        image_hash: str,
+        group: Optional[dict] = None,
+        creative_id: Optional[str] = None
+    ) -> dict:
+        """
+        Converte as respostas das operações de um anúncio no dicionário de resultado
+
+        `creative_id` é o criativo criado por outro anúncio do mesmo batch,
+        quando este o referencia em vez de criar o seu.
+        """
+        result = {'success': True, 'image_hash': image_hash}
+
+        if group:
+            result['campaign_id'] = group['campaign_id']
+            result['ad_set_id'] = group['ad_set_id']
+
+        # Criativo reaproveitado: o ID está na própria operação do anúncio
+        ad_body = operations[-1]['body']
+        creative_ref = ad_body[Ad.Field.creative]['creative_id']
+        if not creative_ref.startswith('{result='):
+            result['creative_id'] = creative_ref
+        elif creative_id:
+            result['creative_id'] = creative_id
+
+        for operation, response in zip(operations, responses):
+            stage = operation['stage']
+            body = response['body'] if isinstance(response['body'], dict) else {}
+            result[f"{stage}_id"] = body.get('id')
+
+            if stage == 'creative' and body.get('id') and self.creative_index is not None:
+                self._remember_creative(
+                    operation['creative_key'], body['id'], operation['body'][AdCreative.Field.name]
+                )
+
+            # Guardar apenas o primeiro erro: os seguintes são consequência dele
+            if response['error'] and result['success']:
+                result.update({'success': False, 'stage': stage, 'error': response['error']})
+
+        # IDs das referências {result=...} resolvidos a partir das respostas
+        resolved = {
+            'campaigns': {},
+            'adsets': {'campaign_id': result.get('campaign_id')},
+            'adcreatives': {},
+            'ads': {'campaign_id': result.get('campaign_id'), 'adset_id': result.get('ad_set_id'),
+                    'creative': {'id': result.get('creative_id')}},
+        }
+        for operation in operations:
+            edge = operation['relative_url'].rsplit('/', 1)[-1]
+            self._mirror_created(edge, result.get(f"{operation['stage']}_id"), operation['body'], **resolved[edge])
+
+        return result
+
+    def ad_group_key(
+        self,
+        campaign_name: str,
+        daily_budget: int,
+        targeting: dict,
+        objective: str = "OUTCOME_TRAFFIC",
+        special_ad_categories: Optional[list] = None
+    ) -> str:
+        """
+        Chave do grupo (campanha + conjunto) compartilhado por anúncios com a
+        mesma especificação de campanha, segmentação e orçamento
+
+        A segmentação é comparada de forma canônica: ordem de chaves e de
+        itens de listas não importa.
+        """
+        spec = {
+            'campaign': {
+                'name': campaign_name,
+                'objective': objective,
+                'special_ad_categories': sorted(special_ad_categories or [])
+            },
+            'targeting': canonical_hash(targeting, sort_lists=True),
+            'daily_budget': daily_budget
+        }
+        return f"{self.ad_account_id}:{canonical_hash(spec)}"
+
+    def get_or_create_ad_group(
+        self,
+        campaign_name: str,
+        daily_budget: int,
+        targeting: dict,
+        objective: str = "OUTCOME_TRAFFIC",
+        special_ad_categories: Optional[list] = None
+    ) -> dict:
+        """
+        Retorna a campanha e o conjunto compartilhados do grupo, criando-os
+        apenas na primeira vez
+
+        Args:
+            campaign_name: Nome da campanha
+            daily_budget: Orçamento diário do conjunto em centavos
+            targeting: Segmentação do conjunto
+            objective: Objetivo da campanha
+            special_ad_categories: Categorias especiais da campanha
+
+        Returns:
+            Dicionário com 'campaign_id', 'ad_set_id' e 'reused'
+        """
+        key = self.ad_group_key(
+            campaign_name, daily_budget, targeting, objective, special_ad_categories
+        )
+
+        # Um lock por grupo: workers concorrentes não duplicam a criação
+        with self._ad_group_locks_guard:
+            lock = self._ad_group_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            group = self.ad_group_index.get(key)
+            if group:
+                self.log.info(f"♻️  Reutilizando campanha {group['campaign_id']} / conjunto {group['ad_set_id']}")
+                return {**group, 'reused': True}
+
+            # O nome do conjunto inclui a chave do grupo: se outro processo já
+            # criou o grupo, ele aparece no espelho
+            ad_set_name = f"{campaign_name} - Ad Set {key[-8:]}"
+            mirrored = self._mirror_lookup('adsets', ad_set_name)
+            if mirrored and mirrored.get('campaign_id'):
+                group = {
+                    'campaign_id': mirrored['campaign_id'],
+                    'ad_set_id': mirrored['id'],
+                    'campaign_name': campaign_name,
+                    'created_at': time.time()
+                }
+                self.ad_group_index.set(key, group)
+                self.log.info(f"♻️  Reutilizando campanha {group['campaign_id']} / conjunto "
+                              f"{group['ad_set_id']} (encontrados no espelho)")
+                return {**group, 'reused': True}
+
+            campaign_id = self._create_with_retry(
+                'campaign', 'campaigns', campaign_name, None,
+                self.create_campaign,
+                name=campaign_name,
+                objective=objective,
+                status="PAUSED",
+                special_ad_categories=special_ad_categories
+            )
+
+            ad_set_id = self._create_with_retry(
+                'ad_set', 'adsets', ad_set_name, ('campaign_id', campaign_id),
+                self.create_ad_set,
+                campaign_id=campaign_id,
+                name=ad_set_name,
+                daily_budget=daily_budget,
+                targeting=targeting
+            )
+
+            group = {
+                'campaign_id': campaign_id,
+                'ad_set_id': ad_set_id,
+                'campaign_name': campaign_name,
+                'created_at': time.time()
+            }
+            self.ad_group_index.set(key, group)
+            return {**group, 'reused': False}
+
+    def forget_ad_group(self, campaign_name: str, daily_budget: int, targeting: dict, **spec) -> None:
+        """Remove um grupo do índice (ex: campanha excluída no Gerenciador de Anúncios)"""
+        self.ad_group_index.delete(
+            self.ad_group_key(campaign_name, daily_budget, targeting, **spec)
+        )
+
+
+def _batch_chunks(
+    indexes: list[int],
+    operations_by_ad: dict[int, list],
+    max_ads: Optional[int] = None
+) -> list[list[int]]:
+    """Agrupa anúncios em lotes que respeitam o limite de operações por batch"""
+    chunks = []
+    current: list[int] = []
+    count = 0
+
+    for i in indexes:
+        size = len(operations_by_ad[i])
+        if current and (count + size > BATCH_MAX_OPERATIONS or (max_ads and len(current) >= max_ads)):
+            chunks.append(current)
+            current, count = [], 0
+        current.append(i)
+        count += size
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _encode_batch_body(params: dict) -> str:
+    """Codifica parâmetros como corpo urlencoded, serializando listas e dicionários em JSON"""
+    encoded = {}
+    for key, value in params.items():
+        if isinstance(value, (dict, list, bool)):
+            encoded[key] = json.dumps(value, separators=(',', ':'))
+        else:
+            encoded[key] = value
+    return urlencode(encoded)
+
 
 # Exemplo de uso
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+"""
+Métricas em processo: spans por etapa, histogramas de latência e contadores,
+com exportação em OpenMetrics e JSON
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Optional
+
+
+# Limites (s) dos buckets de latência: de chamadas locais a gerações do DALL-E
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Prefixo dos nomes exportados
+METRIC_PREFIX = 'ads_'
+
+# Histograma das durações de etapa
+STAGE_DURATION = 'stage_duration_seconds'
+
+
+class Histogram:
+    """Histograma cumulativo de valores (latências em segundos)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Pares (limite superior, contagem acumulada), terminando em +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            pairs.append((str(bound), total))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimativa do quantil por interpolação linear dentro do bucket"""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # Acima do último bucket: o melhor palpite é o último limite
+        return self.buckets[-1]
+
+
+class _Span:
+    """Cronometra um bloco e registra a duração no histograma da etapa"""
+
+    __slots__ = ('registry', 'stage', 'labels', 'start', 'duration')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str, labels: dict):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        outcome = 'ok' if exc_type is None else 'error'
+        self.registry.observe(STAGE_DURATION, self.duration, stage=self.stage, outcome=outcome, **self.labels)
+        if exc_type is not None:
+            self.registry.inc('errors', stage=self.stage)
+
+
+class _NoopSpan:
+    """Span usado com as métricas desligadas: não mede nada"""
+
+    __slots__ = ()
+    duration = 0.0
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    """
+    Registro de histogramas e contadores, seguro para várias threads
+
+    Desligado, span() devolve um objeto reaproveitado que não faz nada e
+    inc()/observe() retornam logo após checar a flag, então a instrumentação
+    pode ficar nos caminhos quentes sem custo relevante.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Args:
+            enabled: Coletar métricas
+            buckets: Limites (s) dos buckets dos histogramas
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def span(self, stage: str, **labels):
+        """
+        Context manager que mede a duração de uma etapa
+
+        Uso:
+            with metrics.span('upload_image'):
+                ...
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage, labels)
+
+    def timed(self, stage: str) -> Callable:
+        """Decorador equivalente a envolver a função em span(stage)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, stage, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Soma `value` ao contador"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Registra um valor no histograma"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """Descarta tudo o que foi coletado"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def snapshot(self) -> dict:
+        """Estado atual em formato serializável em JSON"""
+        with self._lock:
+            histograms = {key: _copy_histogram(h) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        data = {
+            'enabled': self.enabled,
+            'started_at': self._started,
+            'uptime_s': round(time.time() - self._started, 3),
+            'histograms': {},
+            'counters': {}
+        }
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            data['histograms'].setdefault(name, []).append({
+                'labels': dict(labels),
+                'count': histogram.count,
+                'sum': round(histogram.sum, 6),
+                'p50': _round(histogram.quantile(0.50)),
+                'p95': _round(histogram.quantile(0.95)),
+                'p99': _round(histogram.quantile(0.99)),
+                'buckets': dict(histogram.cumulative())
+            })
+
+        for (name, labels), value in sorted(counters.items()):
+            data['counters'].setdefault(name, []).append({'labels': dict(labels), 'value': value})
+
+        return data
+
+    def to_openmetrics(self) -> str:
+        """Exporta no formato texto OpenMetrics (compatível com Prometheus)"""
+        with self._lock:
+            histograms = {key: _copy_histogram(h) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+
+        for name in sorted({name for name, _ in counters}):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}_total{_format_labels(labels)} {_format_value(value)}")
+
+        for name in sorted({name for name, _ in histograms}):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} histogram")
+            if metric.endswith("_seconds"):
+                lines.append(f"# UNIT {metric} seconds")
+            for (histogram_name, labels), histogram in sorted(histograms.items()):
+                if histogram_name != name:
+                    continue
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        """Grava o snapshot em JSON"""
+        _write_text(path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False))
+
+    def write_openmetrics(self, path: str) -> None:
+        """Grava a exportação OpenMetrics"""
+        _write_text(path, self.to_openmetrics())
+
+
+_metrics = MetricsRegistry(enabled=os.getenv('ADS_METRICS', '').lower() in ('1', 'true', 'yes'))
+
+
+def get_metrics() -> MetricsRegistry:
+    """Retorna o registro de métricas do processo (ligado com ADS_METRICS=1)"""
+    return _metrics
+
+
+def enable_metrics(enabled: bool = True) -> MetricsRegistry:
+    """Liga (ou desliga) a coleta de métricas do processo"""
+    _metrics.enabled = enabled
+    return _metrics
+
+
+def instrument_graph_api(api, registry: Optional[MetricsRegistry] = None) -> None:
+    """
+    Conta e cronometra cada requisição HTTP de uma instância de FacebookAdsApi
+
+    Args:
+        api: Instância de FacebookAdsApi (ex: retorno de FacebookAdsApi.init)
+        registry: Registro de métricas (padrão: o do processo)
+    """
+    registry = registry or _metrics
+    if getattr(api, '_metrics_registry', None) is registry:
+        return
+
+    original_call = api.call
+
+    def call(method, path, *args, **kwargs):
+        if not registry.enabled:
+            return original_call(method, path, *args, **kwargs)
+        registry.inc('requests', service='graph', method=method)
+        with registry.span('graph_request', method=method):
+            return original_call(method, path, *args, **kwargs)
+
+    api.call = call
+    api._metrics_registry = registry
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _copy_histogram(histogram: Histogram) -> Histogram:
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value: str) -> str:
+    """Escapa barra invertida, aspas e quebras de linha nos valores de label"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
+
+
+def _write_text(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
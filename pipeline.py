@@ -0,0 +1,149 @@
+"""
+Pipeline concorrente por etapas com filas limitadas (backpressure)
+"""
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+
+_SENTINEL = object()
+
+
+class _WorkItem:
+    """Item em trânsito pelo pipeline"""
+
+    __slots__ = ('index', 'payload', 'error', 'stage')
+
+    def __init__(self, index: int, payload: Any):
+        self.index = index
+        self.payload = payload
+        self.error: Optional[BaseException] = None
+        self.stage: Optional[str] = None
+
+
+class StagePipeline:
+    """
+    Executa uma sequência de etapas sobre uma lista de itens, cada etapa com
+    seu próprio pool de threads.
+
+    As etapas são ligadas por filas limitadas: quando uma etapa mais lenta
+    acumula trabalho, as anteriores bloqueiam em vez de produzir sem limite.
+    Assim a etapa N+1 de um item roda em paralelo com a etapa N do próximo.
+    """
+
+    def __init__(
+        self,
+        stages: list[tuple[str, Callable[[Any], Any], int]],
+        queue_size: int = 8
+    ):
+        """
+        Args:
+            stages: Lista de (nome, função, nº de workers). Cada função recebe o
+                    payload produzido pela etapa anterior e retorna o próximo.
+            queue_size: Capacidade máxima de cada fila entre etapas
+        """
+        if not stages:
+            raise ValueError("O pipeline precisa de pelo menos uma etapa")
+
+        for name, _, workers in stages:
+            if workers < 1:
+                raise ValueError(f"Etapa '{name}' precisa de pelo menos 1 worker")
+
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def run(
+        self,
+        items: list,
+        on_error: Optional[Callable[[Any, BaseException, str], Any]] = None
+    ) -> list:
+        """
+        Processa os itens e retorna os resultados na ordem de entrada
+
+        Args:
+            items: Payloads iniciais
+            on_error: Função (payload, exceção, etapa) que converte uma falha em
+                      resultado. Sem ela, a própria exceção é retornada.
+
+        Returns:
+            Lista de resultados, um por item, na mesma ordem de `items`
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        done: queue.Queue = queue.Queue()
+        results: list = [None] * len(items)
+
+        remaining = [workers for _, _, workers in self.stages]
+        lock = threading.Lock()
+
+        def worker(stage_index: int) -> None:
+            name, func, _ = self.stages[stage_index]
+            inbox = queues[stage_index]
+            is_last = stage_index == len(self.stages) - 1
+            outbox = done if is_last else queues[stage_index + 1]
+
+            try:
+                while True:
+                    item = inbox.get()
+                    if item is _SENTINEL:
+                        break
+
+                    # Itens com erro atravessam as etapas seguintes sem processamento.
+                    # Até um BaseException (SystemExit em uma etapa, por exemplo)
+                    # vira erro do item: a thread principal espera uma saída por
+                    # item, e o worker segue consumindo a fila
+                    try:
+                        if item.error is None:
+                            item.payload = func(item.payload)
+                    except BaseException as e:
+                        item.error = e
+                        item.stage = name
+                    finally:
+                        outbox.put(item)
+            finally:
+                # O último worker de cada etapa encerra a etapa seguinte, saia
+                # este pelo sentinela ou por uma falha inesperada
+                with lock:
+                    remaining[stage_index] -= 1
+                    finished = remaining[stage_index] == 0
+
+                if finished and not is_last:
+                    for _ in range(self.stages[stage_index + 1][2]):
+                        outbox.put(_SENTINEL)
+
+        threads = []
+        for stage_index, (name, _, workers) in enumerate(self.stages):
+            for n in range(workers):
+                thread = threading.Thread(
+                    target=worker,
+                    args=(stage_index,),
+                    name=f"pipeline-{name}-{n}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        def feeder() -> None:
+            for index, payload in enumerate(items):
+                queues[0].put(_WorkItem(index, payload))
+            for _ in range(self.stages[0][2]):
+                queues[0].put(_SENTINEL)
+
+        feeder_thread = threading.Thread(target=feeder, name="pipeline-feeder", daemon=True)
+        feeder_thread.start()
+
+        # Consumir a saída enquanto o pipeline roda para não travar a última fila
+        for _ in range(len(items)):
+            item = done.get()
+            if item.error is not None:
+                if on_error:
+                    results[item.index] = on_error(item.payload, item.error, item.stage)
+                else:
+                    results[item.index] = item.error
+            else:
+                results[item.index] = item.payload
+
+        feeder_thread.join()
+        for thread in threads:
+            thread.join()
+
+        return results
@@ -0,0 +1,204 @@
+"""
+Derivação local das proporções de cada posicionamento a partir de uma única
+imagem gerada (1792x1024 ou 1024x1792)
+"""
+import os
+from concurrent.futures import Executor
+from typing import Literal, Optional
+from PIL import Image, ImageFilter, ImageOps
+from image_optimizer import save_optimized
+
+
+# Proporções (largura, altura) por rótulo de posicionamento
+PLACEMENT_RATIOS = {
+    'square': (1, 1),      # Feed
+    'portrait': (4, 5),    # Feed vertical
+    'vertical': (9, 16),   # Stories / Reels
+}
+
+# Largura máxima das imagens derivadas (recomendação da Meta para feed e stories)
+PLACEMENT_MAX_WIDTH = 1080
+
+# Resolução do mapa de saliência ao longo do eixo recortado
+SALIENCY_RESOLUTION = 256
+
+
+def derive_placements(
+    source_path: str,
+    output_dir: Optional[str] = None,
+    labels: Optional[list[str]] = None,
+    mode: Literal["crop", "extend"] = "crop",
+    center_weight: float = 0.3,
+    quality: int = 85
+) -> dict[str, dict]:
+    """
+    Gera uma imagem por posicionamento a partir de uma única imagem de origem
+
+    Args:
+        source_path: Imagem gerada (idealmente 1024x1792, que cobre 9:16 sem perda)
+        output_dir: Pasta das imagens derivadas (padrão: pasta da origem)
+        labels: Posicionamentos a gerar (padrão: todos de PLACEMENT_RATIOS)
+        mode: 'crop' recorta a região de maior saliência; 'extend' mantém a
+              imagem inteira e preenche as bordas com um fundo desfocado
+        center_weight: Peso (0-1) da preferência pelo centro no recorte
+        quality: Qualidade do JPEG gerado
+
+    Returns:
+        Dicionário rótulo → resultado de save_optimized ('path', 'md5', ...)
+    """
+    output_dir = output_dir or os.path.dirname(source_path) or '.'
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+
+    with Image.open(source_path) as original:
+        source = original.convert('RGB')
+
+    results = {}
+    for label in labels or list(PLACEMENT_RATIOS):
+        ratio = PLACEMENT_RATIOS[label]
+        if mode == "extend":
+            image = extend_to_ratio(source, ratio)
+        else:
+            image = crop_to_ratio(source, ratio, center_weight)
+
+        if image.width > PLACEMENT_MAX_WIDTH:
+            height = round(image.height * PLACEMENT_MAX_WIDTH / image.width)
+            image = image.resize((PLACEMENT_MAX_WIDTH, height), Image.LANCZOS)
+
+        output_path = os.path.join(output_dir, f"{stem}_{label}.jpg")
+        results[label] = save_optimized(image, output_path, quality)
+
+    return results
+
+
+def derive_placements_many(
+    source_paths: list[str],
+    pool: Optional[Executor] = None,
+    **kwargs
+) -> list[dict[str, dict]]:
+    """
+    Deriva os posicionamentos de várias imagens, opcionalmente em um pool de processos
+
+    Args:
+        source_paths: Imagens de origem
+        pool: Executor (ex: ProcessPoolExecutor); sem ele, roda em sequência
+        **kwargs: Parâmetros de derive_placements
+
+    Returns:
+        Resultados de derive_placements, na mesma ordem de `source_paths`
+    """
+    if pool is None:
+        return [derive_placements(path, **kwargs) for path in source_paths]
+
+    futures = [pool.submit(derive_placements, path, **kwargs) for path in source_paths]
+    return [future.result() for future in futures]
+
+
+def crop_to_ratio(
+    image: Image.Image,
+    ratio: tuple[int, int],
+    center_weight: float = 0.3
+) -> Image.Image:
+    """
+    Recorta a imagem na proporção pedida, posicionando a janela de recorte
+    sobre a região com mais detalhes (bordas), com preferência pelo centro
+
+    Args:
+        image: Imagem de origem
+        ratio: Proporção (largura, altura)
+        center_weight: 0 segue só a saliência; 1 sempre recorta no centro
+
+    Returns:
+        Imagem recortada
+    """
+    width, height = image.size
+    target = ratio[0] / ratio[1]
+
+    if abs(width / height - target) < 1e-3:
+        return image.copy()
+
+    if width / height > target:
+        # Mais larga que o alvo: recortar na horizontal
+        crop_width = round(height * target)
+        left = _best_offset(image, crop_width, horizontal=True, center_weight=center_weight)
+        return image.crop((left, 0, left + crop_width, height))
+
+    crop_height = round(width / target)
+    top = _best_offset(image, crop_height, horizontal=False, center_weight=center_weight)
+    return image.crop((0, top, width, top + crop_height))
+
+
+def extend_to_ratio(image: Image.Image, ratio: tuple[int, int]) -> Image.Image:
+    """
+    Estende a imagem até a proporção pedida sem cortar o conteúdo, usando
+    uma versão ampliada e desfocada da própria imagem como fundo
+
+    Args:
+        image: Imagem de origem
+        ratio: Proporção (largura, altura)
+
+    Returns:
+        Imagem estendida
+    """
+    width, height = image.size
+    target = ratio[0] / ratio[1]
+
+    if width / height > target:
+        canvas_size = (width, round(width / target))
+    else:
+        canvas_size = (round(height * target), height)
+
+    background = ImageOps.fit(image, canvas_size, Image.LANCZOS)
+    background = background.filter(ImageFilter.GaussianBlur(radius=max(canvas_size) / 40))
+
+    offset = ((canvas_size[0] - width) // 2, (canvas_size[1] - height) // 2)
+    background.paste(image, offset)
+    return background
+
+
+def _best_offset(
+    image: Image.Image,
+    window: int,
+    horizontal: bool,
+    center_weight: float
+) -> int:
+    """
+    Posição inicial (em pixels) da janela de recorte com maior saliência
+
+    A saliência é aproximada pela energia de bordas, projetada no eixo do
+    recorte; cada posição é pontuada pela energia dentro da janela,
+    penalizada pela distância ao centro.
+    """
+    length = image.width if horizontal else image.height
+    if window >= length:
+        return 0
+
+    # Perfil de energia de bordas ao longo do eixo, em baixa resolução
+    scale = min(1.0, SALIENCY_RESOLUTION / length)
+    small = image.convert('L').resize(
+        (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+        Image.BILINEAR
+    )
+    edges = small.filter(ImageFilter.FIND_EDGES)
+    profile_size = (edges.width, 1) if horizontal else (1, edges.height)
+    profile = list(edges.convert('F').resize(profile_size, Image.BOX).getdata())
+
+    steps = len(profile)
+    span = max(1, min(steps, round(window * steps / length)))
+    free = steps - span
+    total = sum(profile)
+    if free <= 0 or total <= 0:
+        # Sem detalhes para seguir: recorte central
+        return (length - window) // 2
+
+    window_energy = sum(profile[:span])
+    best_score, best_start = None, free // 2
+
+    for start in range(free + 1):
+        if start:
+            window_energy += profile[start + span - 1] - profile[start - 1]
+        distance = abs(start - free / 2) / (free / 2)
+        score = (window_energy / total) * (1 - center_weight * distance ** 2)
+        if best_score is None or score > best_score:
+            best_score, best_start = score, start
+
+    return min(length - window, round(best_start * length / steps))
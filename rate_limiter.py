@@ -0,0 +1,317 @@
+"""
+Controle adaptativo de taxa para a Graph API da Meta, guiado pelos
+cabeçalhos de uso retornados em cada resposta
+"""
+import json
+import time
+import threading
+from typing import Optional
+from structured_logging import AdsLogger, get_logger
+
+
+# Códigos de erro de limite de taxa da Graph API
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# Cabeçalhos de uso enviados pela Graph API
+AD_ACCOUNT_USAGE_HEADER = 'x-ad-account-usage'
+BUSINESS_USAGE_HEADER = 'x-business-use-case-usage'
+APP_USAGE_HEADER = 'x-app-usage'
+
+# Chave usada para o uso do app (não associado a uma conta)
+APP_KEY = '__app__'
+
+_log = get_logger('rate_limiter')
+
+
+class _UsageState:
+    """Uso conhecido de uma conta de anúncios"""
+
+    __slots__ = ('usage_pct', 'blocked_until', 'updated_at')
+
+    def __init__(self):
+        self.usage_pct = 0.0
+        self.blocked_until = 0.0
+        self.updated_at = 0.0
+
+
+class MetaRateLimiter:
+    """
+    Limitador de taxa compartilhado entre todas as chamadas à Graph API
+
+    Lê X-Ad-Account-Usage, X-Business-Use-Case-Usage e X-App-Usage em cada
+    resposta e mantém, por conta, o maior percentual de uso e o tempo
+    estimado para recuperar o acesso. Antes de cada chamada:
+
+    - abaixo de `soft_limit`%: segue sem espera
+    - entre `soft_limit`% e `hard_limit`%: espera crescente até `max_delay`
+    - acima de `hard_limit`% ou bloqueada: espera até o acesso ser liberado
+    """
+
+    def __init__(
+        self,
+        soft_limit: float = 75.0,
+        hard_limit: float = 95.0,
+        max_delay: float = 30.0,
+        default_block: float = 60.0
+    ):
+        """
+        Args:
+            soft_limit: Percentual de uso a partir do qual as chamadas desaceleram
+            hard_limit: Percentual de uso a partir do qual as chamadas param
+            max_delay: Espera máxima (s) entre soft_limit e hard_limit
+            default_block: Espera (s) após erro de limite sem previsão de liberação
+        """
+        if not 0 <= soft_limit < hard_limit <= 100:
+            raise ValueError("É preciso 0 <= soft_limit < hard_limit <= 100")
+
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.max_delay = max_delay
+        self.default_block = default_block
+
+        self._states: dict[str, _UsageState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, key: str) -> _UsageState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _UsageState()
+        return state
+
+    def delay_for(self, account_id: Optional[str]) -> float:
+        """
+        Calcula quanto esperar antes da próxima chamada para a conta
+
+        Returns:
+            Segundos de espera (0 se a chamada pode seguir)
+        """
+        now = time.monotonic()
+        delay = 0.0
+
+        with self._lock:
+            for key in (account_id, APP_KEY):
+                state = self._states.get(key) if key else None
+                if state is None:
+                    continue
+
+                if state.blocked_until > now:
+                    delay = max(delay, state.blocked_until - now)
+                elif state.usage_pct >= self.hard_limit:
+                    delay = max(delay, self.default_block)
+                elif state.usage_pct >= self.soft_limit:
+                    # Cresce quadraticamente conforme o uso se aproxima do limite
+                    ratio = (state.usage_pct - self.soft_limit) / (self.hard_limit - self.soft_limit)
+                    delay = max(delay, self.max_delay * ratio ** 2)
+
+        return delay
+
+    def acquire(self, account_id: Optional[str] = None, log: Optional[AdsLogger] = None) -> float:
+        """
+        Espera, se necessário, antes de uma chamada para a conta
+
+        Args:
+            account_id: Conta de anúncios da chamada (se conhecida)
+            log: Logger do chamador (padrão: o do módulo)
+
+        Returns:
+            Segundos efetivamente aguardados
+        """
+        delay = self.delay_for(account_id)
+        if delay <= 0:
+            return 0.0
+
+        (log or _log).info(
+            f"⏳ Limite de uso da Meta próximo ({account_id or 'app'}): aguardando {delay:.1f}s",
+            extra={'delay_s': round(delay, 3)}
+        )
+        time.sleep(delay)
+
+        # A próxima resposta traz o uso atualizado; até lá, liberar uma chamada
+        with self._lock:
+            for key in (account_id, APP_KEY):
+                state = self._states.get(key) if key else None
+                if state and state.usage_pct >= self.hard_limit:
+                    state.usage_pct = self.soft_limit
+
+        return delay
+
+    def update(self, account_id: Optional[str], headers) -> None:
+        """
+        Atualiza o uso conhecido a partir dos cabeçalhos de uma resposta
+
+        Args:
+            account_id: Conta de anúncios da chamada (se conhecida)
+            headers: Cabeçalhos HTTP da resposta
+        """
+        if not headers:
+            return
+
+        headers = {str(k).lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+
+        account_pct, account_block = _parse_account_usage(headers.get(AD_ACCOUNT_USAGE_HEADER))
+        business_pct, business_block = _parse_business_usage(headers.get(BUSINESS_USAGE_HEADER))
+        app_pct = _parse_app_usage(headers.get(APP_USAGE_HEADER))
+
+        with self._lock:
+            if account_id and (account_pct is not None or business_pct is not None):
+                state = self._state(account_id)
+                state.usage_pct = max(account_pct or 0.0, business_pct or 0.0)
+                block = max(account_block, business_block)
+                state.blocked_until = now + block if block > 0 else 0.0
+                state.updated_at = now
+
+            if app_pct is not None:
+                state = self._state(APP_KEY)
+                state.usage_pct = app_pct
+                state.updated_at = now
+
+    def record_error(self, account_id: Optional[str], error, log: Optional[AdsLogger] = None) -> bool:
+        """
+        Registra um erro da Graph API; erros de limite bloqueiam a conta
+
+        Args:
+            account_id: Conta de anúncios da chamada
+            error: FacebookRequestError recebido
+            log: Logger do chamador (padrão: o do módulo)
+
+        Returns:
+            True se o erro era de limite de taxa
+        """
+        self.update(account_id, error.http_headers())
+
+        if error.api_error_code() not in RATE_LIMIT_ERROR_CODES:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(account_id or APP_KEY)
+            # Sem previsão nos cabeçalhos, usar o bloqueio padrão
+            if state.blocked_until <= now:
+                state.blocked_until = now + self.default_block
+            state.usage_pct = max(state.usage_pct, self.hard_limit)
+
+        (log or _log).warning(f"⚠️  Limite de taxa da Meta atingido ({account_id or 'app'}), "
+                              f"pausando chamadas por {state.blocked_until - now:.0f}s")
+        return True
+
+    def usage(self, account_id: str) -> dict:
+        """Retorna o uso conhecido da conta"""
+        with self._lock:
+            state = self._states.get(account_id) or _UsageState()
+            return {
+                'usage_pct': state.usage_pct,
+                'blocked_for': max(0.0, state.blocked_until - time.monotonic())
+            }
+
+    def install(
+        self,
+        api,
+        default_account_id: Optional[str] = None,
+        log: Optional[AdsLogger] = None
+    ) -> None:
+        """
+        Intercepta as chamadas de uma instância de FacebookAdsApi
+
+        Args:
+            api: Instância de FacebookAdsApi (ex: retorno de FacebookAdsApi.init)
+            default_account_id: Conta usada quando o caminho não indica uma
+                                (ex: requisições /batch)
+            log: Logger de quem usa a API (ex: o do MetaAdsManager), para que
+                 as esperas respeitem o modo silencioso dele
+        """
+        if getattr(api, '_rate_limiter', None) is self:
+            return
+
+        from facebook_business.exceptions import FacebookRequestError
+
+        original_call = api.call
+        limiter = self
+
+        def call(method, path, *args, **kwargs):
+            account_id = _account_from_path(path) or default_account_id
+            limiter.acquire(account_id, log=log)
+            try:
+                response = original_call(method, path, *args, **kwargs)
+            except FacebookRequestError as e:
+                limiter.record_error(account_id, e, log=log)
+                raise
+            limiter.update(account_id, response.headers())
+            return response
+
+        api.call = call
+        api._rate_limiter = self
+
+
+_shared_limiter: Optional[MetaRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter() -> MetaRateLimiter:
+    """Retorna o limitador compartilhado por todos os MetaAdsManager do processo"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = MetaRateLimiter()
+        return _shared_limiter
+
+
+def _account_from_path(path) -> Optional[str]:
+    """Extrai o ID act_xxx do caminho de uma chamada, se houver"""
+    parts = path.split('/') if isinstance(path, str) else [str(p) for p in path]
+    for part in parts:
+        if part.startswith('act_'):
+            return part.split('?')[0]
+    return None
+
+
+def _load_header(value):
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_account_usage(value) -> tuple[Optional[float], float]:
+    """X-Ad-Account-Usage → (percentual de uso, segundos até liberar)"""
+    data = _load_header(value)
+    if not isinstance(data, dict):
+        return None, 0.0
+    pct = float(data.get('acc_id_util_pct') or 0)
+    reset = float(data.get('reset_time_duration') or 0)
+    return pct, reset if pct >= 100 else 0.0
+
+
+def _parse_business_usage(value) -> tuple[Optional[float], float]:
+    """X-Business-Use-Case-Usage → (maior percentual de uso, segundos até liberar)"""
+    data = _load_header(value)
+    if not isinstance(data, dict):
+        return None, 0.0
+
+    pct = 0.0
+    block = 0.0
+    for entries in data.values():
+        for entry in entries if isinstance(entries, list) else [entries]:
+            pct = max(
+                pct,
+                float(entry.get('call_count') or 0),
+                float(entry.get('total_cputime') or 0),
+                float(entry.get('total_time') or 0)
+            )
+            # estimated_time_to_regain_access vem em minutos
+            block = max(block, float(entry.get('estimated_time_to_regain_access') or 0) * 60)
+    return pct, block
+
+
+def _parse_app_usage(value) -> Optional[float]:
+    """X-App-Usage → maior percentual de uso do app"""
+    data = _load_header(value)
+    if not isinstance(data, dict):
+        return None
+    return max(
+        float(data.get('call_count') or 0),
+        float(data.get('total_cputime') or 0),
+        float(data.get('total_time') or 0)
+    )
@@ -0,0 +1,160 @@
+"""
+Retentativas por etapa com backoff exponencial e jitter
+"""
+import sys
+import time
+import random
+from typing import Callable, Optional, TypeVar
+from metrics import get_metrics
+from structured_logging import AdsLogger, get_logger
+
+
+T = TypeVar('T')
+
+# Códigos da Graph API que indicam falha temporária (indisponibilidade ou limite de taxa)
+TRANSIENT_META_CODES = {1, 2, 4, 17, 32, 341, 613} | set(range(80000, 80015))
+
+# Status HTTP que valem nova tentativa
+TRANSIENT_HTTP_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_log = get_logger('retry')
+
+
+class RetryPolicy:
+    """Parâmetros de retentativa: número de tentativas e backoff exponencial com jitter"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        jitter: bool = True
+    ):
+        """
+        Args:
+            max_attempts: Total de tentativas (incluindo a primeira)
+            base_delay: Espera base (s) antes da segunda tentativa
+            max_delay: Espera máxima (s) entre tentativas
+            jitter: Sortear a espera entre 0 e o teto ("full jitter"), para
+                    que workers concorrentes não tentem todos ao mesmo tempo
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts precisa ser pelo menos 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """
+        Espera antes da próxima tentativa
+
+        Args:
+            attempt: Número da tentativa que acabou de falhar (1, 2, ...)
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+# Sem novas tentativas: útil para desativar retentativas em um componente
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Classifica um erro como temporário (vale tentar de novo) ou definitivo
+
+    Reconhece FacebookRequestError (flag is_transient, códigos de
+    indisponibilidade/limite e HTTP 5xx), erros do SDK da OpenAI (conexão,
+    timeout, limite de taxa, erro interno) e falhas de rede do requests.
+    Só consulta os SDKs já importados: um erro deles implica o módulo
+    carregado, e a classificação não paga o custo de importá-los.
+    """
+    facebook_exceptions = sys.modules.get('facebook_business.exceptions')
+    if facebook_exceptions and isinstance(error, facebook_exceptions.FacebookRequestError):
+        if error.api_transient_error():
+            return True
+        if error.api_error_code() in TRANSIENT_META_CODES:
+            return True
+        return (error.http_status() or 0) >= 500
+
+    openai = sys.modules.get('openai')
+    if openai and isinstance(error, openai.OpenAIError):
+        # APITimeoutError é subclasse de APIConnectionError
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in TRANSIENT_HTTP_STATUS
+        return False
+
+    requests = sys.modules.get('requests')
+    if requests and isinstance(error, requests.RequestException):
+        if isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in TRANSIENT_HTTP_STATUS
+
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_call(
+    func: Callable[..., T],
+    *args,
+    policy: Optional[RetryPolicy] = None,
+    stage: str = '',
+    on_retry: Optional[Callable[[str, int, BaseException], None]] = None,
+    log: Optional[AdsLogger] = None,
+    **kwargs
+) -> T:
+    """
+    Executa uma etapa, repetindo-a apenas em erros temporários
+
+    Args:
+        func: Função da etapa
+        *args: Argumentos posicionais da função
+        policy: Política de retentativa (padrão: RetryPolicy())
+        stage: Nome da etapa, usado nas mensagens
+        on_retry: Chamado com (etapa, tentativa, erro) antes de cada espera
+        log: Logger do chamador, para respeitar o modo silencioso dele
+             (padrão: o do módulo)
+        **kwargs: Argumentos nomeados da função
+
+    Returns:
+        O retorno de func
+    """
+    policy = policy or RetryPolicy()
+    log = log or _log
+
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= policy.max_attempts or not is_transient_error(e):
+                raise
+
+            wait = policy.delay(attempt)
+            get_metrics().inc('retries', stage=stage or func.__name__)
+            if on_retry:
+                on_retry(stage, attempt, e)
+            log.warning(
+                f"⚠️  Erro transiente na etapa '{stage or func.__name__}' "
+                f"(tentativa {attempt}/{policy.max_attempts}), "
+                f"nova tentativa em {wait:.1f}s: {_short_message(e)}",
+                extra={'stage': stage or func.__name__, 'attempt': attempt}
+            )
+            time.sleep(wait)
+
+    raise RuntimeError("unreachable")
+
+
+def _short_message(error: BaseException) -> str:
+    """Mensagem curta do erro (FacebookRequestError tem um str() de várias linhas)"""
+    get_message = getattr(error, 'api_error_message', None)
+    message = get_message() if callable(get_message) else None
+    if message:
+        return message
+
+    text = str(error).strip()
+    return text.splitlines()[0] if text else type(error).__name__
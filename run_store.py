@@ -0,0 +1,349 @@
+"""
+Registro append-only das execuções da automação, indexado em SQLite
+"""
+import os
+import glob
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional, Union
+from local_store import SQLITE_BUSY_TIMEOUT
+from structured_logging import get_logger
+
+
+DEFAULT_RUN_STORE_PATH = os.getenv('ADS_RUN_STORE', './logs/runs.sqlite3')
+
+# Registros acumulados antes de uma gravação em lote
+DEFAULT_BATCH_SIZE = 50
+
+# Segundos máximos que um registro espera no buffer
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id        TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    campaign_name TEXT,
+    campaign_id   TEXT,
+    ad_set_id     TEXT,
+    creative_id   TEXT,
+    ad_id         TEXT,
+    error         TEXT,
+    data          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_campaign_name ON runs (campaign_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_campaign_id ON runs (campaign_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_ad_id ON runs (ad_id);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, created_at);
+"""
+
+_COLUMNS = ('run_id', 'created_at', 'status', 'campaign_name', 'campaign_id',
+            'ad_set_id', 'creative_id', 'ad_id', 'error', 'data')
+
+_log = get_logger('run_store')
+
+
+class RunStore:
+    """
+    Resultados de cada anúncio (sucesso ou erro) em uma tabela SQLite
+
+    Substitui os arquivos ./logs/automation_log_*.json: os registros só são
+    inseridos, nunca alterados, e ficam indexados por campanha, ID do
+    anúncio, data e status, então consultas históricas não precisam abrir
+    arquivo por arquivo.
+
+    As gravações são agrupadas: record() só guarda o registro em memória e
+    cada lote de até `batch_size` registros entra em uma única transação.
+    O buffer é gravado ao atingir o tamanho, quando o registro mais antigo
+    completa `flush_interval` segundos (por um timer, mesmo sem novos
+    record()), em flush(), close() e na saída do processo.
+
+    O registro é só contabilidade e nunca muda o resultado de um anúncio:
+    falhas de gravação (banco travado, disco cheio) são registradas no log
+    e os registros continuam no buffer para a próxima tentativa. A retomada
+    de anúncios continua a cargo do AdJournal, que sincroniza cada etapa
+    com o disco.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_RUN_STORE_PATH,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        """
+        Args:
+            path: Arquivo do banco (criado se não existir)
+            batch_size: Registros por transação
+            flush_interval: Segundos máximos entre o record() e a gravação
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: list[tuple] = []
+        self._oldest_pending = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        atexit.register(self.close)
+
+    def record(
+        self,
+        result: dict,
+        run_id: str,
+        campaign_name: Optional[str] = None,
+        created_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Acrescenta o resultado de um anúncio ao buffer
+
+        Args:
+            result: Dicionário retornado por create_ad_with_ai_image
+            run_id: Identificador da execução do anúncio
+            campaign_name: Nome da campanha (padrão: o de result['meta_ad'])
+            created_at: Momento da execução (padrão: agora)
+        """
+        meta_ad = result.get('meta_ad') or {}
+        row = (
+            run_id,
+            _iso(created_at or datetime.now(timezone.utc)),
+            'success' if result.get('success') else 'error',
+            campaign_name or meta_ad.get('campaign_name'),
+            meta_ad.get('campaign_id'),
+            meta_ad.get('ad_set_id'),
+            meta_ad.get('creative_id'),
+            meta_ad.get('ad_id'),
+            result.get('error'),
+            json.dumps(result, ensure_ascii=False, default=str)
+        )
+
+        with self._lock:
+            if not self._pending:
+                self._oldest_pending = time.monotonic()
+                self._schedule_flush()
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._oldest_pending >= self.flush_interval)
+            if due:
+                self._try_write_pending()
+
+    def flush(self) -> int:
+        """
+        Grava o buffer em uma única transação
+
+        Returns:
+            Número de registros gravados (0 se a gravação falhou; o buffer
+            é mantido para a próxima tentativa)
+        """
+        with self._lock:
+            return self._try_write_pending()
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e fecha o banco"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._try_write_pending()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> 'RunStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def query(
+        self,
+        campaign_name: Optional[str] = None,
+        campaign_id: Optional[str] = None,
+        ad_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Busca registros pelos campos indexados, do mais recente ao mais antigo
+
+        Args:
+            campaign_name: Nome exato da campanha
+            campaign_id: ID da campanha na Meta
+            ad_id: ID do anúncio na Meta
+            status: 'success' ou 'error'
+            since: Início do período (inclusivo; datetime ou ISO 8601 em UTC)
+            until: Fim do período (exclusivo)
+            limit: Máximo de registros
+
+        Returns:
+            Lista de registros com os campos indexados e o resultado em 'data'
+
+        Exemplo:
+            store.query(campaign_name="Campanha X", since=datetime(2025, 10, 1), status='success')
+        """
+        where, params = self._filters(campaign_name, campaign_id, ad_id, status, since, until)
+        sql = f"SELECT id, {', '.join(_COLUMNS)} FROM runs{where} ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute(sql, params).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(zip(('id',) + _COLUMNS, row))
+            record['data'] = json.loads(record['data'])
+            records.append(record)
+        return records
+
+    def count(
+        self,
+        campaign_name: Optional[str] = None,
+        campaign_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None
+    ) -> int:
+        """Conta registros com os mesmos filtros de query()"""
+        where, params = self._filters(campaign_name, campaign_id, None, status, since, until)
+        with self._lock:
+            self._write_pending()
+            return self._conn.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+
+    def get_by_ad_id(self, ad_id: str) -> Optional[dict]:
+        """Retorna o registro mais recente do anúncio, ou None"""
+        records = self.query(ad_id=ad_id, limit=1)
+        return records[0] if records else None
+
+    def import_json_logs(self, directory: str = './logs', pattern: str = 'automation_log_*.json') -> int:
+        """
+        Importa os arquivos de log por anúncio das versões anteriores
+
+        Args:
+            directory: Pasta dos logs
+            pattern: Padrão dos nomes de arquivo
+
+        Returns:
+            Número de arquivos importados (os ilegíveis são ignorados)
+        """
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            run_id = os.path.basename(path)[len('automation_log_'):-len('.json')]
+            try:
+                created_at = datetime.strptime(result.get('timestamp', ''), "%Y%m%d_%H%M%S")
+            except ValueError:
+                created_at = datetime.fromtimestamp(os.path.getmtime(path))
+            self.record(result, run_id=run_id, created_at=created_at)
+            imported += 1
+
+        self.flush()
+        return imported
+
+    def _schedule_flush(self) -> None:
+        """Agenda a gravação do buffer para daqui a flush_interval (chamar com o lock)"""
+        if self._timer is not None or self.flush_interval <= 0:
+            return
+        self._timer = threading.Timer(self.flush_interval, self._flush_due)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_due(self) -> None:
+        """Grava o buffer quando o intervalo vence sem novos record()"""
+        with self._lock:
+            self._timer = None
+            self._try_write_pending()
+            if self._pending:
+                # A gravação falhou: tentar de novo no próximo intervalo
+                self._schedule_flush()
+
+    def _try_write_pending(self) -> int:
+        """_write_pending sem propagar falhas do banco (chamar com o lock adquirido)"""
+        try:
+            return self._write_pending()
+        except sqlite3.Error as e:
+            _log.warning(
+                f"⚠️  Não foi possível gravar {len(self._pending)} registros em {self.path}: {e} "
+                f"(mantidos no buffer)",
+                extra={'pending': len(self._pending)}
+            )
+            return 0
+
+    def _write_pending(self) -> int:
+        """Insere o buffer em uma transação (chamar com o lock adquirido)"""
+        if not self._pending or self._conn is None:
+            return 0
+
+        rows = self._pending
+        placeholders = ', '.join('?' * len(_COLUMNS))
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+
+        # Só sai do buffer depois do commit
+        self._pending = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return len(rows)
+
+    @staticmethod
+    def _filters(
+        campaign_name: Optional[str],
+        campaign_id: Optional[str],
+        ad_id: Optional[str],
+        status: Optional[str],
+        since: Optional[Union[datetime, str]],
+        until: Optional[Union[datetime, str]]
+    ) -> tuple[str, list[Any]]:
+        clauses, params = [], []
+        for column, value in (('campaign_name', campaign_name), ('campaign_id', campaign_id),
+                              ('ad_id', ad_id), ('status', status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_iso(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _iso(value: Union[datetime, str]) -> str:
+    """Converte para ISO 8601 em UTC, o formato gravado em created_at"""
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).isoformat(timespec='seconds')
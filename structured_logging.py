@@ -0,0 +1,195 @@
+"""
+Logging estruturado e não bloqueante para a automação
+
+Todos os módulos registram em loggers filhos de "ads". O logger raiz da
+automação só tem um QueueHandler: quem loga apenas coloca o registro em uma
+fila, e uma thread do QueueListener formata e escreve no terminal. Assim
+threads de geração, download e publicação nunca disputam o stdout.
+
+Formatos (variável ADS_LOG_FORMAT ou configure_logging):
+    console: só a mensagem, como os prints de antes (padrão)
+    json:    uma linha JSON por registro, com nível, logger, thread e campos extras
+
+Nível: ADS_LOG_LEVEL (padrão INFO). O prompt revisado pela IA e outros
+detalhes longos saem em DEBUG.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+
+# Logger pai de todos os componentes da automação
+LOGGER_NAME = 'ads'
+
+LOG_FORMATS = ('console', 'json')
+
+# Largura das linhas separadoras do formato console
+BANNER_WIDTH = 60
+
+# Atributos padrão de um LogRecord (o resto vira campo extra no JSON)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'banner'}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    Só a mensagem, como os prints originais
+
+    Registros com extra={'banner': '='} (ou '-') saem entre linhas separadoras.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        banner = getattr(record, 'banner', None)
+        if banner:
+            line = banner * BANNER_WIDTH
+            return f"\n{line}\n{message}\n{line}"
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos extras do contexto"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class AdsLogger(logging.LoggerAdapter):
+    """
+    Logger de um componente com campos de contexto fixos e modo silencioso
+
+    Com quiet=True só avisos e erros passam; o descarte acontece antes de
+    qualquer formatação, então o custo no caminho quente é uma comparação.
+    """
+
+    def __init__(self, logger: logging.Logger, quiet: bool = False, **context):
+        super().__init__(logger, context)
+        self.quiet = quiet
+
+    def isEnabledFor(self, level: int) -> bool:
+        if self.quiet and level < logging.WARNING:
+            return False
+        if _listener is None:
+            # Antes da configuração o nível efetivo ainda é o do logger raiz
+            _ensure_configured()
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        # Mescla o contexto fixo com o extra da chamada (o da chamada prevalece)
+        if self.extra:
+            kwargs['extra'] = {**self.extra, **kwargs.get('extra', {})}
+        return msg, kwargs
+
+
+def configure_logging(
+    log_format: Optional[str] = None,
+    level: Optional[str] = None,
+    stream: Optional[TextIO] = None
+) -> logging.Logger:
+    """
+    (Re)configura o logger "ads" com fila e listener em thread própria
+
+    Args:
+        log_format: 'console' ou 'json' (padrão: ADS_LOG_FORMAT ou 'console')
+        level: Nível mínimo (padrão: ADS_LOG_LEVEL ou 'INFO')
+        stream: Destino (padrão: sys.stdout)
+
+    Returns:
+        O logger "ads"
+    """
+    global _listener
+
+    log_format = (log_format or os.getenv('ADS_LOG_FORMAT') or 'console').lower()
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Formato de log inválido: {log_format} (use {', '.join(LOG_FORMATS)})")
+    level = (level or os.getenv('ADS_LOG_LEVEL') or 'INFO').upper()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else ConsoleFormatter())
+
+    with _lock:
+        logger = logging.getLogger(LOGGER_NAME)
+        if _listener is not None:
+            _listener.stop()
+        for old in list(logger.handlers):
+            logger.removeHandler(old)
+
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(log_queue))
+        logger.setLevel(level)
+        logger.propagate = False
+
+        _listener = QueueListener(log_queue, handler)
+        _listener.start()
+
+    return logger
+
+
+def get_logger(component: str, quiet: bool = False, **context) -> AdsLogger:
+    """
+    Logger de um componente (ex: 'meta_ads')
+
+    O logging é configurado (ADS_LOG_FORMAT/ADS_LOG_LEVEL) no primeiro
+    registro emitido, não na importação.
+
+    Args:
+        component: Nome do componente (vira "ads.<component>")
+        quiet: Só registrar avisos e erros
+        **context: Campos incluídos em todo registro (saem no formato json)
+    """
+    return AdsLogger(logging.getLogger(f"{LOGGER_NAME}.{component}"), quiet=quiet, **context)
+
+
+def flush_logs() -> None:
+    """
+    Espera a fila de logs esvaziar
+
+    Só tem efeito na thread principal, ao fim das chamadas de alto nível,
+    para que a saída não se misture com prints do script; threads de
+    trabalho nunca esperam pelo terminal.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def _ensure_configured() -> None:
+    with _lock:
+        needs_setup = _listener is None
+    if needs_setup:
+        configure_logging()
+
+
+def _shutdown() -> None:
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,109 @@
+"""
+Cache endereçado por conteúdo dos uploads de imagem para a Meta
+"""
+import os
+import time
+import hashlib
+from typing import Optional
+from local_store import SqliteIndex, DEFAULT_CACHE_DIR
+
+
+# Depois deste prazo a entrada precisa ser confirmada na conta antes do uso
+DEFAULT_UPLOAD_TTL = 7 * 24 * 3600
+
+
+def file_md5(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o MD5 de um arquivo em blocos
+
+    Args:
+        path: Caminho do arquivo
+        chunk_size: Tamanho de cada bloco lido
+
+    Returns:
+        MD5 em hexadecimal (igual ao hash de imagem da Meta)
+    """
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    Índice persistente (conta de anúncios + MD5 dos bytes) → hash da imagem
+
+    O hash que a Meta atribui a uma imagem é o MD5 do conteúdo, então o mesmo
+    arquivo enviado de novo para a mesma conta não precisa subir outra vez.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = DEFAULT_UPLOAD_TTL):
+        """
+        Args:
+            path: Arquivo do índice (padrão: ./cache/uploaded_images.sqlite3)
+            ttl: Segundos até uma entrada precisar de revalidação
+        """
+        self.index = SqliteIndex(path or os.path.join(DEFAULT_CACHE_DIR, 'uploaded_images.sqlite3'))
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(ad_account_id: str, md5: str) -> str:
+        return f"{ad_account_id}:{md5}"
+
+    def lookup(self, ad_account_id: str, md5: str) -> tuple[Optional[str], bool]:
+        """
+        Procura uma imagem já enviada
+
+        Args:
+            ad_account_id: Conta de anúncios
+            md5: MD5 do conteúdo da imagem
+
+        Returns:
+            (hash da imagem ou None, se a entrada está vencida)
+        """
+        entry = self.index.get(self._key(ad_account_id, md5))
+        if not entry:
+            return None, False
+
+        stale = time.time() - entry.get('validated_at', 0) > self.ttl
+        return entry['hash'], stale
+
+    def record(self, ad_account_id: str, md5: str, image_hash: str) -> None:
+        """Registra um upload concluído"""
+        now = time.time()
+        self.index.set(self._key(ad_account_id, md5), {
+            'hash': image_hash,
+            'uploaded_at': now,
+            'validated_at': now
+        })
+
+    def stale_entries(self, ad_account_id: str) -> dict[str, str]:
+        """
+        Lista as entradas vencidas de uma conta
+
+        Returns:
+            Mapa MD5 → hash da imagem
+        """
+        prefix = f"{ad_account_id}:"
+        now = time.time()
+        return {
+            key[len(prefix):]: entry['hash']
+            for key, entry in self.index.items(prefix)
+            if now - entry.get('validated_at', 0) > self.ttl
+        }
+
+    def mark_validated(self, ad_account_id: str, md5s: list[str]) -> None:
+        """Renova o prazo das entradas confirmadas na conta"""
+        now = time.time()
+        updates = {}
+        for md5 in md5s:
+            key = self._key(ad_account_id, md5)
+            entry = self.index.get(key)
+            if entry:
+                updates[key] = {**entry, 'validated_at': now}
+        self.index.update(updates)
+
+    def forget(self, ad_account_id: str, md5s: list[str]) -> None:
+        """Remove entradas cujas imagens não existem mais na conta"""
+        self.index.delete(*(self._key(ad_account_id, md5) for md5 in md5s))